@@ -20,25 +20,32 @@ except ImportError:
 class Screenshot:
     """屏幕截图工具类"""
     
-    def __init__(self, save_dir: str = "screenshots"):
+    def __init__(self, save_dir: str = "screenshots", writer=None, verbose: bool = True):
         """
         初始化截图工具
         
         Args:
             save_dir: 默认保存目录
+            writer: 异步写入器（AsyncImageWriter），为None时在当前线程同步保存PNG
+            verbose: 是否打印保存信息
         """
         self.save_dir = save_dir
+        self.writer = writer
+        self.verbose = verbose
+        self._monitors: Optional[List[Dict]] = None  # 显示器信息缓存
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
     
     def capture_fullscreen(self, save_path: Optional[str] = None, 
-                          all_screens: bool = False) -> Image.Image:
+                          all_screens: bool = False,
+                          save: bool = True) -> Image.Image:
         """
         捕获全屏截图
         
         Args:
             save_path: 保存路径，如果为None则自动生成文件名
             all_screens: 是否捕获所有屏幕（多显示器时）
+            save: 是否保存到文件（False时只返回图像，可直接传给识别器）
         
         Returns:
             PIL.Image.Image: 截图图像对象
@@ -52,17 +59,18 @@ class Screenshot:
         # 捕获屏幕（支持多屏幕）
         img = ImageGrab.grab(all_screens=all_screens)
         
+        if not save:
+            return img
+        
         # 保存图片
         if save_path:
-            img.save(save_path)
-            print(f"✓ 全屏截图已保存: {save_path}")
+            self._save(img, save_path, "全屏截图")
         else:
             # 自动生成文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"fullscreen_{timestamp}.png"
+            filename = f"fullscreen_{timestamp}{self._extension}"
             filepath = os.path.join(self.save_dir, filename)
-            img.save(filepath)
-            print(f"✓ 全屏截图已保存: {filepath}")
+            self._save(img, filepath, "全屏截图")
         
         return img
     
@@ -71,7 +79,8 @@ class Screenshot:
                       y: int, 
                       width: int, 
                       height: int,
-                      save_path: Optional[str] = None) -> Image.Image:
+                      save_path: Optional[str] = None,
+                      save: bool = True) -> Image.Image:
         """
         捕获指定区域的截图
         
@@ -81,6 +90,7 @@ class Screenshot:
             width: 区域宽度
             height: 区域高度
             save_path: 保存路径，如果为None则自动生成文件名
+            save: 是否保存到文件（False时只返回图像，可直接传给识别器）
         
         Returns:
             PIL.Image.Image: 截图图像对象
@@ -89,6 +99,9 @@ class Screenshot:
             >>> screenshot = Screenshot()
             >>> # 截取从(100, 100)开始，宽800高600的区域
             >>> img = screenshot.capture_region(100, 100, 800, 600)
+            >>> # 不保存文件，直接交给识别器
+            >>> img = screenshot.capture_region(100, 100, 800, 600, save=False)
+            >>> result = recognizer.recognize(img)
         """
         # 计算边界框 (left, top, right, bottom)
         bbox = (x, y, x + width, y + height)
@@ -96,26 +109,48 @@ class Screenshot:
         # 捕获指定区域
         img = ImageGrab.grab(bbox=bbox)
         
+        if not save:
+            return img
+        
         # 保存图片
         if save_path:
-            img.save(save_path)
-            print(f"✓ 区域截图已保存: {save_path}")
+            self._save(img, save_path, "区域截图")
         else:
             # 自动生成文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"region_{x}_{y}_{width}x{height}_{timestamp}.png"
+            filename = f"region_{x}_{y}_{width}x{height}_{timestamp}{self._extension}"
             filepath = os.path.join(self.save_dir, filename)
-            img.save(filepath)
-            print(f"✓ 区域截图已保存: {filepath}")
+            self._save(img, filepath, "区域截图")
         
         return img
     
+    def capture_profile(self, profile, save_path: Optional[str] = None,
+                        save: bool = True) -> Image.Image:
+        """
+        按截图配置截取区域
+        
+        Args:
+            profile: 带 region 属性 (x, y, 宽, 高) 的对象（如 profiles.CaptureProfile）
+            save_path: 保存路径，如果为None则自动生成文件名
+            save: 是否保存到文件
+        
+        Returns:
+            PIL.Image.Image: 截图图像对象
+        
+        Examples:
+            >>> profiles = load_profiles("profiles.json")
+            >>> img = screenshot.capture_profile(profiles["main"], save=False)
+        """
+        x, y, width, height = profile.region
+        return self.capture_region(x, y, width, height, save_path, save=save)
+    
     def capture_bbox(self,
                     left: int,
                     top: int,
                     right: int,
                     bottom: int,
-                    save_path: Optional[str] = None) -> Image.Image:
+                    save_path: Optional[str] = None,
+                    save: bool = True) -> Image.Image:
         """
         使用边界框坐标捕获截图
         
@@ -125,6 +160,7 @@ class Screenshot:
             right: 右边界X坐标
             bottom: 下边界Y坐标
             save_path: 保存路径，如果为None则自动生成文件名
+            save: 是否保存到文件（False时只返回图像，可直接传给识别器）
         
         Returns:
             PIL.Image.Image: 截图图像对象
@@ -139,22 +175,46 @@ class Screenshot:
         # 捕获指定区域
         img = ImageGrab.grab(bbox=bbox)
         
+        if not save:
+            return img
+        
         # 保存图片
         if save_path:
-            img.save(save_path)
-            print(f"✓ 边界框截图已保存: {save_path}")
+            self._save(img, save_path, "边界框截图")
         else:
             # 自动生成文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             width = right - left
             height = bottom - top
-            filename = f"bbox_{left}_{top}_{width}x{height}_{timestamp}.png"
+            filename = f"bbox_{left}_{top}_{width}x{height}_{timestamp}{self._extension}"
             filepath = os.path.join(self.save_dir, filename)
-            img.save(filepath)
-            print(f"✓ 边界框截图已保存: {filepath}")
+            self._save(img, filepath, "边界框截图")
         
         return img
     
+    @property
+    def _extension(self) -> str:
+        """自动生成文件名时使用的扩展名"""
+        return self.writer.extension if self.writer is not None else '.png'
+    
+    def _save(self, img: Image.Image, filepath: str, label: str) -> Optional[str]:
+        """
+        保存截图（有写入器时交给后台线程）
+        
+        Returns:
+            实际保存路径；写入器队列已满而丢弃时返回None
+        """
+        if self.writer is not None:
+            filepath = self.writer.submit(img, filepath)
+            if self.verbose:
+                print(f"✓ {label}已加入保存队列: {filepath}" if filepath else f"⚠️  {label}保存队列已满，已丢弃")
+            return filepath
+        
+        img.save(filepath)
+        if self.verbose:
+            print(f"✓ {label}已保存: {filepath}")
+        return filepath
+    
     def get_screen_size(self, all_screens: bool = False) -> Tuple[int, int]:
         """
         获取屏幕尺寸
@@ -173,10 +233,15 @@ class Screenshot:
         img = ImageGrab.grab(all_screens=all_screens)
         return img.size
     
-    def get_monitors_info(self) -> List[Dict]:
+    def get_monitors_info(self, refresh: bool = False) -> List[Dict]:
         """
         获取所有显示器信息（需要安装 screeninfo 库）
         
+        结果会被缓存，显示器布局变化后可传入 refresh=True 重新查询。
+        
+        Args:
+            refresh: 是否忽略缓存重新查询
+        
         Returns:
             List[Dict]: 显示器信息列表，每个包含 x, y, width, height, is_primary
         
@@ -186,11 +251,14 @@ class Screenshot:
             >>> for i, monitor in enumerate(monitors):
             ...     print(f"显示器{i}: {monitor['width']}x{monitor['height']}")
         """
+        if self._monitors is not None and not refresh:
+            return self._monitors
+        
         if not SCREENINFO_AVAILABLE:
             print("⚠️  需要安装 screeninfo 库: pip install screeninfo")
             # 返回主屏幕信息
             width, height = self.get_screen_size()
-            return [{
+            self._monitors = [{
                 'index': 0,
                 'x': 0,
                 'y': 0,
@@ -198,6 +266,7 @@ class Screenshot:
                 'height': height,
                 'is_primary': True
             }]
+            return self._monitors
         
         monitors = []
         for i, monitor in enumerate(get_monitors()):
@@ -210,16 +279,19 @@ class Screenshot:
                 'height': monitor.height,
                 'is_primary': monitor.is_primary if hasattr(monitor, 'is_primary') else (i == 0)
             })
+        self._monitors = monitors
         return monitors
     
     def capture_monitor(self, monitor_index: int = 0, 
-                       save_path: Optional[str] = None) -> Image.Image:
+                       save_path: Optional[str] = None,
+                       save: bool = True) -> Image.Image:
         """
         捕获指定显示器的截图
         
         Args:
             monitor_index: 显示器索引（0为主显示器）
             save_path: 保存路径
+            save: 是否保存到文件（False时只返回图像，可直接传给识别器）
         
         Returns:
             PIL.Image.Image: 截图图像对象
@@ -247,16 +319,17 @@ class Screenshot:
         
         img = ImageGrab.grab(bbox=bbox)
         
+        if not save:
+            return img
+        
         # 保存图片
         if save_path:
-            img.save(save_path)
-            print(f"✓ 显示器{monitor_index}截图已保存: {save_path}")
+            self._save(img, save_path, f"显示器{monitor_index}截图")
         else:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"monitor_{monitor_index}_{monitor['width']}x{monitor['height']}_{timestamp}.png"
+            filename = f"monitor_{monitor_index}_{monitor['width']}x{monitor['height']}_{timestamp}{self._extension}"
             filepath = os.path.join(self.save_dir, filename)
-            img.save(filepath)
-            print(f"✓ 显示器{monitor_index}截图已保存: {filepath}")
+            self._save(img, filepath, f"显示器{monitor_index}截图")
         
         return img
     
@@ -264,6 +337,8 @@ class Screenshot:
         """
         分别捕获所有显示器的截图
         
+        只截取一次整个桌面，再按显示器位置裁剪。
+        
         Args:
             save_dir: 保存目录，如果为None则使用默认目录
         
@@ -281,12 +356,28 @@ class Screenshot:
         save_directory = save_dir if save_dir else self.save_dir
         
         print(f"\n捕获 {len(monitors)} 个显示器的截图...")
+        
+        # 一次截取整个虚拟桌面，左上角为所有显示器的最小坐标
+        desktop = ImageGrab.grab(all_screens=len(monitors) > 1)
+        origin_x = min(m['x'] for m in monitors)
+        origin_y = min(m['y'] for m in monitors)
+        covers_all = all(m['x'] - origin_x + m['width'] <= desktop.width and
+                         m['y'] - origin_y + m['height'] <= desktop.height for m in monitors)
+        
         for i, monitor in enumerate(monitors):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"monitor_{i}_{monitor['width']}x{monitor['height']}_{timestamp}.png"
+            filename = f"monitor_{i}_{monitor['width']}x{monitor['height']}_{timestamp}{self._extension}"
             filepath = os.path.join(save_directory, filename)
             
-            img = self.capture_monitor(i, filepath)
+            if not covers_all:
+                # 当前平台不支持一次截取所有屏幕，逐个截取
+                images.append(self.capture_monitor(i, filepath))
+                continue
+            
+            left = monitor['x'] - origin_x
+            top = monitor['y'] - origin_y
+            img = desktop.crop((left, top, left + monitor['width'], top + monitor['height']))
+            self._save(img, filepath, f"显示器{i}截图")
             images.append(img)
         
         return images
@@ -15,11 +15,32 @@ Examples:
     >>> 
     >>> # 快速截图
     >>> img = Screenshot.quick_fullscreen("quick.png")
+    >>> 
+    >>> # 连续截图，只保存内容变化的帧
+    >>> session = CaptureSession.for_region(100, 100, 800, 600, save_dir="screenshots")
+    >>> change = session.poll()
+    >>> 
+    >>> # 一次截图切出多个区域（NumPy视图）
+    >>> backend = CaptureBackend()
+    >>> chart_a, chart_b = backend.regions([(0, 0, 800, 600), (800, 0, 800, 600)])
+    >>> 
+    >>> # 在后台线程中保存截图
+    >>> with AsyncImageWriter(fmt='png', png_compress_level=1) as writer:
+    ...     Screenshot(writer=writer).capture_fullscreen()
 """
 
 from .Screenshot import Screenshot
+from .capture_session import CaptureSession, FrameChange, FrameDiffer
+from .capture_backend import (CaptureBackend, CaptureSource, ImageGrabSource,
+                              MssSource, ReplaySource)
+from .async_writer import AsyncImageWriter
 
 __version__ = "1.0.0"
 __author__ = "Your Name"
-__all__ = ["Screenshot"]
+__all__ = [
+    "Screenshot",
+    "CaptureSession", "FrameChange", "FrameDiffer",
+    "CaptureBackend", "CaptureSource", "ImageGrabSource", "MssSource", "ReplaySource",
+    "AsyncImageWriter",
+]
 
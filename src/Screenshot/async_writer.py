@@ -0,0 +1,179 @@
+"""
+异步图片写入
+在后台线程池中编码并保存截图，截图线程不再被 PNG 压缩阻塞
+"""
+
+import os
+import queue
+import threading
+from typing import Optional, Union
+
+import numpy as np
+from PIL import Image
+
+
+class AsyncImageWriter:
+    """
+    后台图片写入器（有界队列 + 线程池）
+
+    支持的格式:
+        - png: 可设置压缩级别（0-9，默认1，速度优先）
+        - webp: 无损 WebP
+        - npy: 原始 NumPy 数组，不做任何编码
+
+    队列满时的处理策略:
+        - block: 阻塞调用方直到有空位（默认）
+        - drop: 丢弃新提交的图片
+        - drop_oldest: 丢弃队列中最旧的图片
+
+    Examples:
+        >>> with AsyncImageWriter(fmt='png', png_compress_level=1) as writer:
+        ...     screenshot = Screenshot(writer=writer)
+        ...     screenshot.capture_region(0, 0, 800, 600)
+    """
+
+    FORMATS = {
+        'png': '.png',
+        'webp': '.webp',
+        'npy': '.npy',
+    }
+    POLICIES = ('block', 'drop', 'drop_oldest')
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, fmt: str = 'png',
+                 png_compress_level: int = 1, policy: str = 'block'):
+        """
+        初始化写入器
+
+        Args:
+            max_workers: 写入线程数
+            max_queue: 等待写入的最大图片数
+            fmt: 输出格式 'png' / 'webp' / 'npy'
+            png_compress_level: PNG压缩级别（0-9）
+            policy: 队列满时的处理策略 'block' / 'drop' / 'drop_oldest'
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"不支持的格式: {fmt}，可选: {', '.join(self.FORMATS)}")
+        if policy not in self.POLICIES:
+            raise ValueError(f"不支持的策略: {policy}，可选: {', '.join(self.POLICIES)}")
+
+        self.fmt = fmt
+        self.extension = self.FORMATS[fmt]
+        self.png_compress_level = png_compress_level
+        self.policy = policy
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {'submitted': 0, 'written': 0, 'dropped': 0, 'failed': 0}
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f'image-writer-{i}', daemon=True)
+            for i in range(max_workers)
+        ]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, image: Union[Image.Image, np.ndarray], path: str) -> Optional[str]:
+        """
+        提交一张图片
+
+        Args:
+            image: PIL图像或RGB数组（数组会被复制，调用方可以继续复用缓冲区）
+            path: 保存路径（扩展名会替换为当前格式对应的扩展名）
+
+        Returns:
+            实际保存路径；被丢弃时返回None
+        """
+        if self._closed:
+            raise RuntimeError("写入器已关闭")
+
+        path = os.path.splitext(path)[0] + self.extension
+        if isinstance(image, np.ndarray):
+            image = image.copy()
+        item = (image, path)
+
+        self._count('submitted')
+        if self.policy == 'block':
+            self._queue.put(item)
+            return path
+
+        try:
+            self._queue.put_nowait(item)
+            return path
+        except queue.Full:
+            if self.policy == 'drop':
+                self._count('dropped')
+                return None
+
+        # drop_oldest: 腾出一个位置后再放入
+        while True:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._count('dropped')
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                return path
+            except queue.Full:
+                continue
+
+    @property
+    def pending(self) -> int:
+        """等待写入的图片数"""
+        return self._queue.qsize()
+
+    def flush(self):
+        """等待所有已提交的图片写入完成"""
+        self._queue.join()
+
+    def close(self):
+        """写完剩余图片后停止写入线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        for _ in self._workers:
+            self._queue.put(None)
+        for t in self._workers:
+            t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+                self._count('written')
+            except Exception as e:
+                self._count('failed')
+                print(f"⚠️  图片保存失败: {item[1]}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, image: Union[Image.Image, np.ndarray], path: str):
+        """先写入临时文件再重命名，其他程序不会读到写了一半的文件"""
+        tmp_path = path + '.part'
+        with open(tmp_path, 'wb') as f:
+            if self.fmt == 'npy':
+                np.save(f, np.asarray(image))
+            else:
+                if isinstance(image, np.ndarray):
+                    image = Image.fromarray(image)
+                if self.fmt == 'png':
+                    image.save(f, format='PNG', compress_level=self.png_compress_level)
+                else:
+                    image.save(f, format='WEBP', lossless=True, method=0)
+        os.replace(tmp_path, path)
@@ -0,0 +1,259 @@
+"""
+高速截图后端
+每个周期只截取一次整个桌面，再以 NumPy 视图的形式切出各显示器/区域，
+显示器几何信息只查询一次。截图来源可替换（包括用于无显示环境测试的回放来源）
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import ImageGrab, Image
+
+# 可选的高速截图库
+try:
+    import mss
+    MSS_AVAILABLE = True
+except ImportError:
+    MSS_AVAILABLE = False
+
+# 尝试导入多屏幕支持库
+try:
+    from screeninfo import get_monitors
+    SCREENINFO_AVAILABLE = True
+except ImportError:
+    SCREENINFO_AVAILABLE = False
+
+
+# 边界框 (left, top, right, bottom)
+BBox = Tuple[int, int, int, int]
+
+
+class CaptureSource:
+    """截图来源基类"""
+
+    def monitors(self) -> List[Dict]:
+        """
+        显示器信息列表（与 Screenshot.get_monitors_info() 格式相同）
+
+        Returns:
+            List[Dict]: 每个包含 index, x, y, width, height, is_primary
+        """
+        raise NotImplementedError
+
+    def grab(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        截取整个虚拟桌面
+
+        Args:
+            out: 可复用的输出缓冲区（尺寸一致时写入其中）
+
+        Returns:
+            np.ndarray: RGB 数组 (H, W, 3)，左上角对应虚拟桌面边界框的左上角
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """释放资源"""
+
+
+def _union_bbox(monitors: List[Dict]) -> BBox:
+    """所有显示器组成的虚拟桌面边界框"""
+    return (min(m['x'] for m in monitors),
+            min(m['y'] for m in monitors),
+            max(m['x'] + m['width'] for m in monitors),
+            max(m['y'] + m['height'] for m in monitors))
+
+
+def _copy_into(frame: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """尺寸一致时把数据写入复用的缓冲区"""
+    if out is not None and out.shape == frame.shape and out.flags.writeable:
+        np.copyto(out, frame)
+        return out
+    return np.array(frame, copy=True)
+
+
+class ImageGrabSource(CaptureSource):
+    """基于 PIL.ImageGrab 的截图来源"""
+
+    def __init__(self):
+        self._monitors: Optional[List[Dict]] = None
+
+    def monitors(self) -> List[Dict]:
+        if self._monitors is None:
+            if SCREENINFO_AVAILABLE:
+                self._monitors = [{
+                    'index': i,
+                    'name': getattr(m, 'name', None) or f"Monitor {i}",
+                    'x': m.x,
+                    'y': m.y,
+                    'width': m.width,
+                    'height': m.height,
+                    'is_primary': getattr(m, 'is_primary', i == 0)
+                } for i, m in enumerate(get_monitors())]
+            else:
+                width, height = ImageGrab.grab().size
+                self._monitors = [{
+                    'index': 0, 'x': 0, 'y': 0,
+                    'width': width, 'height': height, 'is_primary': True
+                }]
+        return self._monitors
+
+    def grab(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        img = ImageGrab.grab(all_screens=len(self.monitors()) > 1)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        return _copy_into(np.asarray(img), out)
+
+
+class MssSource(CaptureSource):
+    """基于 mss 的截图来源（需要安装 mss，比 ImageGrab 更快）"""
+
+    def __init__(self):
+        if not MSS_AVAILABLE:
+            raise ImportError("需要安装 mss 库: pip install mss")
+        self._sct = mss.mss()
+        self._monitors: Optional[List[Dict]] = None
+
+    def monitors(self) -> List[Dict]:
+        if self._monitors is None:
+            # mss.monitors[0] 是整个虚拟桌面，之后才是各个显示器
+            self._monitors = [{
+                'index': i,
+                'x': m['left'],
+                'y': m['top'],
+                'width': m['width'],
+                'height': m['height'],
+                'is_primary': i == 0
+            } for i, m in enumerate(self._sct.monitors[1:])]
+        return self._monitors
+
+    def grab(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        shot = self._sct.grab(self._sct.monitors[0])
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        # BGRA -> RGB，直接写入复用的缓冲区
+        return _copy_into(bgra[..., 2::-1], out)
+
+    def close(self):
+        self._sct.close()
+
+
+class ReplaySource(CaptureSource):
+    """
+    回放来源：依次返回图片文件或数组，用于无显示环境（如Linux服务器）测试
+
+    Examples:
+        >>> source = ReplaySource.from_directory("screenshots")
+        >>> backend = CaptureBackend(source)
+    """
+
+    def __init__(self, frames: Sequence[Union[str, np.ndarray, Image.Image]], loop: bool = True):
+        """
+        Args:
+            frames: 图片路径、RGB数组或PIL图像序列
+            loop: 播放完后是否从头循环（False时重复最后一帧）
+        """
+        if not frames:
+            raise ValueError("回放来源至少需要一帧")
+        self.frames = list(frames)
+        self.loop = loop
+        self.position = 0
+        self._monitors: Optional[List[Dict]] = None
+
+    @classmethod
+    def from_directory(cls, directory: str, extensions: Iterable[str] = ('.png', '.jpg', '.jpeg', '.bmp'),
+                       loop: bool = True) -> 'ReplaySource':
+        """按文件名顺序回放目录中的图片"""
+        exts = tuple(e.lower() for e in extensions)
+        files = sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                       if f.lower().endswith(exts))
+        return cls(files, loop)
+
+    def _load(self, frame) -> np.ndarray:
+        if isinstance(frame, np.ndarray):
+            return frame
+        img = Image.open(frame) if isinstance(frame, str) else frame
+        return np.asarray(img if img.mode == 'RGB' else img.convert('RGB'))
+
+    def monitors(self) -> List[Dict]:
+        if self._monitors is None:
+            height, width = self._load(self.frames[0]).shape[:2]
+            self._monitors = [{
+                'index': 0, 'x': 0, 'y': 0,
+                'width': width, 'height': height, 'is_primary': True
+            }]
+        return self._monitors
+
+    def grab(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        frame = self._load(self.frames[self.position])
+        if self.position + 1 < len(self.frames):
+            self.position += 1
+        elif self.loop:
+            self.position = 0
+        return _copy_into(frame, out)
+
+
+class CaptureBackend:
+    """
+    截图后端：每次 tick() 截取一次，再切出各显示器/区域的视图
+
+    Examples:
+        >>> backend = CaptureBackend()
+        >>> backend.tick()
+        >>> chart_a = backend.region(100, 100, 800, 600)
+        >>> chart_b = backend.region(1000, 100, 800, 600)
+        >>> second_screen = backend.monitor(1)
+    """
+
+    def __init__(self, source: Optional[CaptureSource] = None):
+        """
+        Args:
+            source: 截图来源，默认优先使用 mss，否则使用 ImageGrab
+        """
+        if source is None:
+            source = MssSource() if MSS_AVAILABLE else ImageGrabSource()
+        self.source = source
+        self.monitors = source.monitors()          # 几何信息只查询一次
+        self.origin = _union_bbox(self.monitors)[:2]
+        self._buffer: Optional[np.ndarray] = None
+
+    def tick(self) -> np.ndarray:
+        """截取一次整个桌面（复用上一次的缓冲区）"""
+        self._buffer = self.source.grab(self._buffer)
+        return self._buffer
+
+    @property
+    def frame(self) -> np.ndarray:
+        """最近一次截取的整个桌面"""
+        if self._buffer is None:
+            raise RuntimeError("请先调用 tick() 截图")
+        return self._buffer
+
+    def bbox(self, left: int, top: int, right: int, bottom: int) -> np.ndarray:
+        """
+        边界框 (屏幕坐标) 对应的视图（不复制数据，下次 tick() 后内容会被覆盖）
+        """
+        ox, oy = self.origin
+        frame = self.frame
+        x0 = min(max(left - ox, 0), frame.shape[1])
+        y0 = min(max(top - oy, 0), frame.shape[0])
+        x1 = min(max(right - ox, x0), frame.shape[1])
+        y1 = min(max(bottom - oy, y0), frame.shape[0])
+        return frame[y0:y1, x0:x1]
+
+    def region(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """区域 (x, y, 宽, 高) 对应的视图"""
+        return self.bbox(x, y, x + width, y + height)
+
+    def monitor(self, index: int = 0) -> np.ndarray:
+        """指定显示器对应的视图"""
+        m = self.monitors[index if index < len(self.monitors) else 0]
+        return self.region(m['x'], m['y'], m['width'], m['height'])
+
+    def regions(self, regions: Iterable[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+        """截取一次并返回多个区域 (x, y, 宽, 高) 的视图"""
+        self.tick()
+        return [self.region(*r) for r in regions]
+
+    def close(self):
+        self.source.close()
@@ -0,0 +1,227 @@
+"""
+连续截图会话
+保留上一帧，只返回（或保存）内容发生变化的截图，并给出变化区域
+"""
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import ImageGrab, Image
+
+
+@dataclass
+class FrameChange:
+    """一次有变化的截图"""
+    image: Image.Image
+    frame: np.ndarray                       # RGB数组（与 image 内容相同）
+    dirty_rects: List[Tuple[int, int, int, int]] = field(default_factory=list)  # (x, y, 宽, 高)
+    changed_ratio: float = 1.0              # 变化块占全部块的比例
+    timestamp: datetime = field(default_factory=datetime.now)
+    path: Optional[str] = None              # 保存路径（未保存时为None）
+
+
+class FrameDiffer:
+    """
+    帧差检测器
+
+    先比较分块像素和（很便宜，且几乎不会漏掉变化），
+    只有分块和不同时才在原分辨率上逐块计算最大差异，过滤掉轻微噪声。
+    """
+
+    def __init__(self, tile: int = 16, pixel_threshold: int = 16, min_changed_ratio: float = 0.0):
+        """
+        Args:
+            tile: 分块大小（像素）
+            pixel_threshold: 块内像素最大差异超过该值才认为该块变化
+            min_changed_ratio: 变化块比例超过该值才认为帧变化
+        """
+        self.tile = tile
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+
+        self._previous: Optional[np.ndarray] = None   # 上一帧（复用同一块内存）
+        self._sums: Optional[np.ndarray] = None       # 上一帧分块像素和
+
+    def reset(self):
+        """清空上一帧，下一帧一定视为变化"""
+        self._previous = None
+        self._sums = None
+
+    def _tile_reduce(self, arr: np.ndarray, ufunc) -> np.ndarray:
+        """按块聚合（最后一行/列的块可能不满）"""
+        rows = np.arange(0, arr.shape[0], self.tile)
+        cols = np.arange(0, arr.shape[1], self.tile)
+        reduced = ufunc.reduceat(ufunc.reduceat(arr, rows, axis=0), cols, axis=1)
+        return reduced.reshape(len(rows), len(cols), -1)
+
+    def update(self, frame: np.ndarray) -> Optional[Tuple[List[Tuple[int, int, int, int]], float]]:
+        """
+        与上一帧比较并记录当前帧
+
+        Args:
+            frame: 当前帧（H x W 或 H x W x C 的 uint8 数组）
+
+        Returns:
+            None 表示没有变化；否则返回 (变化区域列表, 变化块比例)
+        """
+        height, width = frame.shape[:2]
+        sums = self._tile_reduce(frame.astype(np.uint32), np.add)
+
+        if self._previous is None or self._previous.shape != frame.shape:
+            self._previous = frame.copy()
+            self._sums = sums
+            return [(0, 0, width, height)], 1.0
+
+        candidates = (sums != self._sums).any(axis=2)
+        if not candidates.any():
+            return None
+
+        # 只在分块和不同的块所在范围内确认像素差异
+        rs, cs = np.nonzero(candidates)
+        r0, r1 = rs.min(), rs.max() + 1
+        c0, c1 = cs.min(), cs.max() + 1
+        y0, y1 = r0 * self.tile, r1 * self.tile
+        x0, x1 = c0 * self.tile, c1 * self.tile
+        diff = np.abs(frame[y0:y1, x0:x1].astype(np.int16) -
+                      self._previous[y0:y1, x0:x1].astype(np.int16))
+        dirty = np.zeros_like(candidates)
+        dirty[r0:r1, c0:c1] = self._tile_reduce(diff, np.maximum).max(axis=2) > self.pixel_threshold
+        dirty &= candidates
+        ratio = float(dirty.mean())
+
+        if not dirty.any() or ratio < self.min_changed_ratio:
+            return None
+
+        np.copyto(self._previous, frame)
+        self._sums = sums
+
+        return self._dirty_rects(dirty, width, height), ratio
+
+    def _dirty_rects(self, dirty: np.ndarray, width: int, height: int) -> List[Tuple[int, int, int, int]]:
+        """把相邻的变化块合并为矩形（4连通），返回像素坐标"""
+        rects = []
+        seen = np.zeros_like(dirty)
+        rows, cols = dirty.shape
+
+        for r0, c0 in zip(*np.nonzero(dirty)):
+            if seen[r0, c0]:
+                continue
+            stack = [(r0, c0)]
+            seen[r0, c0] = True
+            r_min, r_max, c_min, c_max = r0, r0, c0, c0
+            while stack:
+                r, c = stack.pop()
+                r_min, r_max = min(r_min, r), max(r_max, r)
+                c_min, c_max = min(c_min, c), max(c_max, c)
+                for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                    if 0 <= nr < rows and 0 <= nc < cols and dirty[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+
+            x = int(c_min * self.tile)
+            y = int(r_min * self.tile)
+            rects.append((x, y,
+                          min(int((c_max + 1) * self.tile), width) - x,
+                          min(int((r_max + 1) * self.tile), height) - y))
+
+        return rects
+
+
+class CaptureSession:
+    """连续截图会话：只返回（或保存）内容发生变化的截图"""
+
+    def __init__(self,
+                 bbox: Optional[Tuple[int, int, int, int]] = None,
+                 save_dir: Optional[str] = None,
+                 tile: int = 16,
+                 pixel_threshold: int = 16,
+                 min_changed_ratio: float = 0.0,
+                 grab: Optional[Callable[[], Union[Image.Image, np.ndarray]]] = None,
+                 prefix: str = 'capture',
+                 writer=None):
+        """
+        初始化截图会话
+
+        Args:
+            bbox: 截图边界框 (left, top, right, bottom)，None表示主屏幕
+            save_dir: 变化帧的保存目录，None表示不保存
+            tile: 帧差分块大小（像素）
+            pixel_threshold: 块内像素最大差异超过该值才认为该块变化
+            min_changed_ratio: 变化块比例超过该值才认为帧变化
+            grab: 自定义截图函数（返回 PIL.Image 或 RGB 数组），默认使用 ImageGrab
+            prefix: 保存文件名前缀
+            writer: 异步写入器（AsyncImageWriter），为None时在截图线程中同步保存PNG
+
+        Examples:
+            >>> session = CaptureSession(bbox=(100, 100, 900, 700), save_dir="screenshots")
+            >>> change = session.poll()
+            >>> if change:
+            ...     print(change.dirty_rects)
+        """
+        self.bbox = bbox
+        self.save_dir = save_dir
+        self.prefix = prefix
+        self.writer = writer
+        self._grab = grab or (lambda: ImageGrab.grab(bbox=self.bbox))
+        self.differ = FrameDiffer(tile, pixel_threshold, min_changed_ratio)
+
+        self.stats = {'polled': 0, 'changed': 0, 'unchanged': 0}
+
+        if save_dir and not os.path.exists(save_dir):
+            os.makedirs(save_dir)
+
+    @classmethod
+    def for_region(cls, x: int, y: int, width: int, height: int, **kwargs) -> 'CaptureSession':
+        """按 (x, y, 宽, 高) 创建会话"""
+        return cls(bbox=(x, y, x + width, y + height), **kwargs)
+
+    def poll(self, force: bool = False) -> Optional[FrameChange]:
+        """
+        截图一次
+
+        Args:
+            force: 即使内容没有变化也返回该帧
+
+        Returns:
+            FrameChange，内容没有变化时返回None
+        """
+        captured = self._grab()
+        if isinstance(captured, np.ndarray):
+            frame = captured
+            image = Image.fromarray(frame)
+        else:
+            image = captured if captured.mode in ('RGB', 'L') else captured.convert('RGB')
+            frame = np.asarray(image)
+
+        self.stats['polled'] += 1
+        change = self.differ.update(frame)
+
+        if change is None:
+            self.stats['unchanged'] += 1
+            if not force:
+                return None
+            rects, ratio = [], 0.0
+        else:
+            self.stats['changed'] += 1
+            rects, ratio = change
+
+        result = FrameChange(image=image, frame=frame, dirty_rects=rects, changed_ratio=ratio)
+
+        if self.save_dir and change is not None:
+            extension = self.writer.extension if self.writer is not None else '.png'
+            filename = f"{self.prefix}_{result.timestamp.strftime('%Y%m%d_%H%M%S_%f')}{extension}"
+            result.path = os.path.join(self.save_dir, filename)
+            if self.writer is not None:
+                # 帧缓冲区可能在下一次截图时被覆盖，写入器会复制数组
+                result.path = self.writer.submit(frame, result.path)
+            else:
+                image.save(result.path)
+
+        return result
+
+    def reset(self):
+        """清空上一帧"""
+        self.differ.reset()
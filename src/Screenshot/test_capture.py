@@ -0,0 +1,183 @@
+"""
+测试连续截图相关功能（不需要显示器，使用合成的帧）
+"""
+
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from async_writer import AsyncImageWriter
+from capture_backend import CaptureBackend, ReplaySource
+from capture_session import CaptureSession, FrameDiffer
+
+
+def _frames():
+    """一帧空白画面和一帧在 (40, 20) 处有一块变化的画面"""
+    blank = np.full((120, 160, 3), 255, dtype=np.uint8)
+    changed = blank.copy()
+    changed[20:30, 40:50] = 0
+    return blank, changed
+
+
+def test_frame_differ():
+    """测试帧差检测"""
+    print("=" * 60)
+    print("测试1: 帧差检测")
+    print("=" * 60)
+
+    blank, changed = _frames()
+    differ = FrameDiffer(tile=16, pixel_threshold=16)
+
+    # 第一帧总是视为变化
+    assert differ.update(blank) == ([(0, 0, 160, 120)], 1.0)
+    assert differ.update(blank.copy()) is None
+
+    # 低于阈值的噪声被忽略
+    noisy = blank.copy()
+    noisy[::2, ::2] -= 5
+    assert differ.update(noisy) is None
+
+    rects, ratio = differ.update(changed)
+    assert rects == [(32, 16, 32, 16)], rects
+    print(f"✓ 变化区域: {rects}，变化比例 {ratio:.3f}")
+
+    return True
+
+
+def test_capture_session():
+    """测试截图会话只返回并保存变化的帧"""
+    print("\n" + "=" * 60)
+    print("测试2: 截图会话")
+    print("=" * 60)
+
+    blank, changed = _frames()
+    frames = iter([blank, blank.copy(), changed])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session = CaptureSession(save_dir=tmp, grab=lambda: next(frames))
+        first = session.poll()
+        assert first is not None and first.path and os.path.exists(first.path)
+        assert session.poll() is None
+        change = session.poll()
+        assert change.dirty_rects == [(32, 16, 32, 16)]
+        assert session.stats == {'polled': 3, 'changed': 2, 'unchanged': 1}, session.stats
+        assert len(os.listdir(tmp)) == 2
+        print(f"✓ 未变化的帧被跳过: {session.stats}")
+
+    return True
+
+
+def test_capture_backend():
+    """测试一次截图切出多个区域并复用缓冲区"""
+    print("\n" + "=" * 60)
+    print("测试3: 截图后端")
+    print("=" * 60)
+
+    blank, changed = _frames()
+    backend = CaptureBackend(ReplaySource([blank, changed], loop=False))
+    assert backend.monitors == [{'index': 0, 'x': 0, 'y': 0, 'width': 160, 'height': 120,
+                                 'is_primary': True}]
+
+    buffer = backend.tick()
+    chart_a, chart_b = backend.regions([(40, 20, 10, 10), (150, 110, 100, 100)])
+    assert backend.frame is buffer, "缓冲区应被复用"
+    assert chart_a.base is buffer and (chart_a == 0).all(), "区域应是同一帧的视图"
+    assert chart_b.shape == (10, 10, 3), "超出桌面的区域应被裁剪"
+
+    # 回放结束后重复最后一帧
+    backend.tick()
+    assert (backend.region(40, 20, 10, 10) == 0).all()
+    assert np.array_equal(backend.monitor(5), changed)
+    print(f"✓ 区域视图: {chart_a.shape}, {chart_b.shape}")
+
+    return True
+
+
+def test_async_writer():
+    """测试后台写入器"""
+    print("\n" + "=" * 60)
+    print("测试4: 后台写入")
+    print("=" * 60)
+
+    blank, changed = _frames()
+    with tempfile.TemporaryDirectory() as tmp:
+        # 提交后立即复用缓冲区，写入的仍是提交时的内容
+        buffer = changed.copy()
+        with AsyncImageWriter(fmt='png') as writer:
+            path = writer.submit(buffer, os.path.join(tmp, 'frame.jpg'))
+            buffer[:] = 255
+        assert path == os.path.join(tmp, 'frame.png')
+        assert np.array_equal(np.asarray(Image.open(path)), changed)
+
+        with AsyncImageWriter(fmt='npy') as writer:
+            path = writer.submit(changed, os.path.join(tmp, 'frame'))
+        assert np.array_equal(np.load(path), changed)
+        assert not [f for f in os.listdir(tmp) if f.endswith('.part')]
+        assert writer.stats == {'submitted': 1, 'written': 1, 'dropped': 0, 'failed': 0}
+
+    # 队列满时按策略丢弃（没有写入线程，队列不会被消费）
+    writer = AsyncImageWriter(max_workers=0, max_queue=1, policy='drop')
+    assert writer.submit(blank, 'a.png') and writer.submit(blank, 'b.png') is None
+    writer = AsyncImageWriter(max_workers=0, max_queue=1, policy='drop_oldest')
+    assert writer.submit(blank, 'a.png') and writer.submit(blank, 'b.png') == 'b.png'
+    assert writer.pending == 1 and writer.stats['dropped'] == 1
+    print("✓ 写入内容正确，队列满时按策略丢弃")
+
+    return True
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("\n" + "🧪 " + "=" * 58)
+    print("   连续截图测试套件")
+    print("=" * 60 + "\n")
+
+    tests = [
+        ("帧差检测", test_frame_differ),
+        ("截图会话", test_capture_session),
+        ("截图后端", test_capture_backend),
+        ("后台写入", test_async_writer),
+    ]
+
+    results = []
+
+    for name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((name, result, None))
+        except Exception as e:
+            results.append((name, False, str(e)))
+            print(f"❌ 测试失败: {e}")
+
+    # 显示结果
+    print("\n" + "=" * 60)
+    print("测试结果汇总")
+    print("=" * 60)
+
+    passed = 0
+    failed = 0
+
+    for name, result, error in results:
+        if result:
+            print(f"✅ {name}: 通过")
+            passed += 1
+        else:
+            print(f"❌ {name}: 失败")
+            if error:
+                print(f"   错误: {error}")
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"总计: {passed + failed} 个测试")
+    print(f"✅ 通过: {passed}")
+    print(f"❌ 失败: {failed}")
+    print("=" * 60)
+
+    return passed, failed
+
+
+if __name__ == "__main__":
+    passed, failed = run_all_tests()
+    exit(0 if failed == 0 else 1)
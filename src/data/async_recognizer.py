@@ -0,0 +1,213 @@
+﻿"""
+异步识别接口
+在 asyncio 程序中使用 ChartRecognizer：读文件在默认线程池中进行，识别在有界线程池中进行，
+同时进行的识别数受信号量限制；取消协程时尚未开始的识别不会再执行
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+
+from chart_recognizer import ChartRecognizer, RecognitionResult
+from config import ASYNC_CONFIG
+from discovery import iter_images
+
+
+def _read_bytes(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+async def _aiter(items):
+    """把普通可迭代对象和异步可迭代对象统一为异步迭代"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class AsyncChartRecognizer:
+    """
+    异步图形识别器
+
+    Examples:
+        >>> async with AsyncChartRecognizer(max_workers=2) as recognizer:
+        ...     result = await recognizer.recognize('chart.png')
+        ...     async for result in recognizer.iter_directory('screenshots/'):
+        ...         print(result.image_name, len(result.data_points))
+    """
+
+    def __init__(self, recognizer: Optional[ChartRecognizer] = None,
+                 max_workers: int = None, max_concurrency: int = None, **recognizer_kwargs):
+        """
+        初始化异步识别器
+
+        Args:
+            recognizer: 已创建的识别器，None时用 recognizer_kwargs 创建
+            max_workers: 识别线程数（识别器是线程安全的，多个线程共享同一个识别器）
+            max_concurrency: 同时进行的识别数（包括读文件），超出的请求在事件循环中等待，
+                             不会堆积在线程池队列里
+        """
+        self.recognizer = recognizer or ChartRecognizer(**recognizer_kwargs)
+        self.max_workers = max_workers or ASYNC_CONFIG['max_workers']
+        self.max_concurrency = max_concurrency or ASYNC_CONFIG['max_concurrency']
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='async-recognize')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+    def _limit(self) -> asyncio.Semaphore:
+        # 在事件循环中创建（Python 3.8/3.9 的 Semaphore 创建时绑定当前事件循环）
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def recognize(self, image, image_name: Optional[str] = None) -> RecognitionResult:
+        """
+        识别单张图片
+
+        Args:
+            image: 图片路径、BGR格式的 np.ndarray、编码后的图片 bytes 或 PIL.Image
+            image_name: 结果中的图片名称（默认取文件名）
+
+        Returns:
+            RecognitionResult: 识别结果
+
+        取消该协程时：还在等待的请求直接放弃，已提交但尚未开始的识别从线程池中撤回；
+        正在执行的识别无法中断，完成后结果被丢弃。
+        """
+        if self._closed:
+            raise RuntimeError("异步识别器已关闭")
+
+        loop = asyncio.get_running_loop()
+        async with self._limit():
+            if isinstance(image, (str, Path)):
+                path = Path(image)
+                image_name = image_name or path.name
+                # 读文件不占用识别线程，与其他图片的识别重叠进行
+                data = await loop.run_in_executor(None, _read_bytes, path)
+                if data is None:
+                    return RecognitionResult(
+                        image_name=image_name,
+                        data_points=[],
+                        confidence=0.0,
+                        error="无法读取图片"
+                    )
+                return await loop.run_in_executor(self._executor, self.recognizer.recognize_bytes,
+                                                  data, image_name)
+            return await loop.run_in_executor(self._executor, self.recognizer.recognize,
+                                              image, image_name)
+
+    async def _recognize_item(self, item) -> RecognitionResult:
+        # (图片, 名称) 元组或单独的图片
+        if isinstance(item, tuple):
+            return await self.recognize(*item)
+        return await self.recognize(item)
+
+    async def map(self, items, ordered: bool = False) -> AsyncIterator[RecognitionResult]:
+        """
+        识别一系列图片，边识别边返回结果
+
+        同时最多只创建 max_concurrency 个任务，items 可以是很长的（异步）迭代器。
+        提前退出迭代（break）或取消时，剩余的任务会被取消。
+
+        Args:
+            items: 图片或 (图片, 名称) 的可迭代对象 / 异步可迭代对象
+            ordered: True 按输入顺序返回，False 按完成顺序返回
+
+        Yields:
+            RecognitionResult
+        """
+        tasks = []
+        try:
+            async for item in _aiter(items):
+                tasks.append(asyncio.ensure_future(self._recognize_item(item)))
+                if len(tasks) < self.max_concurrency:
+                    continue
+                if ordered:
+                    yield await tasks.pop(0)
+                else:
+                    done, rest = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    tasks = [t for t in tasks if t in rest]
+                    for task in done:
+                        yield task.result()
+
+            while tasks:
+                if ordered:
+                    yield await tasks.pop(0)
+                else:
+                    done, rest = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    tasks = [t for t in tasks if t in rest]
+                    for task in done:
+                        yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def iter_directory(self, directory: Union[str, Path], ordered: bool = False,
+                             **discovery_kwargs) -> AsyncIterator[RecognitionResult]:
+        """
+        识别目录中的所有图片（边遍历目录边识别）
+
+        Args:
+            directory: 图片目录
+            ordered: True 按遍历顺序返回，False 按完成顺序返回
+            discovery_kwargs: 传给 discovery.iter_images 的参数（recursive、include、exclude、sort）
+        """
+        loop = asyncio.get_running_loop()
+        files = iter_images(str(directory), **{'sort': True, **discovery_kwargs})
+        done = object()
+
+        async def paths():
+            # 遍历目录可能很慢（网络存储），在线程池中逐个取出
+            while True:
+                path = await loop.run_in_executor(None, next, files, done)
+                if path is done:
+                    return
+                yield path
+
+        async for result in self.map(paths(), ordered):
+            yield result
+
+    async def iter_queue(self, source: asyncio.Queue,
+                         ordered: bool = False) -> AsyncIterator[RecognitionResult]:
+        """
+        识别从队列中取出的图片，直到取到 None
+
+        Args:
+            source: 放入图片或 (图片, 名称) 的队列，放入 None 表示结束
+            ordered: True 按入队顺序返回，False 按完成顺序返回
+        """
+        async def drain():
+            while True:
+                item = await source.get()
+                source.task_done()
+                if item is None:
+                    return
+                yield item
+
+        async for result in self.map(drain(), ordered):
+            yield result
+
+    def close(self):
+        """等待正在执行的识别完成后关闭线程池"""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self):
+        """在事件循环中关闭（不阻塞事件循环）"""
+        self._closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
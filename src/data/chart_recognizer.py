@@ -3,15 +3,28 @@
 支持高精度批量识别图形截图
 """
 
+import contextlib
 import cv2
+import hashlib
+import itertools
+import threading
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Tuple, Optional
 import json
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import pandas as pd
 from datetime import datetime, timedelta
 
+from config import (ADAPTIVE_RESOLUTION, CASCADE_CONFIG, CHART_REGIONS, CONFIDENCE_THRESHOLDS,
+                    DEBUG_CONFIG, INCREMENTAL_CONFIG)
+from confidence import combine_features, quality_features
+from discovery import iter_images
+from image_io import PrefetchReader, decode_bytes, load, read_image, reduce_flags
+
 # PaddleOCR是可选依赖，如果不可用将使用基础识别模式
 try:
     from paddleocr import PaddleOCR
@@ -30,9 +43,19 @@ class DataPoint:
     low: float
     close: float
     volume: Optional[float] = None
+    x_center: Optional[int] = None  # 图形元素中心在原图中的x像素坐标
     
     def to_dict(self):
-        return asdict(self)
+        # 字段都是标量，直接构造字典（asdict 会递归深拷贝，大批量导出时很慢）
+        return {
+            'date': self.date,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'x_center': self.x_center
+        }
 
 
 @dataclass
@@ -43,6 +66,8 @@ class RecognitionResult:
     confidence: float
     symbol: Optional[str] = None
     error: Optional[str] = None
+    quality: Optional[Dict[str, Optional[float]]] = None  # 置信度的各项质量特征
+    image_hash: Optional[str] = None    # 图片文件内容的指纹（iter_recognize(with_hash=True)，不导出到JSON）
     
     def to_dict(self):
         return {
@@ -50,14 +75,61 @@ class RecognitionResult:
             'symbol': self.symbol,
             'data_points': [c.to_dict() for c in self.data_points],
             'confidence': self.confidence,
+            'quality': self.quality,
             'error': self.error
         }
 
 
+@dataclass
+class IncrementalState:
+    """增量识别状态（上一帧及其识别中间结果）"""
+    frame: Optional[np.ndarray]
+    axis_info: Dict
+    data_points_raw: List[Dict]
+    result: RecognitionResult
+
+
+def _is_pil_image(obj) -> bool:
+    """判断是否为PIL图像（不强制依赖Pillow）"""
+    return hasattr(obj, 'mode') and hasattr(obj, 'size') and hasattr(obj, 'getbands')
+
+
+def _to_bgr(img) -> np.ndarray:
+    """将 PIL.Image / 灰度 / BGRA 数组统一转换为 uint8 BGR 数组"""
+    if _is_pil_image(img):
+        if img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGB')
+        mode = img.mode
+        arr = np.asarray(img)
+        if mode == 'RGB':
+            return cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+        if mode == 'RGBA':
+            return cv2.cvtColor(arr, cv2.COLOR_RGBA2BGR)
+        return cv2.cvtColor(arr, cv2.COLOR_GRAY2BGR)
+    
+    if img.dtype != np.uint8:
+        raise ValueError(f"不支持的图片数据类型: {img.dtype}")
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.ndim == 3 and img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    if img.ndim == 3 and img.shape[2] == 3:
+        return img
+    raise ValueError(f"不支持的图片形状: {img.shape}")
+
+
 class ChartRecognizer:
-    """图形识别器"""
+    """
+    图形识别器
+    
+    同一个实例可以在多个线程中同时使用：OCR调用串行执行，
+    坐标轴缓存和统计加锁，调试图片按调用分别命名。
+    """
     
-    def __init__(self, use_gpu=False, debug=False, use_ocr=True):
+    def __init__(self, use_gpu=False, debug=False, use_ocr=True, adaptive_resolution=False,
+                 layout: Optional[Dict] = None, calibration: Optional[Dict] = None,
+                 cascade: bool = False, escalate_threshold: Optional[float] = None,
+                 ocr_service=None, ocr_backend=None, decode_reduce: int = 1):
         """
         初始化识别器
         
@@ -65,13 +137,47 @@ class ChartRecognizer:
             use_gpu: 是否使用GPU加速（注意：PaddleOCR 3.x 版本已移除此参数）
             debug: 是否开启调试模式（保存中间处理图片）
             use_ocr: 是否使用OCR识别坐标轴（如果False，将使用估算方法）
+            adaptive_resolution: 是否根据图形元素间距自动降采样后再检测（适合高分辨率截图）
+            layout: 图表布局（比例），覆盖 CHART_REGIONS 中的同名项
+            calibration: 价格标定 {'price_coords': [(y_pixel, price), ...], 'symbol': str}，
+                         提供后不再用OCR识别坐标轴（见 profiles.CaptureProfile）
+            cascade: 分级识别：先走快速流程（只OCR坐标轴区域、缓存坐标轴结果），
+                     置信度不足且完整流程能改善坐标轴识别（使用OCR、未标定）时再走完整流程
+            escalate_threshold: 分级识别的升级阈值，默认 CONFIDENCE_THRESHOLDS['escalate']
+            ocr_service: 共享OCR服务（ocr_service.OCRService），提供后不再单独加载OCR模型
+            ocr_backend: OCR后端（ocr_backends.OCRBackend，如内置数字识别器），默认PaddleOCR
+            decode_reduce: 从文件或bytes识别时解码即缩小的倍数（1/2/4/8，适合高分辨率截图），
+                           结果中的 x_center 和标定的价格刻度仍按原图坐标
         """
+        reduce_flags(decode_reduce)
         self.debug = debug
-        self.use_ocr = use_ocr and PADDLEOCR_AVAILABLE
+        self.adaptive_resolution = adaptive_resolution
+        self.regions = {**CHART_REGIONS, **(layout or {})}
+        self.calibration = calibration
+        self.decode_reduce = decode_reduce
+        self.cascade = cascade
+        self.escalate_threshold = (CONFIDENCE_THRESHOLDS['escalate']
+                                   if escalate_threshold is None else escalate_threshold)
+        self._axis_cache: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self.stats = {'fast': 0, 'escalated': 0, 'axis_cache_hits': 0}
+        
+        # 多线程共享：PaddleOCR 实例不是线程安全的，调用时加锁；缓存和统计另用一把锁
+        self._ocr_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._local = threading.local()     # 当前线程正在识别的图片（用于调试文件命名）
+        self._call_ids = itertools.count(1)
+        # 已标定时不需要OCR
+        engine = ocr_service if ocr_service is not None else ocr_backend
+        self.use_ocr = use_ocr and (PADDLEOCR_AVAILABLE or engine is not None) and not calibration
         self.ocr = None
         
-        # 尝试初始化OCR（如果启用且可用）
-        if self.use_ocr:
+        if self.use_ocr and engine is not None:
+            self.ocr = engine
+            # OCR服务、数字识别器等线程安全的后端不需要加锁
+            if getattr(engine, 'thread_safe', False):
+                self._ocr_lock = contextlib.nullcontext()
+        elif self.use_ocr:
+            # 尝试初始化OCR（如果启用且可用）
             try:
                 self.ocr = PaddleOCR(use_angle_cls=True, lang='ch', show_log=False)
                 if debug:
@@ -82,56 +188,435 @@ class ChartRecognizer:
                 self.ocr = None
                 self.use_ocr = False
         
-    def recognize(self, image_path: str) -> RecognitionResult:
+    def recognize(self, image, image_name: Optional[str] = None) -> RecognitionResult:
         """
         识别单张图形元素图
         
         Args:
-            image_path: 图片路径
+            image: 图片路径、BGR格式的 np.ndarray、编码后的图片 bytes 或 PIL.Image
+            image_name: 结果中的图片名称（默认取文件名）
             
         Returns:
             RecognitionResult: 识别结果
         """
-        try:
-            # 读取图片
-            img = cv2.imread(image_path)
-            if img is None:
-                return RecognitionResult(
-                    image_name=Path(image_path).name,
-                    data_points=[],
-                    confidence=0.0,
-                    error="无法读取图片"
-                )
+        if isinstance(image, np.ndarray) or _is_pil_image(image):
+            return self.recognize_array(image, image_name or 'array')
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return self.recognize_bytes(image, image_name or 'bytes')
+        
+        image_name = image_name or Path(image).name
+        
+        # 读取图片（内存映射 + imdecode，需要时解码即缩小）
+        img = read_image(image, self.decode_reduce)
+        return self._recognize_decoded(img, image_name, self.decode_reduce, "无法读取图片")
+    
+    def recognize_bytes(self, data: bytes, image_name: str = 'bytes') -> RecognitionResult:
+        """
+        识别内存中编码后的图片（PNG/JPEG等）
+        
+        Args:
+            data: 图片文件内容
+            image_name: 结果中的图片名称
             
-            # 1. 图像预处理
-            processed_img = self._preprocess_image(img)
+        Returns:
+            RecognitionResult: 识别结果
+        """
+        img = decode_bytes(data, self.decode_reduce)
+        return self._recognize_decoded(img, image_name, self.decode_reduce, "无法解码图片")
+    
+    def _recognize_decoded(self, img: Optional[np.ndarray], image_name: str, reduce: int,
+                           error: str = "无法读取图片") -> RecognitionResult:
+        """识别已解码的图片；解码时缩小过的，把 x_center 换算回原图坐标"""
+        if img is None:
+            return RecognitionResult(
+                image_name=image_name,
+                data_points=[],
+                confidence=0.0,
+                error=error
+            )
+        if reduce == 1:
+            return self.recognize_array(img, image_name)
+        
+        with self._reduced(reduce):
+            result = self.recognize_array(img, image_name)
+        return self._restore_reduce(result, reduce)
+    
+    @contextlib.contextmanager
+    def _reduced(self, reduce: int):
+        """当前线程正在识别解码时缩小过的图片（标定的价格刻度同比缩小）"""
+        self._local.reduce = reduce
+        try:
+            yield
+        finally:
+            self._local.reduce = 1
+    
+    @staticmethod
+    def _restore_reduce(result: RecognitionResult, reduce: int) -> RecognitionResult:
+        """把解码时缩小过的图片上的 x_center 换算回原图坐标"""
+        if reduce > 1:
+            for dp in result.data_points:
+                if dp.x_center is not None:
+                    dp.x_center = dp.x_center * reduce + reduce // 2
+        return result
+    
+    def recognize_array(self, img, image_name: str = 'array') -> RecognitionResult:
+        """
+        识别内存中的图片，不经过文件编解码
+        
+        Args:
+            img: BGR格式的 np.ndarray（灰度或BGRA会自动转换），
+                 或 PIL.Image（例如 Screenshot.capture_region(..., save=False) 的返回值）
+            image_name: 结果中的图片名称
             
-            # 2. 识别坐标轴刻度
-            axis_info = self._recognize_axis(img)
+        Returns:
+            RecognitionResult: 识别结果
+        """
+        try:
+            self._begin_call(image_name)
+            img = _to_bgr(img)
+            if self.cascade:
+                return self._recognize_cascade(img, image_name)
+            axis_info, data_points_raw = self._analyze(img)
+            return self._build_result(image_name, img, axis_info, data_points_raw)
             
-            # 3. 检测图形元素实体和影线
-            data_points_raw = self._detect_data_points(processed_img, img)
+        except Exception as e:
+            return RecognitionResult(
+                image_name=image_name,
+                data_points=[],
+                confidence=0.0,
+                error=str(e)
+            )
+    
+    def recognize_incremental(self, image, previous: Optional['IncrementalState'] = None,
+                              image_name: str = 'incremental') -> Tuple[RecognitionResult, 'IncrementalState']:
+        """
+        增量识别：只重新检测与上一帧相比发生变化的列
+        
+        适用于连续截取同一图表的场景（例如最右侧图形元素在更新或新增）。
+        坐标轴区域没有变化时直接复用上一帧的刻度识别结果，不再调用OCR；
+        变化列超过 INCREMENTAL_CONFIG['max_changed_fraction'] 或尺寸改变时退回完整识别。
+        
+        Args:
+            image: BGR np.ndarray 或 PIL.Image
+            previous: 上一次调用返回的状态，None表示第一帧
+            image_name: 结果中的图片名称
             
-            # 4. 坐标映射：像素 -> 实际价格
-            data_points = self._map_coordinates(data_points_raw, axis_info, img.shape)
+        Returns:
+            (RecognitionResult, IncrementalState): 识别结果和供下一帧使用的状态
+        
+        Examples:
+            >>> state = None
+            >>> for frame in frames:
+            ...     result, state = recognizer.recognize_incremental(frame, state)
+        """
+        try:
+            self._begin_call(image_name)
+            img = _to_bgr(image)
+            if img is image:
+                img = img.copy()  # 状态中保存的帧不能被调用方修改
             
-            # 5. 计算置信度
-            confidence = self._calculate_confidence(data_points, axis_info)
+            # 上一帧识别失败时没有保存帧，先判断再比较尺寸
+            if (previous is None or previous.frame is None or previous.result.error
+                    or previous.frame.shape != img.shape):
+                axis_info, data_points_raw = self._analyze(img)
+            else:
+                axis_info, data_points_raw = self._analyze_incremental(img, previous)
             
-            return RecognitionResult(
-                image_name=Path(image_path).name,
-                data_points=data_points,
-                confidence=confidence,
-                symbol=axis_info.get('symbol')
-            )
+            result = self._build_result(image_name, img, axis_info, data_points_raw)
+            return result, IncrementalState(img, axis_info, data_points_raw, result)
             
         except Exception as e:
-            return RecognitionResult(
-                image_name=Path(image_path).name,
+            result = RecognitionResult(
+                image_name=image_name,
                 data_points=[],
                 confidence=0.0,
                 error=str(e)
             )
+            return result, IncrementalState(None, {}, [], result)
+    
+    def _begin_call(self, image_name: str):
+        """记录当前线程正在识别的图片，调试文件按调用分别命名，避免多线程互相覆盖"""
+        if self.debug:
+            self._local.debug_name = f"{Path(str(image_name)).stem}_{next(self._call_ids)}"
+    
+    def _debug_path(self, kind: str) -> str:
+        """当前调用的调试图片路径：debug_output_dir/<图片名>_<调用序号>_<kind>.png"""
+        debug_dir = Path(DEBUG_CONFIG['debug_output_dir'])
+        debug_dir.mkdir(parents=True, exist_ok=True)
+        name = getattr(self._local, 'debug_name', None) or f"image_{next(self._call_ids)}"
+        return str(debug_dir / f"{name}_{kind}.png")
+    
+    def _count(self, key: str):
+        with self._state_lock:
+            self.stats[key] += 1
+    
+    def _recognize_cascade(self, img: np.ndarray, image_name: str,
+                           fast: Optional[RecognitionResult] = None) -> RecognitionResult:
+        """
+        分级识别：快速流程置信度达到 escalate_threshold 时直接返回，
+        否则以原分辨率走完整流程，返回两者中置信度较高的结果
+        
+        Args:
+            fast: 已经得到的快速流程结果（流水线中由各阶段分别完成），None表示在这里计算
+        """
+        if fast is None:
+            fast = self._build_result(image_name, img, *self._analyze(img, fast=True))
+        # 两级的区别只在坐标轴OCR：没有OCR或已标定时完整流程得到的结果相同，不升级
+        if fast.confidence >= self.escalate_threshold or self.ocr is None or self.calibration:
+            self._count('fast')
+            return fast
+        
+        self._count('escalated')
+        if self.debug:
+            print(f"快速识别置信度 {fast.confidence} < {self.escalate_threshold}，改用完整流程")
+        
+        full = self._build_result(image_name, img, *self._analyze(img, adaptive=False))
+        return full if full.confidence >= fast.confidence else fast
+    
+    def _analyze(self, img: np.ndarray, fast: bool = False,
+                 adaptive: Optional[bool] = None) -> Tuple[Dict, List[Dict]]:
+        """
+        识别流程：预处理、坐标轴识别、图形元素检测
+        
+        Args:
+            fast: 快速流程：只对坐标轴区域做OCR并缓存结果
+            adaptive: 是否自适应降采样，None表示使用 self.adaptive_resolution
+        
+        Returns:
+            (axis_info, data_points_raw)
+        """
+        # 识别坐标轴刻度（文字较小，始终使用原图）
+        axis_info = self._recognize_axis_cached(img) if fast else self._recognize_axis(img)
+        return axis_info, self._detect(img, fast, adaptive)
+    
+    def _detect(self, img: np.ndarray, fast: bool = False,
+                adaptive: Optional[bool] = None) -> List[Dict]:
+        """
+        预处理并检测图形元素（不涉及OCR，可与坐标轴识别分开在不同线程中进行）
+        
+        Returns:
+            data_points_raw
+        """
+        # 0. 自适应分辨率：在保证实体和间隙可分辨的前提下缩小图片
+        adaptive = self.adaptive_resolution if adaptive is None else adaptive
+        scale = self._choose_scale(img) if adaptive else 1.0
+        if scale < 1.0:
+            work_img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            work_img = img
+        
+        # 1. 图形元素检测只依赖颜色，去噪二值化的预处理图片只在调试时生成并保存
+        if self.debug and DEBUG_CONFIG['save_preprocessed'] and not fast:
+            self._preprocess_image(work_img)
+        
+        # 2. 检测图形元素实体和影线
+        data_points_raw = self._detect_data_points(None, work_img, scale)
+        if scale < 1.0:
+            if data_points_raw:
+                data_points_raw = self._restore_scale(data_points_raw, img, scale)
+            else:
+                # 缩小后没有检测到任何图形元素，回退到原图
+                data_points_raw = self._detect_data_points(None, img)
+        
+        return data_points_raw
+    
+    def _analyze_incremental(self, img: np.ndarray, previous: 'IncrementalState') -> Tuple[Dict, List[Dict]]:
+        """
+        与上一帧比较，只重新检测变化的列
+        
+        Returns:
+            (axis_info, data_points_raw)
+        """
+        cfg = INCREMENTAL_CONFIG
+        regions = self.regions
+        height, width = img.shape[:2]
+        chart_left, chart_right, chart_top, chart_bottom = self._chart_bounds(img.shape)
+        
+        changed = cv2.absdiff(img, previous.frame).max(axis=2) > cfg['pixel_threshold']
+        if not changed.any():
+            return previous.axis_info, previous.data_points_raw
+        
+        # 坐标轴刻度、日期、标题区域没有变化时复用上一帧的识别结果
+        axis_changed = not self.calibration and (
+            changed[:, :int(width * regions['price_axis_left'])].any() or
+            changed[:, int(width * regions['price_axis_right']):].any() or
+            changed[int(height * regions['date_axis_top']):].any() or
+            changed[:int(height * regions['title_bottom'])].any())
+        axis_info = self._recognize_axis(img) if axis_changed else previous.axis_info
+        
+        # 图表区域内发生变化的列
+        columns = changed[chart_top:chart_bottom, chart_left:chart_right].any(axis=0)
+        if not columns.any():
+            return axis_info, previous.data_points_raw
+        if columns.mean() > cfg['max_changed_fraction']:
+            return self._analyze(img)
+        
+        edges = np.diff(np.concatenate(([0], columns.astype(np.int8), [0])))
+        spans = list(zip(np.flatnonzero(edges == 1) + chart_left, np.flatnonzero(edges == -1) + chart_left))
+        
+        # 把变化区间扩展到两侧的空白列（新帧和上一帧都没有实体），避免截断图形元素
+        merged = []
+        for x0, x1 in spans:
+            x0 = int(x0)
+            x1 = int(x1)
+            while x0 > chart_left and (self._column_has_color(img, x0 - 1, chart_top, chart_bottom) or
+                                       self._column_has_color(previous.frame, x0 - 1, chart_top, chart_bottom)):
+                x0 -= 1
+            while x1 < chart_right and (self._column_has_color(img, x1, chart_top, chart_bottom) or
+                                        self._column_has_color(previous.frame, x1, chart_top, chart_bottom)):
+                x1 += 1
+            if merged and x0 <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], x1))
+            else:
+                merged.append((x0, x1))
+        
+        # 用新检测结果替换变化区间内的旧图形元素
+        data_points_raw = [c for c in previous.data_points_raw
+                           if not any(x0 <= c['x_center'] < x1 for x0, x1 in merged)]
+        for x0, x1 in merged:
+            data_points_raw.extend(self._detect_data_points(None, img, x_range=(x0, x1)))
+        data_points_raw.sort(key=lambda c: c['x_center'])
+        
+        if self.debug:
+            print(f"增量识别: 重新检测列区间 {merged}，坐标轴{'已' if axis_changed else '未'}变化")
+        
+        return axis_info, data_points_raw
+    
+    def _chart_bounds(self, img_shape: Tuple) -> Tuple[int, int, int, int]:
+        """图表主体区域的像素边界 (left, right, top, bottom)"""
+        height, width = img_shape[:2]
+        return (int(width * self.regions['chart_left']),
+                int(width * self.regions['chart_right']),
+                int(height * self.regions['chart_top']),
+                int(height * self.regions['chart_bottom']))
+    
+    @staticmethod
+    def _column_has_color(img: np.ndarray, x: int, top: int, bottom: int) -> bool:
+        """判断某一列在图表区域内是否有彩色像素（实体）"""
+        hsv = cv2.cvtColor(img[top:bottom, x:x + 1], cv2.COLOR_BGR2HSV)[:, 0]
+        return bool(((hsv[:, 1] >= 50) & (hsv[:, 2] >= 50)).any())
+    
+    def _build_result(self, image_name: str, img: np.ndarray, axis_info: Dict,
+                      data_points_raw: List[Dict]) -> RecognitionResult:
+        """坐标映射并计算置信度，生成识别结果"""
+        # 4. 坐标映射：像素 -> 实际价格
+        data_points = self._map_coordinates(data_points_raw, axis_info, img.shape)
+        
+        # 5. 计算置信度
+        _, _, chart_top, chart_bottom = self._chart_bounds(img.shape)
+        quality = quality_features(data_points, data_points_raw, axis_info, (chart_top, chart_bottom))
+        confidence = self._calculate_confidence(data_points, quality)
+        
+        return RecognitionResult(
+            image_name=image_name,
+            data_points=data_points,
+            confidence=confidence,
+            symbol=axis_info.get('symbol'),
+            quality=quality
+        )
+    
+    def _choose_scale(self, img: np.ndarray) -> float:
+        """
+        根据图形元素的实体宽度和间隙估算可用的最小缩放比例
+        
+        在图表区域内隔行采样，统计有颜色的列形成的连续区间（即实体），
+        保证缩放后实体宽度不小于 min_body_px、相邻实体间隙不小于 min_gap_px。
+        
+        Returns:
+            缩放比例（1.0 表示不缩放）
+        """
+        cfg = ADAPTIVE_RESOLUTION
+        left, right, top, bottom = self._chart_bounds(img.shape)
+        
+        sample = img[top:bottom:cfg['sample_step'], left:right]
+        if sample.size == 0 or len(img.shape) != 3:
+            return 1.0
+        
+        hsv = cv2.cvtColor(sample, cv2.COLOR_BGR2HSV)
+        colored = ((hsv[..., 1] >= 50) & (hsv[..., 2] >= 50)).any(axis=0)
+        
+        # 连续有颜色的列区间
+        edges = np.diff(np.concatenate(([0], colored.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        widths = ends - starts
+        keep = widths >= 3
+        starts, ends, widths = starts[keep], ends[keep], widths[keep]
+        
+        if len(widths) < 2:
+            return 1.0
+        
+        body_width = np.percentile(widths, 10)
+        gap = np.percentile(starts[1:] - ends[:-1], 10)
+        if gap <= 0:
+            return 1.0
+        
+        scale = max(cfg['min_body_px'] / body_width, cfg['min_gap_px'] / gap, cfg['min_scale'])
+        
+        if self.debug:
+            print(f"自适应分辨率: 实体宽度≈{body_width:.1f}px, 间隙≈{gap:.1f}px, 缩放比例={scale:.2f}")
+        
+        return scale if scale <= cfg['max_scale'] else 1.0
+    
+    def _restore_scale(self, data_points_raw: List[Dict], img: np.ndarray, scale: float) -> List[Dict]:
+        """
+        将缩小图上检测到的图形元素映射回原图坐标
+        
+        实体边界在原图对应行、列上重新定位，影线在原图灰度图上重新查找，
+        因此价格精度不受缩放影响。
+        """
+        width = img.shape[1]
+        left, right, top, bottom = self._chart_bounds(img.shape)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        
+        restored = []
+        for c in data_points_raw:
+            x = min(int(round((c['x_center'] + 0.5) / scale - 0.5)), width - 1)
+            body_top = int(round(c['body_top'] / scale))
+            body_bottom = int(round(c['body_bottom'] / scale))
+            mid_y = min(max((body_top + body_bottom) // 2, top), bottom - 1)
+            
+            # 在原图实体中线所在行上重新定位实体左右边界，得到与原图检测一致的中心列
+            body_width = int(round(c['width'] / scale))
+            run = self._colored_run(img[mid_y, left:right], x - left)
+            if run:
+                x = left + run[0] + (run[1] - run[0]) // 2
+                body_width = run[1] - run[0]
+            
+            # 在原图该列上重新定位实体上下边界
+            run = self._colored_run(img[top:bottom, x], mid_y - top)
+            if run:
+                body_top = run[0] + top
+                body_bottom = run[1] + top
+            
+            restored.append({
+                **c,
+                'x_center': x,
+                'body_top': body_top,
+                'body_bottom': body_bottom,
+                'shadow_high': self._find_shadow_top(gray, x, body_top, top),
+                'shadow_low': self._find_shadow_bottom(gray, x, body_bottom, bottom),
+                'width': body_width
+            })
+        
+        return restored
+    
+    @staticmethod
+    def _colored_run(pixels: np.ndarray, index: int) -> Optional[Tuple[int, int]]:
+        """在一行/一列BGR像素中找到包含 index 的连续有颜色区间 [start, end)"""
+        if not 0 <= index < len(pixels):
+            return None
+        hsv = cv2.cvtColor(pixels.reshape(-1, 1, 3), cv2.COLOR_BGR2HSV)[:, 0]
+        colored = (hsv[:, 1] >= 50) & (hsv[:, 2] >= 50)
+        if not colored[index]:
+            return None
+        start = index
+        while start > 0 and colored[start - 1]:
+            start -= 1
+        end = index + 1
+        while end < len(colored) and colored[end]:
+            end += 1
+        return start, end
     
     def _preprocess_image(self, img: np.ndarray) -> np.ndarray:
         """图像预处理"""
@@ -150,15 +635,94 @@ class ChartRecognizer:
             cv2.THRESH_BINARY, 11, 2
         )
         
-        if self.debug:
-            cv2.imwrite('debug_preprocessed.png', binary)
+        if self.debug and DEBUG_CONFIG['save_preprocessed']:
+            cv2.imwrite(self._debug_path('preprocessed'), binary)
         
         return binary
     
-    def _recognize_axis(self, img: np.ndarray) -> Dict:
+    def _axis_strips(self, img_shape: Tuple) -> List[Tuple[int, int, int, int]]:
+        """坐标轴和标题所在的区域 (x0, y0, x1, y1)：左右价格轴整列，底部日期轴和顶部标题的中间部分"""
+        height, width = img_shape[:2]
+        r = self.regions
+        left = int(width * r['price_axis_left'])
+        right = int(width * r['price_axis_right'])
+        date_top = int(height * r['date_axis_top'])
+        title_bottom = int(height * r['title_bottom'])
+        return [(0, 0, left, height),
+                (right, 0, width, height),
+                (left, date_top, right, height),
+                (left, 0, right, title_bottom)]
+    
+    def _recognize_axis_cached(self, img: np.ndarray) -> Dict:
+        """
+        快速流程的坐标轴识别：只对坐标轴区域做OCR，
+        坐标轴区域内容与之前某张图片完全相同时直接复用其结果
+        """
+        if self.ocr is None or self.calibration:
+            return self._recognize_axis(img)
+        
+        step = CASCADE_CONFIG['axis_hash_step']
+        digest = hashlib.blake2b(digest_size=16)
+        for x0, y0, x1, y1 in self._axis_strips(img.shape):
+            digest.update(np.ascontiguousarray(img[y0:y1:step, x0:x1:step]).tobytes())
+        key = (img.shape, digest.hexdigest())
+        
+        with self._state_lock:
+            cached = self._axis_cache.get(key)
+            if cached is not None:
+                self._axis_cache.move_to_end(key)
+                self.stats['axis_cache_hits'] += 1
+                return cached
+        
+        axis_info = self._recognize_axis(img, cropped=True)
+        with self._state_lock:
+            self._axis_cache[key] = axis_info
+            while len(self._axis_cache) > CASCADE_CONFIG['axis_cache_size']:
+                self._axis_cache.popitem(last=False)
+        return axis_info
+    
+    def _ocr_lines(self, img: np.ndarray, cropped: bool = False) -> List[Tuple]:
+        """
+        OCR识别文字
+        
+        Args:
+            cropped: 只识别坐标轴和标题区域（见 _axis_strips）
+        
+        Returns:
+            [(bbox, text, confidence), ...]，bbox 为原图坐标
+        """
+        if not cropped:
+            with self._ocr_lock:
+                result = self.ocr.ocr(img, cls=True)
+            return [(bbox, text, conf) for bbox, (text, conf) in result[0]] if result and result[0] else []
+        
+        strips = [(x0, y0, x1, y1) for x0, y0, x1, y1 in self._axis_strips(img.shape)
+                  if x1 > x0 and y1 > y0]
+        if hasattr(self.ocr, 'submit'):
+            # OCR服务：一次提交所有区域，便于合并到同一批
+            futures = [self.ocr.submit(img[y0:y1, x0:x1]) for x0, y0, x1, y1 in strips]
+            results = [f.result() for f in futures]
+        else:
+            results = []
+            for x0, y0, x1, y1 in strips:
+                with self._ocr_lock:
+                    results.append(self.ocr.ocr(img[y0:y1, x0:x1], cls=True))
+        
+        lines = []
+        for (x0, y0, _, _), result in zip(strips, results):
+            if not result or not result[0]:
+                continue
+            for bbox, (text, conf) in result[0]:
+                lines.append(([(p[0] + x0, p[1] + y0) for p in bbox], text, conf))
+        return lines
+    
+    def _recognize_axis(self, img: np.ndarray, cropped: bool = False) -> Dict:
         """
         识别坐标轴信息（价格刻度、日期等）
         
+        Args:
+            cropped: 只对坐标轴和标题区域做OCR（快速流程）
+        
         Returns:
             {
                 'price_min': float,
@@ -172,19 +736,26 @@ class ChartRecognizer:
             'price_min': None,
             'price_max': None,
             'price_coords': [],
+            'price_scores': [],
             'date_coords': [],
             'symbol': None
         }
         
+        # 已标定：直接使用标定的价格刻度，不做OCR
+        if self.calibration:
+            return self._calibrated_axis()
+        
         # 使用OCR识别文字（如果可用）
         if self.ocr is None:
             # OCR不可用，返回基础信息
             return axis_info
             
         try:
-            result = self.ocr.ocr(img, cls=True)
+            # 只能识别坐标轴区域的后端（如数字识别器）始终只对坐标轴区域做OCR
+            cropped = cropped or not getattr(self.ocr, 'full_image', True)
+            lines = self._ocr_lines(img, cropped)
             
-            if not result or not result[0]:
+            if not lines:
                 return axis_info
         except Exception as e:
             if self.debug:
@@ -192,29 +763,32 @@ class ChartRecognizer:
             return axis_info
         
         height, width = img.shape[:2]
+        regions = self.regions
         
         # 提取价格和日期信息
-        for line in result[0]:
-            bbox, (text, confidence) = line
+        for bbox, text, confidence in lines:
             
             # 获取文字位置
             x_center = int((bbox[0][0] + bbox[2][0]) / 2)
             y_center = int((bbox[0][1] + bbox[2][1]) / 2)
             
-            # 识别价格（通常在右侧或左侧）
-            if (x_center < width * 0.15 or x_center > width * 0.85):
+            # 识别价格（通常在右侧或左侧，底部日期轴两端的日期不算）
+            if ((x_center < width * regions['price_axis_left'] or
+                    x_center > width * regions['price_axis_right']) and
+                    y_center <= height * regions['date_axis_top']):
                 price = self._parse_price(text)
                 if price:
                     axis_info['price_coords'].append((y_center, price))
+                    axis_info['price_scores'].append(float(confidence))
             
             # 识别日期（通常在底部）
-            if y_center > height * 0.85:
+            if y_center > height * regions['date_axis_top']:
                 date = self._parse_date(text)
                 if date:
                     axis_info['date_coords'].append((x_center, date))
             
             # 识别股票代码（通常在顶部）
-            if y_center < height * 0.1:
+            if y_center < height * regions['title_bottom']:
                 symbol = self._parse_symbol(text)
                 if symbol:
                     axis_info['symbol'] = symbol
@@ -230,10 +804,32 @@ class ChartRecognizer:
         
         return axis_info
     
-    def _detect_data_points(self, binary_img: np.ndarray, color_img: np.ndarray) -> List[Dict]:
+    def _calibrated_axis(self) -> Dict:
+        """根据标定信息生成坐标轴信息"""
+        # 解码时缩小过的图片，标定的y坐标同比缩小
+        reduce = getattr(self._local, 'reduce', 1)
+        price_coords = [(int(y / reduce), float(price)) for y, price in self.calibration['price_coords']]
+        prices = [p for _, p in price_coords]
+        return {
+            'price_min': min(prices) if prices else None,
+            'price_max': max(prices) if prices else None,
+            'price_coords': price_coords,
+            'price_scores': [],
+            'date_coords': [],
+            'symbol': self.calibration.get('symbol'),
+            'calibrated': True
+        }
+    
+    def _detect_data_points(self, binary_img: np.ndarray, color_img: np.ndarray,
+                            scale: float = 1.0,
+                            x_range: Optional[Tuple[int, int]] = None) -> List[Dict]:
         """
         检测图形元素实体和影线
         
+        Args:
+            scale: 图片相对原图的缩放比例，用于同比缩小最小实体高度
+            x_range: 只在该列范围 [x0, x1) 内检测（增量识别），None表示整个图表区域
+        
         Returns:
             List of {
                 'x_center': int,
@@ -246,16 +842,21 @@ class ChartRecognizer:
         """
         data_points = []
         
-        height, width = color_img.shape[:2]
-        
         # 定义图形元素图主体区域（排除坐标轴）
-        chart_left = int(width * 0.1)
-        chart_right = int(width * 0.9)
-        chart_top = int(height * 0.1)
-        chart_bottom = int(height * 0.8)
+        chart_left, chart_right, chart_top, chart_bottom = self._chart_bounds(color_img.shape)
+        
+        if x_range is not None:
+            chart_left = max(chart_left, x_range[0])
+            chart_right = min(chart_right, x_range[1])
+            if chart_right <= chart_left:
+                return []
+        
+        # 只处理图表区域所在的列
+        strip = color_img[:, chart_left:chart_right]
+        gray = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY)
         
         # 提取红色和绿色通道
-        hsv = cv2.cvtColor(color_img, cv2.COLOR_BGR2HSV)
+        hsv = cv2.cvtColor(strip, cv2.COLOR_BGR2HSV)
         
         # 红色图形元素检测（两个色调范围）
         red_mask1 = cv2.inRange(hsv, (0, 50, 50), (10, 255, 255))
@@ -265,20 +866,24 @@ class ChartRecognizer:
         # 绿色图形元素检测
         green_mask = cv2.inRange(hsv, (40, 50, 50), (80, 255, 255))
         
+        min_height = max(1, int(round(5 * scale)))
+        
         # 检测红色图形元素
         data_points.extend(self._extract_data_points_from_mask(
-            red_mask, color_img, chart_left, chart_right, chart_top, chart_bottom, is_red=True
+            red_mask, gray, chart_left, chart_top, chart_bottom, is_red=True,
+            min_height=min_height
         ))
         
         # 检测绿色图形元素
         data_points.extend(self._extract_data_points_from_mask(
-            green_mask, color_img, chart_left, chart_right, chart_top, chart_bottom, is_red=False
+            green_mask, gray, chart_left, chart_top, chart_bottom, is_red=False,
+            min_height=min_height
         ))
         
         # 按x坐标排序
         data_points.sort(key=lambda c: c['x_center'])
         
-        if self.debug:
+        if self.debug and DEBUG_CONFIG['save_data_points']:
             debug_img = color_img.copy()
             for c in data_points:
                 cv2.rectangle(debug_img, 
@@ -289,28 +894,30 @@ class ChartRecognizer:
                         (c['x_center'], c['shadow_high']),
                         (c['x_center'], c['shadow_low']),
                         (255, 0, 0), 1)
-            cv2.imwrite('debug_data_points.png', debug_img)
+            cv2.imwrite(self._debug_path('data_points'), debug_img)
         
         return data_points
     
-    def _extract_data_points_from_mask(self, mask: np.ndarray, color_img: np.ndarray,
-                                   left: int, right: int, top: int, bottom: int,
-                                   is_red: bool) -> List[Dict]:
-        """从颜色掩码中提取图形元素"""
+    def _extract_data_points_from_mask(self, mask: np.ndarray, gray: np.ndarray,
+                                   left: int, top: int, bottom: int,
+                                   is_red: bool, min_height: int = 5) -> List[Dict]:
+        """
+        从颜色掩码中提取图形元素
+        
+        mask 和 gray 为从原图第 left 列开始截取的图表列，返回的坐标为原图坐标。
+        """
         data_points = []
         
         # 在图表区域内查找轮廓
-        roi_mask = mask[top:bottom, left:right]
+        roi_mask = mask[top:bottom]
         contours, _ = cv2.findContours(roi_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        gray = cv2.cvtColor(color_img, cv2.COLOR_BGR2GRAY)
-        
         for contour in contours:
             # 获取边界框
             x, y, w, h = cv2.boundingRect(contour)
             
             # 过滤太小的轮廓
-            if w < 3 or h < 5:
+            if w < 3 or h < min_height:
                 continue
             
             # 转换回原图坐标
@@ -321,9 +928,12 @@ class ChartRecognizer:
             body_top = y_abs
             body_bottom = y_abs + h
             
+            # 实体颜色填充率（实心矩形接近1）
+            fill = cv2.countNonZero(roi_mask[y:y + h, x:x + w]) / float(w * h)
+            
             # 检测影线（在实体上下的细线）
-            shadow_high = self._find_shadow_top(gray, x_center, body_top, top)
-            shadow_low = self._find_shadow_bottom(gray, x_center, body_bottom, bottom)
+            shadow_high = self._find_shadow_top(gray, x_center - left, body_top, top)
+            shadow_low = self._find_shadow_bottom(gray, x_center - left, body_bottom, bottom)
             
             data_points.append({
                 'x_center': x_center,
@@ -331,7 +941,9 @@ class ChartRecognizer:
                 'body_bottom': body_bottom,
                 'shadow_high': shadow_high,
                 'shadow_low': shadow_low,
-                'is_red': is_red
+                'is_red': is_red,
+                'width': w,
+                'fill': round(fill, 4)
             })
         
         return data_points
@@ -362,14 +974,11 @@ class ChartRecognizer:
         if not data_points_raw:
             return []
         
-        height, width = img_shape[:2]
-        
         # 如果没有识别到价格坐标，使用估算
         if not axis_info['price_coords'] or len(axis_info['price_coords']) < 2:
             price_min = 100.0
             price_max = 200.0
-            price_top = int(height * 0.1)
-            price_bottom = int(height * 0.8)
+            _, _, price_top, price_bottom = self._chart_bounds(img_shape)
         else:
             # 使用识别到的价格坐标
             price_coords = sorted(axis_info['price_coords'], key=lambda x: x[0])
@@ -412,31 +1021,20 @@ class ChartRecognizer:
                 open=open_price,
                 high=high_price,
                 low=low_price,
-                close=close_price
+                close=close_price,
+                x_center=c_raw['x_center']
             ))
         
         return data_points
     
-    def _calculate_confidence(self, data_points: List[DataPoint], axis_info: Dict) -> float:
-        """计算识别置信度"""
-        confidence = 1.0
-        
-        # 如果没有识别到图形元素，置信度为0
-        if not data_points:
-            return 0.0
-        
-        # 如果没有识别到价格坐标，降低置信度
-        if not axis_info['price_coords']:
-            confidence *= 0.5
-        
-        # 检查数据合理性
-        for DataPoint in data_points:
-            if DataPoint.high < DataPoint.low:
-                confidence *= 0.8
-            if DataPoint.open < 0 or DataPoint.close < 0:
-                confidence *= 0.8
+    def _calculate_confidence(self, data_points: List[DataPoint], quality: Dict) -> float:
+        """
+        计算识别置信度
         
-        return round(confidence, 2)
+        按 CONFIDENCE_MODEL 加权合成各项质量特征（见 confidence.quality_features），
+        没有识别到图形元素时为0。
+        """
+        return combine_features(quality, len(data_points))
     
     def _parse_price(self, text: str) -> Optional[float]:
         """从文本中解析价格"""
@@ -484,39 +1082,53 @@ class ChartRecognizer:
         return None
     
     def batch_process(self, input_dir: str, output_dir: str = 'output',
-                     output_formats: List[str] = ['json', 'csv', 'excel']) -> List[RecognitionResult]:
+                     output_formats: List[str] = ['json', 'csv', 'excel'],
+                     max_workers: int = 1, recursive: bool = False,
+                     include: Optional[List[str]] = None,
+                     exclude: Optional[List[str]] = None,
+                     pipeline: bool = False, compact: bool = False,
+                     compress: Optional[str] = None) -> List[RecognitionResult]:
         """
         批量处理图形元素图
         
         Args:
             input_dir: 输入图片文件夹
             output_dir: 输出文件夹
-            output_formats: 输出格式列表 ['json', 'csv', 'excel']
+            output_formats: 输出格式列表 ['json', 'jsonl', 'msgpack', 'csv', 'excel', 'sqlite']
+            max_workers: 线程数，1表示顺序处理（OpenCV计算会释放GIL，
+                         小图片用线程池比多进程省去启动和内存开销）
+            recursive: 是否包含子文件夹（图片名称为相对 input_dir 的路径）
+            include: 只处理匹配这些通配符的图片（相对路径或文件名）
+            exclude: 跳过匹配这些通配符的图片和子文件夹
+            pipeline: 使用分阶段流水线（pipeline.RecognitionPipeline）：读取解码、图形元素检测、
+                      坐标轴OCR 在各自的线程中同时进行，max_workers 为检测阶段的线程数
+            compact: results.json 不缩进
+            compress: json / jsonl / msgpack 输出的压缩方式（None、'gzip'、'zstd'）
             
         Returns:
             List[RecognitionResult]: 所有识别结果
         """
         from tqdm import tqdm
         
-        input_path = Path(input_dir)
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        # 支持的图片格式
-        image_extensions = ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']
-        image_files = []
-        for ext in image_extensions:
-            image_files.extend(input_path.glob(f'*{ext}'))
-        
-        print(f"找到 {len(image_files)} 张图片")
+        # 边遍历边识别，不需要先列出全部文件
+        image_files = iter_images(input_dir, recursive=recursive, include=include, exclude=exclude)
+        items = ((path, Path(os.path.relpath(path, input_dir)).as_posix()) for path in image_files)
         
-        results = []
-        for img_file in tqdm(image_files, desc="处理中"):
-            result = self.recognize(str(img_file))
-            results.append(result)
+        # SQLite结果库记录图片指纹：在读取解码时顺便计算，不再重新读取文件
+        with_hash = 'sqlite' in output_formats
+        if pipeline:
+            from pipeline import RecognitionPipeline
+            stream = RecognitionPipeline(self, cpu_workers=max_workers, with_hash=with_hash).run(items)
+        else:
+            stream = self.iter_recognize(items, max_workers, with_hash=with_hash)
+        results = list(tqdm(stream, desc="处理中", unit="张"))
+        print(f"共处理 {len(results)} 张图片")
         
         # 输出结果
-        self._export_results(results, output_path, output_formats)
+        self._export_results(results, output_path, output_formats, compact, compress)
         
         # 统计信息
         success_count = sum(1 for r in results if r.confidence > 0.5)
@@ -525,19 +1137,63 @@ class ChartRecognizer:
         
         return results
     
+    def iter_recognize(self, images: Iterable, max_workers: int = 1,
+                       with_hash: bool = False) -> Iterator[RecognitionResult]:
+        """
+        依次识别多张图片，边识别边返回结果（顺序与输入一致）
+        
+        Args:
+            images: 图片路径（或 recognize() 支持的其他输入）、或 (图片, 名称) 元组，
+                    可以是边遍历边产生的迭代器
+            max_workers: 线程数，1表示顺序处理
+            with_hash: 用已读入的文件内容计算指纹，记录在 RecognitionResult.image_hash
+        """
+        def recognize_loaded(image_name, img, reduce, image_hash):
+            result = self._recognize_decoded(img, image_name, reduce)
+            result.image_hash = image_hash
+            return result
+        
+        def recognize_item(item):
+            return recognize_loaded(*load(item, self.decode_reduce, with_hash))
+        
+        if max_workers <= 1:
+            # 后台线程预先读取并解码下一张，与当前图片的识别重叠进行
+            with PrefetchReader(images, self.decode_reduce, with_hash=with_hash) as reader:
+                for loaded in reader:
+                    yield recognize_loaded(*loaded)
+            return
+        
+        # 最多提前提交 2×线程数 张，输入迭代器不会被一次读完
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            window = deque()
+            for item in images:
+                window.append(executor.submit(recognize_item, item))
+                if len(window) >= 2 * max_workers:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+    
     def _export_results(self, results: List[RecognitionResult], 
-                       output_path: Path, formats: List[str]):
+                       output_path: Path, formats: List[str],
+                       compact: bool = False, compress: Optional[str] = None):
         """导出结果到多种格式"""
         
-        # JSON格式
-        if 'json' in formats:
-            json_file = output_path / 'results.json'
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump([r.to_dict() for r in results], f, 
-                         ensure_ascii=False, indent=2)
+        # SQLite格式（按图片名称更新已有记录，只改动有变化的行）
+        if 'sqlite' in formats:
+            from config import SQLITE_CONFIG
+            from sqlite_store import SqliteStore
+            with SqliteStore(output_path / SQLITE_CONFIG['filename']) as store:
+                for result in results:
+                    store.write(result)
+        
+        # JSON / JSON Lines / MessagePack 格式（可选压缩）
+        for fmt in ('json', 'jsonl', 'msgpack'):
+            if fmt in formats:
+                from serialization import write_results
+                write_results(results, output_path, fmt, compact=compact, compress=compress)
         
         # CSV格式（展平数据）
-        if 'csv' in formats or 'excel' in formats:
+        if 'csv' in formats:
             all_data_points = []
             for result in results:
                 for DataPoint in result.data_points:
@@ -555,13 +1211,15 @@ class ChartRecognizer:
             
             df = pd.DataFrame(all_data_points)
             
-            if 'csv' in formats:
-                csv_file = output_path / 'results.csv'
-                df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-            
-            if 'excel' in formats:
-                excel_file = output_path / 'results.xlsx'
-                df.to_excel(excel_file, index=False, engine='openpyxl')
+            csv_file = output_path / 'results.csv'
+            df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+        
+        # Excel格式（逐行写入，超过工作表行数上限时自动换表）
+        if 'excel' in formats:
+            from exporters import ExcelSink
+            with ExcelSink(output_path / 'results.xlsx') as sink:
+                for result in results:
+                    sink.write(result)
 
 
 if __name__ == '__main__':
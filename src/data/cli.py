@@ -3,10 +3,51 @@
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 from chart_recognizer import ChartRecognizer
-import json
+from config import OUTPUT_CONFIG
+from exporters import open_sinks
+from ocr_backends import create_backend
+from serialization import (COMPRESSION_SUFFIXES, MSGPACK_AVAILABLE, ZSTD_AVAILABLE,
+                           dumps_json, open_compressed)
+from stitching import stitch, to_dataframe
+from watcher import INOTIFY_AVAILABLE, DirectoryWatcher
+
+
+def watch_directory(recognizer: ChartRecognizer, directory: Path, output_dir: str,
+                    formats, workers: int = 1, recursive: bool = False):
+    """
+    持续监控目录，识别新增或修改的图片并追加到输出文件（results.jsonl / results.csv）
+    """
+    watcher = DirectoryWatcher(str(directory), recursive=recursive)
+    with_hash = 'sqlite' in formats
+    sinks = open_sinks(output_dir, formats)
+    mode = 'inotify' if watcher.use_inotify else f'每 {watcher.poll_interval} 秒扫描'
+    print(f"开始监控 {directory}（{mode}），按 Ctrl+C 停止")
+    
+    total = 0
+    try:
+        for paths in watcher.watch():
+            # 与批量处理相同，结果以相对监控目录的路径命名，子目录中的同名图片不会互相覆盖
+            items = [(path, Path(os.path.relpath(path, watcher.directory)).as_posix()) for path in paths]
+            for result in recognizer.iter_recognize(items, workers, with_hash=with_hash):
+                for sink in sinks:
+                    sink.write(result)
+                total += 1
+                status = f"错误: {result.error}" if result.error else \
+                    f"{len(result.data_points)} 根，置信度 {result.confidence}"
+                print(f"  {result.image_name}: {status}")
+            for sink in sinks:
+                sink.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sink in sinks:
+            sink.close()
+    
+    print(f"\n共识别 {total} 张，结果已追加到: {', '.join(str(s.path) for s in sinks) or '无'}")
 
 
 def main():
@@ -26,6 +67,18 @@ def main():
   
   # 开启GPU加速和调试模式
   python cli.py -i screenshots/ -o output/ --gpu --debug
+  
+  # 高分辨率截图自动降采样
+  python cli.py -i screenshots/ -o output/ --adaptive
+  
+  # 4倍分辨率截图解码时直接缩小为1/4
+  python cli.py -i screenshots/ -o output/ --reduce 4
+  
+  # 递归处理子文件夹，跳过调试图片
+  python cli.py -i screenshots/ -o output/ -r --exclude "debug_*"
+  
+  # 持续监控文件夹，新截图写入完成后自动识别并追加到 output/results.jsonl 和 results.csv
+  python cli.py -i screenshots/ -o output/ -f json csv --watch
         """
     )
     
@@ -34,22 +87,74 @@ def main():
     parser.add_argument('-o', '--output', default='output',
                        help='输出文件夹路径（默认: output）')
     parser.add_argument('-f', '--formats', nargs='+',
-                       choices=['json', 'csv', 'excel'],
+                       choices=['json', 'jsonl', 'msgpack', 'csv', 'excel', 'sqlite'],
                        default=['json', 'csv', 'excel'],
-                       help='输出格式（默认: 全部）')
+                       help='输出格式（默认: json csv excel；jsonl 每行一张图片；msgpack 需要安装 msgpack；'
+                            'sqlite 写入 results.db，重复运行时只更新有变化的行）')
+    parser.add_argument('--compact', action='store_true',
+                       help='JSON不缩进（文件更小，写入和解析更快）')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'],
+                       help='压缩 json / jsonl / msgpack 输出（zstd 需要安装 zstandard）')
     parser.add_argument('--gpu', action='store_true',
                        help='使用GPU加速')
     parser.add_argument('--debug', action='store_true',
                        help='开启调试模式（保存中间处理图片）')
+    parser.add_argument('--adaptive', action='store_true',
+                       help='根据图形元素间距自动降采样（适合高分辨率截图）')
+    parser.add_argument('--reduce', type=int, choices=[1, 2, 4, 8], default=1,
+                       help='解码时直接缩小的倍数（高分辨率截图，JPEG解码也更快；默认: 1）')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                       help='批量处理的线程数（默认: 1，顺序处理）')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='分阶段流水线：读取解码、图形元素检测（-w 个线程）、坐标轴OCR 同时进行')
+    parser.add_argument('--ocr', choices=['paddle', 'digits', 'auto'], default='paddle',
+                       help='坐标轴OCR后端：paddle（默认）、digits（内置数字识别，无需PaddleOCR）、'
+                            'auto（数字识别优先，识别不了的区域回退到PaddleOCR）')
+    parser.add_argument('--cascade', action='store_true',
+                       help='分级识别：先快速识别，置信度不足时再完整识别')
+    parser.add_argument('--watch', action='store_true',
+                       help='持续监控输入文件夹，识别新增或修改的图片并追加到输出文件'
+                            f"（{'inotify' if INOTIFY_AVAILABLE else '定时扫描'}）")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                       help='包含子文件夹')
+    parser.add_argument('--include', nargs='+', metavar='PATTERN',
+                       help='只处理匹配这些通配符的图片（相对路径或文件名，如 "2024*/*.png"）')
+    parser.add_argument('--exclude', nargs='+', metavar='PATTERN',
+                       help='跳过匹配这些通配符的图片和子文件夹（如 debug_*）')
+    parser.add_argument('--stitch', action='store_true',
+                       help='按股票代码拼接时间窗口重叠的截图，去重后输出到 stitched.csv')
     
     args = parser.parse_args()
     
+    # 缺少可选依赖时在识别之前退出
+    if 'msgpack' in args.formats and not MSGPACK_AVAILABLE:
+        print("错误: msgpack 格式需要安装 msgpack: pip install msgpack")
+        sys.exit(1)
+    if args.compress == 'zstd' and not ZSTD_AVAILABLE:
+        print("错误: zstd 压缩需要安装 zstandard: pip install zstandard")
+        sys.exit(1)
+    
     # 初始化识别器
     print("正在初始化图形元素图识别器...")
-    recognizer = ChartRecognizer(use_gpu=args.gpu, debug=args.debug)
+    recognizer = ChartRecognizer(use_gpu=args.gpu, debug=args.debug,
+                                 adaptive_resolution=args.adaptive,
+                                 cascade=args.cascade,
+                                 decode_reduce=args.reduce,
+                                 ocr_backend=None if args.ocr == 'paddle' else create_backend(args.ocr))
     
     input_path = Path(args.input)
     
+    if args.watch:
+        if not input_path.is_dir():
+            print(f"错误: 监控模式需要输入文件夹 - {input_path}")
+            sys.exit(1)
+        # 监控模式逐张追加到 results.jsonl / results.csv，不支持压缩（msgpack 由 open_sinks 提示跳过）
+        if args.compress:
+            print(f"⚠️  监控模式不支持 --compress {args.compress}，输出文件不压缩")
+        watch_directory(recognizer, input_path, args.output, args.formats,
+                        workers=args.workers, recursive=args.recursive)
+        return
+    
     # 判断是单个文件还是文件夹
     if input_path.is_file():
         # 单个文件
@@ -74,9 +179,9 @@ def main():
         output_path = Path(args.output)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        json_file = output_path / f"{input_path.stem}_result.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(result.to_dict(), f, ensure_ascii=False, indent=2)
+        json_file = output_path / f"{input_path.stem}_result.json{COMPRESSION_SUFFIXES.get(args.compress, '')}"
+        with open_compressed(json_file, 'wb', args.compress) as f:
+            f.write(dumps_json(result.to_dict(), indent=None if args.compact else OUTPUT_CONFIG['json_indent']))
         
         print(f"\n结果已保存到: {json_file}")
         
@@ -85,7 +190,14 @@ def main():
         results = recognizer.batch_process(
             str(input_path),
             args.output,
-            args.formats
+            args.formats,
+            max_workers=args.workers,
+            recursive=args.recursive,
+            include=args.include,
+            exclude=args.exclude,
+            pipeline=args.pipeline,
+            compact=args.compact,
+            compress=args.compress
         )
         
         # 显示详细统计
@@ -100,12 +212,25 @@ def main():
         print(f"  高置信度 (>0.8): {high_conf} 张")
         print(f"  中置信度 (0.5-0.8): {medium_conf} 张")
         print(f"  低置信度 (<0.5): {low_conf} 张")
+        if args.cascade:
+            s = recognizer.stats
+            print(f"  快速完成: {s['fast']} 张，升级为完整识别: {s['escalated']} 张")
         
         if low_conf > 0:
             print("\n低置信度图片:")
             for r in results:
                 if r.confidence < 0.5:
                     print(f"  - {r.image_name}: {r.confidence} ({r.error or '数据质量差'})")
+        
+        if args.stitch:
+            series = stitch(results)
+            stitched_file = Path(args.output) / 'stitched.csv'
+            to_dataframe(series).to_csv(stitched_file, index=False, encoding='utf-8-sig')
+            print(f"\n拼接结果: {len(series)} 条序列，去掉重复图形元素 "
+                  f"{sum(s.n_duplicates for s in series)} 根 -> {stitched_file}")
+            for s in series:
+                if not s.dated:
+                    print(f"  - {s.symbol or '未识别'}: 日期与OHLC对不上，已按序号重新生成日期")
     
     else:
         print(f"错误: 路径不存在 - {input_path}")
@@ -0,0 +1,177 @@
+﻿"""
+识别置信度模型
+只使用识别过程中已经得到的信息（刻度拟合、图形元素间距、实体填充率、OCR分数、
+数据一致性）估算置信度，不做额外的图像处理
+"""
+
+import numpy as np
+from typing import List, Dict, Optional, Sequence, Tuple
+
+from config import CONFIDENCE_MODEL, CONFIDENCE_THRESHOLDS
+from validation import validate_data_points
+
+
+def _clip01(value: float) -> float:
+    return float(min(max(value, 0.0), 1.0))
+
+
+def _relative_spread(values: np.ndarray) -> float:
+    """相对离散程度：与中位数的平均绝对偏差 / 中位数"""
+    median = np.median(values)
+    if median <= 0:
+        return np.inf
+    return float(np.mean(np.abs(values - median)) / median)
+
+
+def tick_fit_score(price_coords: Sequence, calibrated: bool = False) -> float:
+    """
+    价格刻度的线性拟合程度
+
+    刻度应满足 价格 = a * y + b 且 a < 0（越往下价格越低），
+    残差相对价格范围越小越可信；只有两个刻度时无法验证，给固定分数。
+    """
+    cfg = CONFIDENCE_MODEL
+    if calibrated:
+        return 1.0
+    if len(price_coords) < 2:
+        return 0.0
+
+    ys = np.array([c[0] for c in price_coords], dtype=float)
+    prices = np.array([c[1] for c in price_coords], dtype=float)
+    if np.ptp(ys) == 0 or np.ptp(prices) == 0:
+        return 0.0
+
+    slope, intercept = np.polyfit(ys, prices, 1)
+    if slope >= 0:
+        return 0.0
+    if len(price_coords) == 2:
+        return cfg['two_tick_score']
+
+    residual = np.sqrt(np.mean((prices - (slope * ys + intercept)) ** 2)) / np.ptp(prices)
+    return _clip01(1.0 - residual / cfg['max_tick_residual'])
+
+
+def spacing_score(x_centers: Sequence[float]) -> Optional[float]:
+    """图形元素间距是否均匀（缺失或多余的图形元素会让间距不均）"""
+    if len(x_centers) < 3:
+        return None
+    spread = _relative_spread(np.diff(np.sort(np.asarray(x_centers, dtype=float))))
+    return _clip01(1.0 - spread / CONFIDENCE_MODEL['max_spacing_spread'])
+
+
+def width_score(widths: Sequence[float]) -> Optional[float]:
+    """实体宽度是否一致（粘连或截断的实体宽度异常）"""
+    if len(widths) < 3:
+        return None
+    spread = _relative_spread(np.asarray(widths, dtype=float))
+    return _clip01(1.0 - spread / CONFIDENCE_MODEL['max_width_spread'])
+
+
+def fill_score(fills: Sequence[float]) -> Optional[float]:
+    """实体颜色填充率（实体应为实心矩形，填充率低说明检测到的是文字、网格线等）"""
+    if len(fills) == 0:
+        return None
+    min_fill = CONFIDENCE_MODEL['min_fill']
+    return _clip01((float(np.mean(fills)) - min_fill) / (1.0 - min_fill))
+
+
+def wick_flags(data_points_raw: List[Dict], bounds: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """
+    按像素几何判断影线/实体不可信的图形元素
+
+    坐标映射时最高/最低价被限制在开盘/收盘价之外，映射后的价格看不出影线的问题，
+    因此直接检查检测到的像素位置：
+        - 上下都没有找到影线（影线停在实体边缘，可能是影线颜色或位置没对上）
+        - 实体或影线碰到图表区域的上下边界（超出图表的部分被截断，真实的高低点未知；
+          影线一直延伸到边界时 _find_shadow_* 也会退回实体边缘）
+
+    Args:
+        data_points_raw: 检测结果（像素坐标，未经坐标映射）
+        bounds: 图表区域的 (上边界, 下边界) 像素，None表示不检查截断
+
+    Returns:
+        每根图形元素是否可疑的布尔数组
+    """
+    if not data_points_raw:
+        return np.zeros(0, dtype=bool)
+    geometry = np.array([[c['body_top'], c['body_bottom'], c['shadow_high'], c['shadow_low']]
+                         for c in data_points_raw])
+    body_top, body_bottom, shadow_high, shadow_low = geometry.T
+
+    flags = (shadow_high >= body_top) & (shadow_low <= body_bottom)
+    if bounds is not None:
+        top, bottom = bounds
+        flags |= (np.minimum(shadow_high, body_top) <= top) | (np.maximum(shadow_low, body_bottom) >= bottom - 1)
+    return flags
+
+
+def consistency_score(data_points: List, data_points_raw: Optional[List[Dict]] = None,
+                      bounds: Optional[Tuple[int, int]] = None) -> Optional[float]:
+    """
+    影线/实体几何可信（见 wick_flags）且没有价格校验标志（价格范围、涨跌幅）的图形元素比例
+    """
+    if not data_points:
+        return None
+    bad = validate_data_points(data_points).flags != 0
+    if data_points_raw is not None and len(data_points_raw) == len(data_points):
+        bad |= wick_flags(data_points_raw, bounds)
+    return 1.0 - float(np.count_nonzero(bad)) / len(data_points)
+
+
+def quality_features(data_points: List, data_points_raw: List[Dict], axis_info: Dict,
+                     bounds: Optional[Tuple[int, int]] = None) -> Dict[str, Optional[float]]:
+    """
+    计算各项质量特征（0~1，越高越可信；None表示无法计算）
+
+    Args:
+        bounds: 图表区域的 (上边界, 下边界) 像素，用于判断被截断的图形元素
+
+    Returns:
+        {'tick_fit', 'ocr', 'spacing', 'width', 'fill', 'consistency'}
+    """
+    calibrated = bool(axis_info.get('calibrated'))
+    ocr_scores = axis_info.get('price_scores') or []
+
+    features = {
+        'tick_fit': tick_fit_score(axis_info.get('price_coords') or [], calibrated),
+        'ocr': None if calibrated or not ocr_scores else _clip01(float(np.mean(ocr_scores))),
+        'spacing': spacing_score([c['x_center'] for c in data_points_raw]),
+        'width': width_score([c['width'] for c in data_points_raw if 'width' in c]),
+        'fill': fill_score([c['fill'] for c in data_points_raw if 'fill' in c]),
+        'consistency': consistency_score(data_points, data_points_raw, bounds),
+    }
+    return {k: (round(v, 4) if v is not None else None) for k, v in features.items()}
+
+
+def combine_features(features: Dict[str, Optional[float]], n_data_points: int) -> float:
+    """
+    按 CONFIDENCE_MODEL['weights'] 加权平均可用的特征，
+    图形元素少于 CONFIDENCE_THRESHOLDS['min_data_points'] 时按比例降低。
+    价格刻度没有识别出来（tick_fit 为0或缺失）时价格来自默认范围，
+    置信度限制在 CONFIDENCE_THRESHOLDS['medium'] 以下，不会被当作可用结果
+
+    Returns:
+        置信度（0~1，保留两位小数）
+    """
+    if n_data_points == 0:
+        return 0.0
+
+    weights = CONFIDENCE_MODEL['weights']
+    available = {k: v for k, v in features.items() if v is not None and weights.get(k)}
+    if not available:
+        return 0.0
+
+    total = sum(weights[k] for k in available)
+    confidence = sum(weights[k] * v for k, v in available.items()) / total
+    confidence *= min(1.0, n_data_points / CONFIDENCE_THRESHOLDS['min_data_points'])
+    if not features.get('tick_fit'):
+        confidence = min(confidence, CONFIDENCE_THRESHOLDS['medium'] - 0.01)
+
+    return round(confidence, 2)
+
+
+if __name__ == '__main__':
+    print("置信度模型已加载")
+    print("可用函数:")
+    print("  - quality_features(): 计算质量特征")
+    print("  - combine_features(): 合成置信度")
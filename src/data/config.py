@@ -12,6 +12,29 @@ OCR_CONFIG = {
     'det_db_box_thresh': 0.5,   # 框选阈值
 }
 
+# 共享OCR服务配置（ocr_service.OCRService）
+OCR_SERVICE_CONFIG = {
+    'num_engines': 2,           # 模型实例数
+    'max_batch': 8,             # 每批最多合并的请求数
+    'max_wait_ms': 10,          # 收到第一个请求后最多等待多少毫秒凑批
+    'max_canvas_height': 4096,  # 合并画布的最大高度（像素）
+    'gap': 16,                  # 画布中相邻图片之间的空白间隔（像素）
+}
+
+# 内置数字识别器配置（ocr_backends.DigitTemplateOCR）
+OCR_BACKEND_CONFIG = {
+    'template_fonts': [0, 1, 2, 3, 4],  # 渲染模板使用的 cv2.FONT_HERSHEY_* 字体
+    'glyph_size': (12, 20),     # 字符比较时统一缩放的尺寸 (宽, 高)
+    'ink_contrast': 60,         # 与背景亮度差超过该值的像素视为文字
+    'max_saturation': 80,       # 饱和度高于该值的像素（彩色实体）不视为文字
+    'min_glyph_height': 6,      # 文字行最小高度（像素）
+    'max_glyph_height': 64,     # 长于该值的直线视为网格线/影线并去除
+    'word_gap': 0.45,           # 字符间隔超过 行高×该值 时切分为不同单词
+    'aspect_penalty': 0.3,      # 宽高比与模板不一致时的扣分系数
+    'min_glyph_score': 0.6,     # 单词中任一数字分数低于该值时丢弃该单词
+    'min_confidence': 0.75,     # 回退链中低于该分数的文字行视为不可信
+}
+
 # 图像预处理配置
 IMAGE_PROCESSING = {
     'denoise_strength': 10,     # 去噪强度 (5-15)
@@ -36,6 +59,27 @@ DataPoint_DETECTION = {
     'min_DataPoint_height': 5,     # 最小图形元素高度（像素）
 }
 
+# 图片读取配置（image_io.py）
+IMAGE_IO_CONFIG = {
+    'use_mmap': True,           # 通过内存映射读取文件（网络存储上可改为False，一次性读取）
+    'prefetch_depth': 2,        # 顺序批量处理时最多预先解码多少张
+}
+
+# 自适应分辨率配置（ChartRecognizer(adaptive_resolution=True)）
+ADAPTIVE_RESOLUTION = {
+    'min_body_px': 4,           # 缩小后实体最小宽度（像素）
+    'min_gap_px': 3,            # 缩小后相邻实体最小间隙（像素）
+    'min_scale': 0.2,           # 最小缩放比例
+    'max_scale': 0.9,           # 缩放比例高于此值时不缩放（收益太小）
+    'sample_step': 4,           # 估算间距时的隔行采样步长
+}
+
+# 增量识别配置（ChartRecognizer.recognize_incremental）
+INCREMENTAL_CONFIG = {
+    'pixel_threshold': 16,      # 像素差异超过该值视为变化
+    'max_changed_fraction': 0.5,  # 图表区域变化列超过该比例时退回完整识别
+}
+
 # 坐标区域配置（相对比例）
 CHART_REGIONS = {
     'chart_left': 0.1,          # 图表左边界（比例）
@@ -46,6 +90,7 @@ CHART_REGIONS = {
     'price_axis_left': 0.15,    # 价格轴左侧宽度（比例）
     'price_axis_right': 0.85,   # 价格轴右侧起始（比例）
     'date_axis_top': 0.85,      # 日期轴顶部起始（比例）
+    'title_bottom': 0.1,        # 标题（股票代码）区域底部（比例）
 }
 
 # 置信度阈值
@@ -53,6 +98,30 @@ CONFIDENCE_THRESHOLDS = {
     'high': 0.8,                # 高质量阈值
     'medium': 0.5,              # 中等质量阈值
     'min_data_points': 5,           # 最少图形元素数量
+    'escalate': 0.8,            # 分级识别：快速识别置信度低于该值时改用完整流程
+}
+
+# 分级识别配置（ChartRecognizer(cascade=True)）
+CASCADE_CONFIG = {
+    'axis_cache_size': 32,      # 坐标轴识别结果缓存数量（按坐标轴区域内容索引）
+    'axis_hash_step': 2,        # 计算坐标轴区域指纹时的隔行隔列采样步长
+}
+
+# 置信度模型（confidence.py）：各质量特征的权重和容差
+CONFIDENCE_MODEL = {
+    'weights': {
+        'tick_fit': 0.3,        # 价格刻度线性拟合程度
+        'ocr': 0.1,             # 价格刻度OCR平均分数
+        'spacing': 0.2,         # 图形元素间距均匀程度
+        'width': 0.1,           # 实体宽度一致程度
+        'fill': 0.15,           # 实体颜色填充率
+        'consistency': 0.15,    # 通过数据校验的图形元素比例
+    },
+    'two_tick_score': 0.8,      # 只有两个刻度时（无法验证线性）的刻度分数
+    'max_tick_residual': 0.02,  # 刻度拟合残差（相对价格范围）达到该值时刻度分数为0
+    'max_spacing_spread': 0.3,  # 间距相对离散程度达到该值时间距分数为0
+    'max_width_spread': 0.3,    # 宽度相对离散程度达到该值时宽度分数为0
+    'min_fill': 0.5,            # 平均填充率低于该值时填充分数为0
 }
 
 # 价格范围验证
@@ -62,6 +131,15 @@ PRICE_VALIDATION = {
     'max_price_change': 0.5,    # 单根图形元素最大涨跌幅（50%）
 }
 
+# 准确度守卫（开启提速模式前与真实数据比对）
+ACCURACY_GUARD = {
+    'min_recall': 0.9,          # 最低召回率（识别到的真实图形元素比例）
+    'min_precision': 0.9,       # 最低精确率（识别结果中真实图形元素比例）
+    'max_mape': 0.02,           # 最大平均相对误差（2%）
+    'max_recall_drop': 0.02,    # 相对完整模式允许的召回率下降
+    'max_mape_increase': 0.005, # 相对完整模式允许的相对误差上升
+}
+
 # 批处理配置
 BATCH_PROCESSING = {
     'batch_size': 50,           # 每批处理数量
@@ -69,12 +147,69 @@ BATCH_PROCESSING = {
     'timeout': 30,              # 单张图片超时时间（秒）
 }
 
+# 分阶段识别流水线配置（pipeline.RecognitionPipeline，batch_process(pipeline=True)）
+PIPELINE_CONFIG = {
+    'io_workers': 1,            # 读取解码线程数
+    'cpu_workers': 2,           # 预处理和图形元素检测线程数
+    'ocr_workers': 1,           # 坐标轴识别线程数
+    'queue_size': 4,            # 阶段之间队列的容量
+}
+
+# 异步识别配置（async_recognizer.AsyncChartRecognizer）
+ASYNC_CONFIG = {
+    'max_workers': 2,           # 识别线程数
+    'max_concurrency': 4,       # 同时进行的识别数（包括读文件），超出的请求在事件循环中等待
+}
+
+# 本地HTTP识别服务配置（server.py）
+SERVER_CONFIG = {
+    'host': '127.0.0.1',        # 监听地址（默认只接受本机请求）
+    'port': 8765,               # 监听端口
+    'max_workers': 2,           # 识别线程数
+    'max_pending': 32,          # 排队+识别中的请求超过该值时返回 503
+    'max_upload_mb': 20,        # 上传图片的最大大小（MB）
+    'timeout': 30,              # 单个请求的最长识别时间（秒）
+}
+
+# 目录监控配置（watcher.DirectoryWatcher，cli.py --watch）
+WATCH_CONFIG = {
+    'poll_interval': 1.0,       # 定时扫描间隔（秒，未使用inotify时）
+    'debounce': 2.0,            # 文件大小和修改时间保持不变多少秒后才认为写入完成
+    'use_inotify': True,        # 安装了 inotify_simple 时使用 inotify
+}
+
+# 实时截图识别配置（live.py）
+LIVE_CONFIG = {
+    'fps': 1.0,                 # 目标截图帧率
+    'sample_step': 4,           # 帧差比较的采样步长
+    'pixel_threshold': 16,      # 单个像素差异阈值
+    'min_changed_pixels': 1,    # 至少多少个采样像素变化才认为帧变化
+}
+
+# 序列拼接配置（stitching.SeriesStitcher，cli.py --stitch）
+STITCH_CONFIG = {
+    'min_overlap': 3,           # 按OHLC对齐时至少重叠的图形元素数量
+    'tolerance': 0.02,          # 重叠部分OHLC的均方根误差上限（相对价格范围）
+    'min_confidence': 0.5,      # 低于该置信度的识别结果不参与拼接
+}
+
 # 输出配置
 OUTPUT_CONFIG = {
     'default_formats': ['json', 'csv', 'excel'],
     'date_format': '%Y-%m-%d',
     'float_precision': 2,       # 浮点数精度
     'excel_sheet_name': 'chart',
+    'excel_sheet_per_symbol': False,    # True：每个股票代码一个工作表
+    'excel_max_rows': 1048576,          # 每个工作表的最大行数（含表头），写满后换到下一个工作表
+    'json_indent': 2,           # results.json 的缩进（--compact 时不缩进）
+    'gzip_level': 6,            # gzip 压缩级别（1-9）
+    'zstd_level': 3,            # zstd 压缩级别（1-22）
+}
+
+# SQLite结果库配置（sqlite_store.SqliteStore，输出格式 sqlite）
+SQLITE_CONFIG = {
+    'filename': 'results.db',   # 输出文件夹中的数据库文件名
+    'batch_size': 100,          # 每个事务写入的图片数
 }
 
 # 调试配置
@@ -98,13 +233,28 @@ def get_config(section: str = None) -> dict:
     """
     all_config = {
         'ocr': OCR_CONFIG,
+        'ocr_service': OCR_SERVICE_CONFIG,
+        'ocr_backend': OCR_BACKEND_CONFIG,
         'image_processing': IMAGE_PROCESSING,
         'DataPoint_detection': DataPoint_DETECTION,
         'chart_regions': CHART_REGIONS,
+        'image_io': IMAGE_IO_CONFIG,
+        'adaptive_resolution': ADAPTIVE_RESOLUTION,
+        'incremental': INCREMENTAL_CONFIG,
+        'cascade': CASCADE_CONFIG,
         'confidence': CONFIDENCE_THRESHOLDS,
+        'confidence_model': CONFIDENCE_MODEL,
         'price_validation': PRICE_VALIDATION,
+        'accuracy_guard': ACCURACY_GUARD,
         'batch_processing': BATCH_PROCESSING,
+        'pipeline': PIPELINE_CONFIG,
+        'async': ASYNC_CONFIG,
+        'server': SERVER_CONFIG,
+        'watch': WATCH_CONFIG,
+        'live': LIVE_CONFIG,
+        'stitch': STITCH_CONFIG,
         'output': OUTPUT_CONFIG,
+        'sqlite': SQLITE_CONFIG,
         'debug': DEBUG_CONFIG,
     }
     
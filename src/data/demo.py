@@ -83,6 +83,7 @@ def create_demo_chart_image(output_path='demo_chart.png'):
     # 绘制图形元素
     for i, price_data in enumerate(prices):
         x = start_x + i * DataPoint_width + DataPoint_width // 2
+        price_data['x_center'] = x  # 记录真实位置，便于按x坐标对齐评分
         
         # 计算像素坐标
         def price_to_y(price):
@@ -165,6 +166,12 @@ def run_demo():
         if result.error:
             print(f"  - 错误: {result.error}")
         
+        # 与真实数据比对
+        from scoring import score_result
+        score = score_result(result, true_prices)
+        print(f"  - 召回率: {score.recall:.2f}  精确率: {score.precision:.2f}")
+        print(f"  - 收盘价平均误差: {score.metrics['close']['mae']}")
+        
         # 3. 显示前5根图形元素
         if result.data_points:
             print(f"\n前5根图形元素数据:")
@@ -0,0 +1,73 @@
+﻿"""
+图片文件发现
+基于 os.scandir 的递归遍历，边遍历边返回路径：目录树很大时不需要等全部列出才开始识别，
+扩展名不区分大小写，每个文件只返回一次
+"""
+
+import os
+from fnmatch import fnmatch
+from typing import Iterable, Iterator, Optional, Sequence
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+
+def _matches(rel_path: str, name: str, patterns: Sequence[str]) -> bool:
+    """相对路径或文件名匹配任一通配符"""
+    return any(fnmatch(rel_path, p) or fnmatch(name, p) for p in patterns)
+
+
+def iter_images(root: str, extensions: Iterable[str] = IMAGE_EXTENSIONS,
+                recursive: bool = False, include: Optional[Sequence[str]] = None,
+                exclude: Optional[Sequence[str]] = None, sort: bool = False) -> Iterator[str]:
+    """
+    遍历目录中的图片
+
+    Args:
+        root: 根目录
+        extensions: 图片扩展名（不区分大小写）
+        recursive: 是否进入子目录（不跟随指向目录的符号链接，避免循环）
+        include: 通配符列表，文件的相对路径（/分隔）或文件名匹配其一才返回，None表示全部
+        exclude: 通配符列表，匹配的文件不返回、匹配的子目录不进入
+        sort: 每个目录内按名称排序（需要先读出整个目录）
+
+    Yields:
+        图片路径（root 与相对路径拼接）
+
+    Examples:
+        >>> for path in iter_images('screenshots', recursive=True, exclude=['debug_*']):
+        ...     recognizer.recognize(path)
+    """
+    exts = tuple(e.lower() for e in extensions)
+    include = list(include or [])
+    exclude = list(exclude or [])
+
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            it = os.scandir(os.path.join(root, rel_dir) if rel_dir else root)
+        except OSError:
+            continue
+        with it:
+            entries = sorted(it, key=lambda e: e.name) if sort else it
+            subdirs = []
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if recursive and not _matches(rel, entry.name, exclude):
+                        subdirs.append(rel)
+                    continue
+                if not entry.name.lower().endswith(exts):
+                    continue
+                if include and not _matches(rel, entry.name, include):
+                    continue
+                if exclude and _matches(rel, entry.name, exclude):
+                    continue
+                yield entry.path
+        # 倒序压栈，排序时子目录按名称顺序遍历
+        stack.extend(reversed(subdirs))
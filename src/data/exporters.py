@@ -0,0 +1,231 @@
+﻿"""
+流式结果输出
+每识别完一张图片就追加写入，不需要在内存中保留全部结果（用于目录监控等持续运行的场景）
+"""
+
+import csv
+import re
+from pathlib import Path
+from typing import Dict, List, Union
+
+from openpyxl import Workbook
+
+from chart_recognizer import RecognitionResult
+from config import OUTPUT_CONFIG, SQLITE_CONFIG
+from serialization import dumps_json
+from sqlite_store import SqliteStore
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+
+# Excel工作表名称的最大长度
+EXCEL_MAX_TITLE = 31
+
+# CSV列（与 batch_process 导出的 results.csv 相同）
+CSV_COLUMNS = ['image', 'symbol', 'date', 'open', 'high', 'low', 'close', 'volume', 'confidence']
+
+
+def result_rows(result: RecognitionResult) -> List[dict]:
+    """把识别结果展平为每根图形元素一行"""
+    return [{
+        'image': result.image_name,
+        'symbol': result.symbol,
+        'date': dp.date,
+        'open': dp.open,
+        'high': dp.high,
+        'low': dp.low,
+        'close': dp.close,
+        'volume': dp.volume,
+        'confidence': result.confidence
+    } for dp in result.data_points]
+
+
+class ResultSink:
+    """流式输出基类：write() 追加一条识别结果"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+
+    def write(self, result: RecognitionResult):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonLinesSink(ResultSink):
+    """JSON Lines：每行一个 RecognitionResult.to_dict()"""
+
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(path)
+        self._file = open(self.path, 'ab')
+
+    def write(self, result: RecognitionResult):
+        self._file.write(dumps_json(result.to_dict()) + b'\n')
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink(ResultSink):
+    """CSV：每根图形元素一行，文件为空时才写表头"""
+
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(path)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        # 追加到已有文件时 utf-8-sig 不会重复写入BOM
+        self._file = open(self.path, 'a', encoding='utf-8-sig', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_COLUMNS)
+        if new_file:
+            self._writer.writeheader()
+
+    def write(self, result: RecognitionResult):
+        self._writer.writerows(result_rows(result))
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ExcelSink(ResultSink):
+    """
+    Excel：逐行写入，内存占用与结果数量无关
+    （安装了 xlsxwriter 时使用 constant_memory 模式，否则使用 openpyxl 的 write_only 模式）
+
+    xlsx 文件在 close() 时才完整，不支持追加到已有文件。
+    工作表写满 max_rows 行（含表头）后自动换到下一个工作表（chart、chart_2、...）。
+    """
+
+    def __init__(self, path: Union[str, Path], sheet_per_symbol: bool = None,
+                 max_rows: int = None, sheet_name: str = None):
+        """
+        Args:
+            path: xlsx 文件
+            sheet_per_symbol: 每个股票代码一个工作表
+            max_rows: 每个工作表的最大行数（Excel上限 1048576）
+            sheet_name: 不按股票代码分表时的工作表名称
+        """
+        super().__init__(path)
+        cfg = OUTPUT_CONFIG
+        self.sheet_per_symbol = cfg['excel_sheet_per_symbol'] if sheet_per_symbol is None else sheet_per_symbol
+        self.max_rows = max_rows or cfg['excel_max_rows']
+        self.sheet_name = sheet_name or cfg['excel_sheet_name']
+        self.engine = 'xlsxwriter' if XLSXWRITER_AVAILABLE else 'openpyxl'
+        if XLSXWRITER_AVAILABLE:
+            self._book = xlsxwriter.Workbook(str(self.path), {'constant_memory': True})
+        else:
+            self._book = Workbook(write_only=True)
+        # 分组（股票代码或固定名称）-> [当前工作表, 已写行数, 工作表序号]
+        self._sheets: Dict[str, list] = {}
+        self._names = set()
+
+    def _sheet_title(self, group: str, part: int) -> str:
+        # 工作表名称最长31个字符（含序号后缀），不能包含 []:*?/\
+        suffix = '' if part == 1 else f"_{part}"
+        title = (re.sub(r'[\[\]:*?/\\]', '_', group) or '_')[:EXCEL_MAX_TITLE - len(suffix)] + suffix
+        # 重名（如前31个字符相同）时依次替换最后一个字符，长度不变
+        for ch in '_0123456789abcdefghijklmnopqrstuvwxyz':
+            if title.lower() not in self._names:
+                break
+            title = title[:-1] + ch
+        if title.lower() in self._names:
+            raise ValueError(f"无法为 {group} 生成不重复的工作表名称")
+        self._names.add(title.lower())
+        return title
+
+    def _new_sheet(self, group: str, part: int) -> list:
+        title = self._sheet_title(group, part)
+        if XLSXWRITER_AVAILABLE:
+            sheet = self._book.add_worksheet(title)
+            sheet.write_row(0, 0, CSV_COLUMNS)
+        else:
+            sheet = self._book.create_sheet(title)
+            sheet.append(CSV_COLUMNS)
+        return [sheet, 1, part]
+
+    def _append(self, group: str, row: tuple):
+        state = self._sheets.get(group)
+        if state is None:
+            state = self._sheets[group] = self._new_sheet(group, 1)
+        elif state[1] >= self.max_rows:
+            state = self._sheets[group] = self._new_sheet(group, state[2] + 1)
+        sheet, n, _ = state
+        if XLSXWRITER_AVAILABLE:
+            sheet.write_row(n, 0, row)
+        else:
+            sheet.append(row)
+        state[1] = n + 1
+
+    def write(self, result: RecognitionResult):
+        group = (result.symbol or '未识别') if self.sheet_per_symbol else self.sheet_name
+        for dp in result.data_points:
+            self._append(group, (result.image_name, result.symbol, dp.date, dp.open, dp.high,
+                                 dp.low, dp.close, dp.volume, result.confidence))
+        self.count += 1
+
+    def close(self):
+        if self._book is None:
+            return
+        if not self._sheets:
+            # 没有结果时也生成只有表头的工作表
+            self._new_sheet(self.sheet_name, 1)
+        if XLSXWRITER_AVAILABLE:
+            self._book.close()
+        else:
+            self._book.save(str(self.path))
+        self._book = None
+
+
+# 输出格式 -> (文件名, 输出类)
+SINKS = {
+    'json': ('results.jsonl', JsonLinesSink),
+    'jsonl': ('results.jsonl', JsonLinesSink),
+    'csv': ('results.csv', CsvSink),
+    'sqlite': (SQLITE_CONFIG['filename'], SqliteStore),
+}
+
+
+def open_sinks(output_dir: Union[str, Path], formats: List[str]) -> List[ResultSink]:
+    """
+    按输出格式创建流式输出（追加到 output_dir 中已有的文件）
+
+    Args:
+        output_dir: 输出文件夹
+        formats: 输出格式列表，不支持流式写入的格式会被跳过
+
+    Returns:
+        流式输出列表
+    """
+    sinks, opened = [], set()
+    for fmt in formats:
+        if fmt not in SINKS:
+            print(f"⚠️  {fmt} 格式不支持流式输出，已跳过")
+            continue
+        filename, sink_cls = SINKS[fmt]
+        if filename in opened:      # json 和 jsonl 都写入 results.jsonl
+            continue
+        opened.add(filename)
+        sinks.append(sink_cls(Path(output_dir) / filename))
+    return sinks
@@ -0,0 +1,190 @@
+﻿"""
+图片读取与解码
+- 文件通过内存映射（或一次性读取）交给 cv2.imdecode，不经过 cv2.imread
+  （同时支持 Windows 下的中文路径）
+- 降采样模式使用 cv2.IMREAD_REDUCED_COLOR_2/4/8 在解码时直接缩小（JPEG 解码本身就更快）
+- PrefetchReader 在后台线程中预先读取并解码下一张图片，与当前图片的识别重叠进行
+- 需要时顺便计算已读入内容的指纹（content_hash），不再为此重新读取文件
+"""
+
+import hashlib
+import mmap
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import IMAGE_IO_CONFIG
+
+
+# 解码时缩小的倍数 -> imdecode 标志
+REDUCE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def reduce_flags(reduce: int) -> int:
+    """缩小倍数对应的 imdecode 标志（不支持的倍数抛出 ValueError）"""
+    if reduce not in REDUCE_FLAGS:
+        raise ValueError(f"不支持的缩小倍数: {reduce}，可选: {', '.join(map(str, REDUCE_FLAGS))}")
+    return REDUCE_FLAGS[reduce]
+
+
+def content_hash(data) -> str:
+    """图片文件内容的指纹（blake2b，32位十六进制），data 为 bytes / memoryview / mmap"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def decode_bytes(data, reduce: int = 1) -> Optional[np.ndarray]:
+    """
+    解码内存中的图片
+
+    Args:
+        data: 图片文件内容（bytes / memoryview / mmap）
+        reduce: 解码时缩小的倍数（1/2/4/8）
+
+    Returns:
+        BGR数组，无法解码时为None
+    """
+    flags = reduce_flags(reduce)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if buf.size == 0:
+        return None
+    return cv2.imdecode(buf, flags)
+
+
+def read_image(path, reduce: int = 1, use_mmap: bool = None,
+               digest: Optional[list] = None) -> Optional[np.ndarray]:
+    """
+    读取并解码图片文件
+
+    Args:
+        path: 图片路径
+        reduce: 解码时缩小的倍数（1/2/4/8）
+        use_mmap: 是否使用内存映射，None表示使用 IMAGE_IO_CONFIG['use_mmap']
+                  （网络存储上一次性读取可能更快）
+        digest: 传入列表时，把文件内容的指纹（content_hash）追加到其中（读取失败时不追加）
+
+    Returns:
+        BGR数组，文件不存在或无法解码时为None
+    """
+    flags = reduce_flags(reduce)
+    use_mmap = IMAGE_IO_CONFIG['use_mmap'] if use_mmap is None else use_mmap
+    try:
+        with open(path, 'rb') as f:
+            if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+                data = f.read()
+                if digest is not None:
+                    digest.append(content_hash(data))
+                return decode_bytes(data, reduce)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if digest is not None:
+                    digest.append(content_hash(mapped))
+                buf = np.frombuffer(mapped, dtype=np.uint8)
+                try:
+                    return cv2.imdecode(buf, flags)
+                finally:
+                    del buf     # 关闭映射前释放对映射内存的引用
+    except (OSError, ValueError):
+        return None
+
+
+def load(item, reduce: int = 1, with_hash: bool = False) -> Tuple[str, Optional[np.ndarray], int, Optional[str]]:
+    """
+    读取 ChartRecognizer.iter_recognize 的一项输入
+
+    Args:
+        item: 图片路径 / 图片bytes / 数组 / PIL图像，或 (其中之一, 名称)
+        with_hash: 是否计算文件/bytes内容的指纹
+
+    Returns:
+        (图片名称, 图片, 实际缩小倍数, 内容指纹)；数组和PIL图像原样返回，缩小倍数为1；
+        没有要求、无法读取或输入不是编码后的图片时指纹为None
+    """
+    source, name = item if isinstance(item, tuple) else (item, None)
+    if isinstance(source, (str, Path)):
+        digest = [] if with_hash else None
+        img = read_image(source, reduce, digest=digest)
+        return name or Path(source).name, img, reduce, digest[0] if digest else None
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        image_hash = content_hash(source) if with_hash else None
+        return name or 'bytes', decode_bytes(source, reduce), reduce, image_hash
+    return name or 'array', source, 1, None
+
+
+class PrefetchReader:
+    """
+    预读取迭代器：后台线程按顺序读取并解码，最多领先 depth 张
+
+    Examples:
+        >>> with PrefetchReader(paths) as reader:
+        ...     for name, img, reduce, image_hash in reader:
+        ...         recognizer.recognize_array(img, name)
+    """
+
+    _END = object()
+
+    def __init__(self, items: Iterable, reduce: int = 1, depth: int = None,
+                 with_hash: bool = False):
+        """
+        Args:
+            items: 图片路径或 (路径, 名称) 等（见 load()），可以是边遍历边产生的迭代器
+            reduce: 解码时缩小的倍数
+            depth: 最多预先解码多少张
+            with_hash: 是否计算内容指纹
+        """
+        reduce_flags(reduce)
+        self.reduce = reduce
+        self.with_hash = with_hash
+        self._queue: queue.Queue = queue.Queue(maxsize=depth or IMAGE_IO_CONFIG['prefetch_depth'])
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(iter(items),),
+                                        name='image-prefetch', daemon=True)
+        self._thread.start()
+
+    def _put(self, value) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, items: Iterator):
+        try:
+            for item in items:
+                if not self._put(load(item, self.reduce, self.with_hash)):
+                    return
+        except Exception as e:
+            # 遍历输入出错时交给消费者线程抛出
+            self._put(e)
+            return
+        self._put(self._END)
+
+    def __iter__(self) -> Iterator[Tuple[str, Optional[np.ndarray], int, Optional[str]]]:
+        while True:
+            value = self._queue.get()
+            if value is self._END:
+                return
+            if isinstance(value, Exception):
+                raise value
+            yield value
+
+    def close(self):
+        """停止预读取线程"""
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
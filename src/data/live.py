@@ -0,0 +1,343 @@
+﻿"""
+实时截图识别工具
+按目标帧率截取屏幕区域，跳过内容未变化的帧，在后台线程中识别，
+只输出新增或更新的图形元素
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from chart_recognizer import ChartRecognizer, DataPoint, RecognitionResult, _to_bgr
+from config import LIVE_CONFIG
+from profiles import load_profiles
+
+
+def frame_changed(previous: Optional[np.ndarray], current: np.ndarray,
+                  sample_step: int = None, pixel_threshold: int = None,
+                  min_changed_pixels: int = None) -> bool:
+    """
+    判断两帧内容是否发生变化（隔行隔列采样比较）
+
+    Args:
+        previous: 上一帧（None表示第一帧）
+        current: 当前帧
+        sample_step: 采样步长
+        pixel_threshold: 单个像素差异阈值
+        min_changed_pixels: 至少多少个采样像素变化才认为帧变化
+
+    Returns:
+        是否变化
+    """
+    if previous is None or previous.shape != current.shape:
+        return True
+
+    step = sample_step or LIVE_CONFIG['sample_step']
+    threshold = pixel_threshold if pixel_threshold is not None else LIVE_CONFIG['pixel_threshold']
+    min_changed = min_changed_pixels or LIVE_CONFIG['min_changed_pixels']
+
+    a = previous[::step, ::step].astype(np.int16)
+    b = current[::step, ::step].astype(np.int16)
+    changed = np.abs(a - b).max(axis=-1) > threshold if a.ndim == 3 else np.abs(a - b) > threshold
+
+    return int(np.count_nonzero(changed)) >= min_changed
+
+
+def _bar_key(bar: DataPoint):
+    return (bar.open, bar.high, bar.low, bar.close)
+
+
+def diff_bars(previous: List[DataPoint], current: List[DataPoint]) -> List[DataPoint]:
+    """
+    找出相对上一次识别结果新增或更新的图形元素
+
+    图表向左滚动时，上一次结果的后缀应与本次结果的前缀一致（最后一根可能仍在变化），
+    因此寻找最小的滚动偏移使两者对齐，对齐之后的图形元素即为新增/更新部分。
+
+    Returns:
+        新增或更新的图形元素（按时间顺序）
+    """
+    if not previous:
+        return list(current)
+
+    prev_keys = [_bar_key(b) for b in previous]
+    curr_keys = [_bar_key(b) for b in current]
+
+    # 至少重叠两根才认为对齐可靠（上一次只有一根时除外）
+    for shift in range(max(len(prev_keys) - 1, 1)):
+        overlap = len(prev_keys) - shift
+        if overlap > len(curr_keys):
+            continue
+        # 重叠部分除最后一根外必须完全一致
+        if prev_keys[shift:-1] != curr_keys[:overlap - 1]:
+            continue
+        if prev_keys[-1] == curr_keys[overlap - 1]:
+            return current[overlap:]
+        return current[overlap - 1:]
+
+    return list(current)
+
+
+class LiveRecognizer:
+    """实时截图识别器"""
+
+    def __init__(self, recognizer: ChartRecognizer, capture: Callable,
+                 fps: float = None, on_update: Optional[Callable] = None,
+                 name_prefix: str = 'live', incremental: bool = True,
+                 detect_changes: bool = True):
+        """
+        初始化实时识别器
+
+        Args:
+            recognizer: 图形识别器
+            capture: 截图函数，返回 PIL.Image 或 BGR np.ndarray；
+                     返回None表示内容没有变化（例如使用 CaptureSession.poll）
+            fps: 目标截图帧率
+            on_update: 回调 on_update(result, changed_bars)，只在有新增/更新图形元素时调用
+            name_prefix: 结果中图片名称的前缀
+            incremental: 是否使用增量识别（只重新检测与上一帧相比变化的列）
+            detect_changes: 是否用 frame_changed 跳过未变化的帧；
+                            capture 自己做变化检测（CaptureSession.poll）时设为False，避免每帧比较两次
+        """
+        self.recognizer = recognizer
+        self.capture = capture
+        self.fps = fps or LIVE_CONFIG['fps']
+        self.on_update = on_update
+        self.name_prefix = name_prefix
+        self.incremental = incremental
+        self.detect_changes = detect_changes
+
+        # 只保留最新的一帧：识别跟不上时丢弃旧帧
+        self._frames = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._previous_frame = None
+        self._last_bars: List[DataPoint] = []
+        self._state = None  # 增量识别状态
+
+        self.stats = {
+            'captured': 0,
+            'unchanged': 0,
+            'dropped': 0,
+            'recognized': 0,
+            'updates': 0,
+        }
+
+    def start(self):
+        """启动截图线程和识别线程"""
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name='live-capture', daemon=True),
+            threading.Thread(target=self._recognize_loop, name='live-recognize', daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 5.0):
+        """停止并等待线程退出"""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def run(self, duration: Optional[float] = None):
+        """阻塞运行，直到 duration 秒后或 Ctrl+C"""
+        self.start()
+        try:
+            deadline = time.monotonic() + duration if duration else None
+            while not self._stop.is_set():
+                if deadline and time.monotonic() >= deadline:
+                    break
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _capture_loop(self):
+        interval = 1.0 / self.fps
+        next_tick = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                captured = self.capture()
+            except Exception as e:
+                print(f"⚠️  截图失败: {e}")
+            else:
+                self.stats['captured'] += 1
+                frame = _to_bgr(captured) if captured is not None else None
+                if frame is not None and (not self.detect_changes
+                                          or frame_changed(self._previous_frame, frame)):
+                    self._previous_frame = frame
+                    self._submit(frame)
+                else:
+                    self.stats['unchanged'] += 1
+
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def _submit(self, frame: np.ndarray):
+        item = (datetime.now(), frame)
+        try:
+            self._frames.put_nowait(item)
+        except queue.Full:
+            try:
+                self._frames.get_nowait()
+                self.stats['dropped'] += 1
+            except queue.Empty:
+                pass
+            self._frames.put_nowait(item)
+
+    def _recognize_loop(self):
+        while not self._stop.is_set():
+            try:
+                captured_at, frame = self._frames.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            name = f"{self.name_prefix}_{captured_at.strftime('%Y%m%d_%H%M%S_%f')}"
+            if self.incremental:
+                result, self._state = self.recognizer.recognize_incremental(frame, self._state, name)
+            else:
+                result = self.recognizer.recognize_array(frame, name)
+            self.stats['recognized'] += 1
+
+            if result.error or not result.data_points:
+                continue
+
+            changed = diff_bars(self._last_bars, result.data_points)
+            self._last_bars = result.data_points
+            if changed:
+                self.stats['updates'] += 1
+                if self.on_update:
+                    self.on_update(result, changed)
+
+
+def _json_lines_writer(output: Optional[str]) -> Callable:
+    """生成把更新写成JSON Lines的回调"""
+    stream = open(output, 'a', encoding='utf-8') if output else sys.stdout
+
+    def write(result: RecognitionResult, bars: List[DataPoint]):
+        record = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'image_name': result.image_name,
+            'symbol': result.symbol,
+            'confidence': result.confidence,
+            'data_points': [b.to_dict() for b in bars]
+        }
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        stream.flush()
+
+    return write
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='实时截图识别 - 持续截取图表区域并输出新增/更新的图形元素',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  # 每秒截取一次屏幕区域 (100, 100, 1200, 800)
+  python live.py --region 100 100 1200 800
+
+  # 截取第二个显示器，每2秒一次，结果追加到文件
+  python live.py --monitor 1 --fps 0.5 -o live.jsonl
+
+  # 运行60秒后退出
+  python live.py --region 0 0 1920 1080 --duration 60
+
+  # 使用 profiles.json 中名为 main 的截图配置（已标定时只截取图表主体）
+  python live.py --profile main --profiles profiles.json
+
+  # 回放截图目录（无显示环境下测试）
+  python live.py --replay screenshots/ --fps 5 --duration 10
+        """
+    )
+
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--region', nargs=4, type=int, metavar=('X', 'Y', 'W', 'H'),
+                        help='截图区域')
+    target.add_argument('--monitor', type=int, default=0,
+                        help='截取整个显示器（显示器索引，默认: 0）')
+    target.add_argument('--profile',
+                        help='使用截图配置（区域、布局、价格标定）')
+    parser.add_argument('--profiles', default='profiles.json',
+                        help='截图配置文件（默认: profiles.json）')
+    parser.add_argument('--replay',
+                        help='回放该目录中的图片代替屏幕截图（用于测试）')
+    parser.add_argument('--fps', type=float, default=LIVE_CONFIG['fps'],
+                        help=f"目标截图帧率（默认: {LIVE_CONFIG['fps']}）")
+    parser.add_argument('-o', '--output',
+                        help='输出JSON Lines文件（默认: 标准输出）')
+    parser.add_argument('--duration', type=float,
+                        help='运行时长（秒），默认一直运行直到 Ctrl+C')
+    parser.add_argument('--no-incremental', action='store_true',
+                        help='每帧都完整识别（默认只重新检测变化的列）')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='根据图形元素间距自动降采样（适合高分辨率截图）')
+    parser.add_argument('--gpu', action='store_true',
+                        help='使用GPU加速')
+    parser.add_argument('--debug', action='store_true',
+                        help='开启调试模式')
+
+    args = parser.parse_args()
+    
+    profile = None
+    if args.profile:
+        profiles = load_profiles(args.profiles)
+        if args.profile not in profiles:
+            parser.error(f"截图配置 {args.profile} 不存在，可选: {', '.join(profiles)}")
+        profile = profiles[args.profile]
+        # 已标定时不需要坐标轴，只截取图表主体区域
+        if profile.calibration:
+            profile = profile.plot_only()
+        args.region = list(profile.region)
+
+    # Screenshot 包位于 src/Screenshot
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    from Screenshot import CaptureBackend, CaptureSession, ReplaySource
+
+    backend = CaptureBackend(ReplaySource.from_directory(args.replay) if args.replay else None)
+
+    def grab():
+        backend.tick()
+        return backend.region(*args.region) if args.region else backend.monitor(args.monitor)
+
+    # 截图会话负责跳过未变化的帧，返回PIL图像直接交给识别器
+    session = CaptureSession(grab=grab, pixel_threshold=LIVE_CONFIG['pixel_threshold'])
+
+    def capture():
+        change = session.poll()
+        return change.image if change else None
+
+    print("正在初始化图形元素图识别器...", file=sys.stderr)
+    options = dict(use_gpu=args.gpu, debug=args.debug, adaptive_resolution=args.adaptive)
+    recognizer = profile.create_recognizer(**options) if profile else ChartRecognizer(**options)
+
+    live = LiveRecognizer(recognizer, capture, fps=args.fps,
+                          on_update=_json_lines_writer(args.output),
+                          incremental=not args.no_incremental, detect_changes=False)
+
+    print(f"开始实时识别（{args.fps} 帧/秒），按 Ctrl+C 停止", file=sys.stderr)
+    live.run(args.duration)
+
+    s = live.stats
+    print(f"\n截图 {s['captured']} 帧，未变化 {s['unchanged']} 帧，丢弃 {s['dropped']} 帧，"
+          f"识别 {s['recognized']} 帧，输出更新 {s['updates']} 次", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
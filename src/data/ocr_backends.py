@@ -0,0 +1,297 @@
+﻿"""
+可插拔OCR后端
+坐标轴刻度只包含数字、小数点、横线和少量日期字符，用内置的模板匹配数字识别器即可，
+不需要每张图片都运行完整的中文PaddleOCR；识别不了的区域（标题、股票名称）再交给PaddleOCR
+
+所有后端的 ocr(img) 返回格式与 PaddleOCR 相同：
+    [[ [bbox, (text, confidence)], ... ]]，没有识别到文字时为 [None]
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from config import OCR_BACKEND_CONFIG, OCR_CONFIG
+
+
+class OCRBackend:
+    """OCR后端基类"""
+
+    name = 'base'
+    thread_safe = False     # 是否可以在多个线程中同时调用
+    full_image = True       # 是否可以识别整张图表（否则只对坐标轴区域调用）
+
+    def ocr(self, img: np.ndarray, cls: bool = True) -> List:
+        """
+        识别图片中的文字
+
+        Args:
+            img: BGR图片
+            cls: 是否做方向分类（不支持的后端忽略）
+
+        Returns:
+            [[ [bbox, (text, confidence)], ... ]]，bbox 为四个角点 [[x, y], ...]
+        """
+        raise NotImplementedError
+
+
+class PaddleOCRBackend(OCRBackend):
+    """PaddleOCR 后端（需要安装 paddleocr）"""
+
+    name = 'paddle'
+
+    def __init__(self, **kwargs):
+        from paddleocr import PaddleOCR
+        options = {
+            'use_angle_cls': OCR_CONFIG['use_angle_cls'],
+            'lang': OCR_CONFIG['lang'],
+            'show_log': OCR_CONFIG['show_log'],
+            **kwargs
+        }
+        self.engine = PaddleOCR(**options)
+
+    def ocr(self, img: np.ndarray, cls: bool = True) -> List:
+        return self.engine.ocr(img, cls=cls)
+
+
+def _box(x0: int, y0: int, x1: int, y1: int) -> List[List[int]]:
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """一维布尔数组中连续为True的区间 [start, end)"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+class DigitTemplateOCR(OCRBackend):
+    """
+    模板匹配数字识别器
+
+    模板由 OpenCV 内置字体渲染（不需要训练数据和额外依赖），支持 0-9 . - : /。
+    流程：提取文字像素 -> 去除长直线（网格线、影线）-> 按行投影切分文字行 ->
+    按列间隔切分单词和字符 -> 小数点/横线/冒号按几何形状判断，数字和斜线与模板比较。
+    """
+
+    name = 'digits'
+    thread_safe = True
+    full_image = False      # K线和成交量柱会干扰字符切分
+    CHARS = '0123456789/'
+
+    def __init__(self, fonts: Optional[Sequence[int]] = None):
+        cfg = OCR_BACKEND_CONFIG
+        self.glyph_w, self.glyph_h = cfg['glyph_size']
+        self.labels, self.templates, self.aspects = self._render_templates(fonts or cfg['template_fonts'])
+
+    def _normalize(self, glyph: np.ndarray) -> np.ndarray:
+        """字符图缩放到统一尺寸并归一化（零均值、单位长度）"""
+        vec = cv2.resize(glyph.astype(np.float32), (self.glyph_w, self.glyph_h),
+                         interpolation=cv2.INTER_AREA).ravel()
+        vec -= vec.mean()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _render_templates(self, fonts: Sequence[int]):
+        labels, templates, aspects = [], [], []
+        for font in fonts:
+            for scale in (0.5, 0.8, 1.2, 2.0):
+                for thickness in (1, 2):
+                    for ch in self.CHARS:
+                        canvas = np.zeros((80, 80), dtype=np.uint8)
+                        cv2.putText(canvas, ch, (10, 60), font, scale, 255, thickness)
+                        ys, xs = np.nonzero(canvas)
+                        if len(ys) == 0:
+                            continue
+                        glyph = canvas[ys.min():ys.max() + 1, xs.min():xs.max() + 1] > 0
+                        labels.append(ch)
+                        templates.append(self._normalize(glyph))
+                        aspects.append(glyph.shape[1] / glyph.shape[0])
+        return labels, np.array(templates), np.array(aspects)
+
+    def _ink_mask(self, img: np.ndarray) -> np.ndarray:
+        """文字像素：与背景亮度差异明显且颜色不饱和（排除彩色实体）"""
+        cfg = OCR_BACKEND_CONFIG
+        if img.ndim == 3:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            saturation = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)[..., 1]
+        else:
+            gray = img
+            saturation = np.zeros_like(img)
+
+        background = np.median(gray)
+        ink = (np.abs(gray.astype(np.int16) - background) > cfg['ink_contrast']) & (saturation < cfg['max_saturation'])
+        ink = ink.astype(np.uint8)
+
+        # 去除比字符长得多的直线（网格线、影线、实体边框）
+        length = cfg['max_glyph_height']
+        lines = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, length)))
+        lines |= cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (length, 1)))
+        return (ink & (1 - lines)).astype(bool)
+
+    def _classify(self, glyph: np.ndarray, top: int, line_h: int) -> Tuple[Optional[str], float, bool]:
+        """
+        识别单个字符
+
+        Args:
+            glyph: 字符所在列的像素（行范围为整个文字行）
+            top: 字符顶部相对文字行顶部的偏移
+            line_h: 文字行高度
+
+        Returns:
+            (字符, 分数, 是否为数字类字符)；无法识别时字符为None
+        """
+        h, w = glyph.shape
+        parts = _runs(glyph.any(axis=1))
+
+        # 冒号：上下两个小点
+        if len(parts) == 2 and all(e - s <= 0.35 * line_h for s, e in parts):
+            return ':', 1.0, False
+
+        if h <= 0.35 * line_h:
+            center = top + h / 2
+            if w <= 0.5 * line_h and top + h >= 0.7 * line_h:
+                return '.', 1.0, False
+            if w >= 1.2 * h and 0.25 * line_h <= center <= 0.75 * line_h:
+                return '-', 1.0, False
+            return None, 0.0, False
+
+        scores = self.templates @ self._normalize(glyph)
+        aspect = w / h
+        scores -= OCR_BACKEND_CONFIG['aspect_penalty'] * np.abs(np.log(aspect / self.aspects))
+        best = int(np.argmax(scores))
+        return self.labels[best], float(max(scores[best], 0.0)), True
+
+    def _text_mask(self, ink: np.ndarray) -> np.ndarray:
+        """
+        只保留像字符的连通域：高度接近字符高度中位数的主体字符，
+        以及与主体字符同一行的小连通域（小数点、横线、冒号）；
+        影线、成交量柱等尺寸明显不同的图形被排除
+        """
+        cfg = OCR_BACKEND_CONFIG
+        n, labels, stats, _ = cv2.connectedComponentsWithStats(ink.astype(np.uint8), connectivity=8)
+        if n <= 1:
+            return np.zeros_like(ink)
+
+        w, h = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT]
+        candidate = (h >= cfg['min_glyph_height']) & (h <= cfg['max_glyph_height']) & (w <= 1.5 * h)
+        if not candidate.any():
+            return np.zeros_like(ink)
+
+        typical = np.median(h[candidate])
+        main = candidate & (h >= 0.6 * typical) & (h <= 1.4 * typical)
+
+        # 主体字符所在的行
+        rows = np.zeros(ink.shape[0], dtype=bool)
+        top = stats[1:, cv2.CC_STAT_TOP]
+        for t, hh in zip(top[main], h[main]):
+            rows[t:t + hh] = True
+
+        small = ~main & (h < 0.6 * typical) & (w < 1.5 * typical)
+        small &= np.array([rows[t:t + hh].all() for t, hh in zip(top, h)])
+
+        keep = np.concatenate(([False], main | small))
+        return keep[labels]
+
+    def ocr(self, img: np.ndarray, cls: bool = True) -> List:
+        cfg = OCR_BACKEND_CONFIG
+        ink = self._text_mask(self._ink_mask(img))
+        lines = []
+
+        for y0, y1 in _runs(ink.any(axis=1)):
+            line_h = y1 - y0
+            if line_h < cfg['min_glyph_height']:
+                continue
+            row = ink[y0:y1]
+
+            # 按列间隔切分字符，间隔较大时切分单词
+            columns = _runs(row.any(axis=0))
+            words, current = [], []
+            for x0, x1 in columns:
+                if current and x0 - current[-1][1] > cfg['word_gap'] * line_h:
+                    words.append(current)
+                    current = []
+                current.append((x0, x1))
+            if current:
+                words.append(current)
+
+            for word in words:
+                text, scores = '', []
+                for x0, x1 in word:
+                    rows = np.flatnonzero(row[:, x0:x1].any(axis=1))
+                    glyph = row[rows[0]:rows[-1] + 1, x0:x1]
+                    ch, score, is_digit = self._classify(glyph, int(rows[0]), line_h)
+                    if ch is None:
+                        text = None
+                        break
+                    text += ch
+                    if is_digit:
+                        scores.append(score)
+
+                # 至少包含一个数字、且每个数字都与模板足够接近才认为是刻度文字
+                if not text or not scores or min(scores) < cfg['min_glyph_score']:
+                    continue
+                box = _box(int(word[0][0]), int(y0), int(word[-1][1]), int(y1))
+                lines.append([box, (text, round(float(np.mean(scores)), 4))])
+
+        return [lines] if lines else [None]
+
+
+class FallbackOCR(OCRBackend):
+    """
+    后端回退链：依次尝试各个后端，采用第一个给出足够可信结果的后端
+
+    例如 FallbackOCR([DigitTemplateOCR(), PaddleOCRBackend()])：
+    刻度区域由数字识别器完成，标题等包含其他文字的区域交给PaddleOCR。
+    """
+
+    name = 'fallback'
+
+    def __init__(self, backends: Sequence[OCRBackend], min_confidence: float = None):
+        """
+        Args:
+            backends: 按顺序尝试的后端
+            min_confidence: 文字行分数低于该值视为不可信，默认 OCR_BACKEND_CONFIG['min_confidence']
+        """
+        if not backends:
+            raise ValueError("至少需要一个OCR后端")
+        self.backends = list(backends)
+        self.min_confidence = (OCR_BACKEND_CONFIG['min_confidence']
+                               if min_confidence is None else min_confidence)
+        self.thread_safe = all(getattr(b, 'thread_safe', False) for b in self.backends)
+        self.full_image = all(getattr(b, 'full_image', True) for b in self.backends)
+
+    def ocr(self, img: np.ndarray, cls: bool = True) -> List:
+        for backend in self.backends[:-1]:
+            result = backend.ocr(img, cls=cls)
+            lines = [line for line in (result[0] or []) if line[1][1] >= self.min_confidence] if result else []
+            if lines:
+                return [lines]
+        return self.backends[-1].ocr(img, cls=cls)
+
+
+def create_backend(name: str = 'auto') -> OCRBackend:
+    """
+    按名称创建OCR后端
+
+    Args:
+        name: 'paddle' / 'digits' / 'auto'（数字识别器优先，安装了paddleocr时回退到PaddleOCR）
+    """
+    if name == 'paddle':
+        return PaddleOCRBackend()
+    if name == 'digits':
+        return DigitTemplateOCR()
+    if name == 'auto':
+        try:
+            return FallbackOCR([DigitTemplateOCR(), PaddleOCRBackend()])
+        except ImportError:
+            return DigitTemplateOCR()
+    raise ValueError(f"不支持的OCR后端: {name}")
+
+
+if __name__ == '__main__':
+    print("OCR后端模块已加载")
+    print("可用后端:")
+    print("  - DigitTemplateOCR: 模板匹配数字识别（无额外依赖）")
+    print("  - PaddleOCRBackend: PaddleOCR")
+    print("  - FallbackOCR: 回退链")
@@ -0,0 +1,222 @@
+﻿"""
+共享OCR服务
+持有 N 个OCR模型实例，把多个线程并发提交的文字区域合并成小批次识别：
+同一批的图片上下拼接成一张画布，只调用一次OCR，再按y偏移把结果拆回各个请求
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import OCR_CONFIG, OCR_SERVICE_CONFIG
+
+
+def _default_engine():
+    """默认引擎：PaddleOCR"""
+    from paddleocr import PaddleOCR
+    return PaddleOCR(use_angle_cls=OCR_CONFIG['use_angle_cls'], lang=OCR_CONFIG['lang'],
+                     show_log=OCR_CONFIG['show_log'])
+
+
+class OCRService:
+    """
+    OCR服务（可在多个 ChartRecognizer、多个线程之间共享）
+
+    接口与 PaddleOCR 相同：ocr(img) 返回 [[ [bbox, (text, confidence)], ... ]]，
+    因此可以直接作为 ChartRecognizer(ocr_service=...) 使用。
+    engine_factory 也可以返回 ocr_backends 中的任意后端。
+
+    Examples:
+        >>> service = OCRService(num_engines=2)
+        >>> recognizers = [ChartRecognizer(ocr_service=service) for _ in range(8)]
+        >>> ...
+        >>> service.close()
+    """
+
+    thread_safe = True
+    full_image = True       # 由模型实例决定（见 __init__），识别器据此决定是否只提交坐标轴区域
+
+    def __init__(self, num_engines: int = None, max_batch: int = None, max_wait_ms: float = None,
+                 engine_factory: Optional[Callable] = None):
+        """
+        初始化OCR服务
+
+        Args:
+            num_engines: 模型实例数（每个实例一个工作线程）
+            max_batch: 每批最多合并的请求数
+            max_wait_ms: 收到第一个请求后最多等待多少毫秒凑批
+            engine_factory: 创建模型实例的函数，返回带 ocr(img, cls=True) 方法的对象，默认PaddleOCR
+        """
+        cfg = OCR_SERVICE_CONFIG
+        self.num_engines = num_engines or cfg['num_engines']
+        self.max_batch = max_batch or cfg['max_batch']
+        self.max_wait = (cfg['max_wait_ms'] if max_wait_ms is None else max_wait_ms) / 1000.0
+        self.engine_factory = engine_factory or _default_engine
+
+        self._requests: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {'requests': 0, 'batches': 0, 'ocr_calls': 0}
+
+        # 在主线程中创建模型，初始化失败时直接抛出
+        engines = [self.engine_factory() for _ in range(self.num_engines)]
+        # 只能识别坐标轴区域的后端（如数字识别器）不能收到整张图表
+        self.full_image = all(getattr(e, 'full_image', True) for e in engines)
+        self._workers = [
+            threading.Thread(target=self._worker, args=(engine,), name=f'ocr-engine-{i}', daemon=True)
+            for i, engine in enumerate(engines)
+        ]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, img: np.ndarray) -> Future:
+        """
+        提交一张图片（通常是坐标轴区域），返回 Future，结果格式同 ocr()
+        """
+        if self._closed:
+            raise RuntimeError("OCR服务已关闭")
+        future = Future()
+        self._requests.put((img, future))
+        self._count('requests')
+        return future
+
+    def ocr(self, img: np.ndarray, cls: bool = True) -> List:
+        """阻塞识别一张图片（与 PaddleOCR.ocr 相同的调用方式和返回格式）"""
+        return self.submit(img).result()
+
+    def close(self):
+        """处理完已提交的请求后停止工作线程"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._requests.put(None)
+        for t in self._workers:
+            t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _next_batch(self) -> Tuple[List, bool]:
+        """
+        取下一批请求：阻塞等待第一个，再在截止时间前尽量凑满 max_batch
+
+        Returns:
+            (请求列表, 是否收到停止信号)
+        """
+        first = self._requests.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # 先处理完这一批再退出
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _worker(self, engine):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            # 已被取消的请求不再识别
+            batch = [(img, f) for img, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self._count('batches')
+            try:
+                for group in self._pack(batch):
+                    self._run_group(engine, group)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _pack(self, batch: List) -> List[List]:
+        """按画布最大高度把一批请求分组，每组拼成一张画布"""
+        max_height = OCR_SERVICE_CONFIG['max_canvas_height']
+        gap = OCR_SERVICE_CONFIG['gap']
+        groups, current, height = [], [], 0
+        for item in batch:
+            h = item[0].shape[0]
+            if current and height + gap + h > max_height:
+                groups.append(current)
+                current, height = [], 0
+            current.append(item)
+            height += h + (gap if height else 0)
+        if current:
+            groups.append(current)
+        return groups
+
+    def _run_group(self, engine, group: List):
+        """把一组图片上下拼接后识别一次，再按y偏移拆分结果"""
+        if len(group) == 1:
+            img, future = group[0]
+            self._count('ocr_calls')
+            future.set_result(engine.ocr(img, cls=True))
+            return
+
+        canvas, offsets = _stack(group)
+        self._count('ocr_calls')
+        result = engine.ocr(canvas, cls=True)
+        lines = result[0] if result and result[0] else []
+
+        per_request = [[] for _ in group]
+        for bbox, text_score in lines:
+            y_center = (bbox[0][1] + bbox[2][1]) / 2
+            i = int(np.searchsorted(offsets, y_center, side='right')) - 1
+            y0 = offsets[i]
+            if y_center >= y0 + group[i][0].shape[0]:
+                continue  # 落在间隔上
+            per_request[i].append([[[p[0], p[1] - y0] for p in bbox], text_score])
+
+        for (_, future), lines in zip(group, per_request):
+            future.set_result([lines] if lines else [None])
+
+
+def _stack(group: List) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把一组图片上下拼接为白底画布（图片之间留空白间隔）
+
+    Returns:
+        (画布, 每张图片的起始y坐标)
+    """
+    gap = OCR_SERVICE_CONFIG['gap']
+    images = [img if img.ndim == 3 else cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) for img, _ in group]
+    width = max(img.shape[1] for img in images)
+    height = sum(img.shape[0] for img in images) + gap * (len(images) - 1)
+
+    canvas = np.full((height, width, 3), 255, dtype=np.uint8)
+    offsets = []
+    y = 0
+    for img in images:
+        canvas[y:y + img.shape[0], :img.shape[1]] = img
+        offsets.append(y)
+        y += img.shape[0] + gap
+    return canvas, np.array(offsets)
+
+
+if __name__ == '__main__':
+    print("OCR服务模块已加载")
+    print("使用方法:")
+    print("  service = OCRService(num_engines=2)")
+    print("  recognizer = ChartRecognizer(ocr_service=service)")
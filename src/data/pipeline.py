@@ -0,0 +1,213 @@
+﻿"""
+分阶段识别流水线
+读取解码（I/O）、预处理+图形元素检测（OpenCV）、坐标轴OCR 三个阶段各自有独立的线程数，
+阶段之间用有界队列连接：磁盘、OpenCV 和 OCR 同时工作，而不是每张图片依次经过所有步骤
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from chart_recognizer import ChartRecognizer, RecognitionResult, _to_bgr
+from config import PIPELINE_CONFIG
+from image_io import load
+
+
+@dataclass
+class _Job:
+    """流水线中的一张图片"""
+    index: int
+    item: object
+    image_name: str = ''
+    img: Optional[np.ndarray] = None
+    reduce: int = 1
+    image_hash: Optional[str] = None
+    data_points_raw: Optional[List[Dict]] = None
+    result: Optional[RecognitionResult] = None     # 出错时提前生成，后续阶段直接跳过
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+_END = object()
+
+
+class RecognitionPipeline:
+    """
+    分阶段识别流水线
+
+    io（读取解码）-> cpu（预处理、图形元素检测）-> ocr（坐标轴识别、坐标映射）-> 按输入顺序输出
+
+    Examples:
+        >>> pipeline = RecognitionPipeline(recognizer, io_workers=1, cpu_workers=2, ocr_workers=1)
+        >>> for result in pipeline.run(iter_images('screenshots')):
+        ...     print(result.image_name, result.confidence)
+    """
+
+    def __init__(self, recognizer: ChartRecognizer, io_workers: int = None,
+                 cpu_workers: int = None, ocr_workers: int = None, queue_size: int = None,
+                 with_hash: bool = False):
+        """
+        初始化流水线
+
+        Args:
+            recognizer: 识别器（线程安全，各阶段共享）
+            io_workers: 读取解码线程数
+            cpu_workers: 预处理和图形元素检测线程数（OpenCV计算会释放GIL）
+            ocr_workers: 坐标轴识别线程数（PaddleOCR串行执行，使用 OCRService 或数字识别器时可以增加）
+            queue_size: 阶段之间队列的容量
+            with_hash: 读取时计算文件内容的指纹（RecognitionResult.image_hash）
+        """
+        cfg = PIPELINE_CONFIG
+        self.recognizer = recognizer
+        self.workers = {
+            'io': io_workers or cfg['io_workers'],
+            'cpu': cpu_workers or cfg['cpu_workers'],
+            'ocr': ocr_workers or cfg['ocr_workers'],
+        }
+        self.queue_size = queue_size or cfg['queue_size']
+        self.with_hash = with_hash
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {}
+
+    def _put(self, q: queue.Queue, value) -> bool:
+        """放入队列；流水线停止时放弃"""
+        while not self._stop.is_set():
+            try:
+                q.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _error(self, job: _Job, error: str):
+        job.result = RecognitionResult(
+            image_name=job.image_name or str(job.item),
+            data_points=[],
+            confidence=0.0,
+            error=error
+        )
+
+    # ---- 各阶段 ----
+
+    def _read(self, job: _Job):
+        job.image_name, img, job.reduce, job.image_hash = load(
+            job.item, self.recognizer.decode_reduce, self.with_hash)
+        if img is None:
+            self._error(job, "无法读取图片")
+            return
+        # 与 recognize_array 相同：PIL图像、灰度、BGRA 统一为BGR（不支持的输入抛出异常，记为该图片的错误）
+        job.img = _to_bgr(img)
+
+    def _detect(self, job: _Job):
+        r = self.recognizer
+        r._begin_call(job.image_name)
+        job.data_points_raw = r._detect(job.img, fast=r.cascade)
+
+    def _recognize_axis(self, job: _Job):
+        r = self.recognizer
+        r._begin_call(job.image_name)
+        with r._reduced(job.reduce):
+            if r.cascade:
+                axis_info = r._recognize_axis_cached(job.img)
+                fast = r._build_result(job.image_name, job.img, axis_info, job.data_points_raw)
+                result = r._recognize_cascade(job.img, job.image_name, fast)
+            else:
+                axis_info = r._recognize_axis(job.img)
+                result = r._build_result(job.image_name, job.img, axis_info, job.data_points_raw)
+        job.result = r._restore_reduce(result, job.reduce)
+        job.result.image_hash = job.image_hash
+        job.img = None      # 尽早释放图片内存
+
+    def _stage(self, name: str, fn: Callable[[_Job], None], source: queue.Queue,
+               sink: queue.Queue, remaining: List[int]):
+        """阶段工作线程：同一阶段的最后一个线程退出时向下游传递结束标记"""
+        while not self._stop.is_set():
+            try:
+                job = source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if job is _END:
+                self._put(source, _END)      # 让同阶段的其他线程也退出
+                break
+            if isinstance(job, Exception):
+                self._put(sink, job)         # 输入出错，直接传到 run()
+                continue
+            if job.result is None:
+                start = time.perf_counter()
+                try:
+                    fn(job)
+                except Exception as e:
+                    self._error(job, str(e))
+                job.timings[name] = time.perf_counter() - start
+            if not self._put(sink, job):
+                break
+
+        with self._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            self._put(sink, _END)
+
+    def _feed(self, items: Iterable, sink: queue.Queue):
+        try:
+            for index, item in enumerate(items):
+                if not self._put(sink, _Job(index, item)):
+                    return
+        except Exception as e:
+            # 遍历输入出错时交给 run() 抛出
+            self._put(sink, e)
+            return
+        self._put(sink, _END)
+
+    def run(self, items: Iterable) -> Iterator[RecognitionResult]:
+        """
+        识别一系列图片，按输入顺序返回结果
+
+        Args:
+            items: 图片路径、bytes、数组或 (其中之一, 名称)，可以是边遍历边产生的迭代器
+
+        Yields:
+            RecognitionResult
+        """
+        self._stop.clear()
+        self.stats = {'images': 0, 'io': 0.0, 'cpu': 0.0, 'ocr': 0.0}
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(4)]
+        stages = [('io', self._read), ('cpu', self._detect), ('ocr', self._recognize_axis)]
+
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]),
+                                    name='pipeline-feed', daemon=True)]
+        for i, (name, fn) in enumerate(stages):
+            remaining = [self.workers[name]]
+            threads += [threading.Thread(target=self._stage,
+                                         args=(name, fn, queues[i], queues[i + 1], remaining),
+                                         name=f'pipeline-{name}-{k}', daemon=True)
+                        for k in range(self.workers[name])]
+        for t in threads:
+            t.start()
+
+        # 各阶段完成顺序不一定与输入一致，按序号重新排序
+        done: Dict[int, _Job] = {}
+        next_index = 0
+        try:
+            while True:
+                job = queues[-1].get()
+                if job is _END:
+                    break
+                if isinstance(job, Exception):
+                    raise job
+                done[job.index] = job
+                while next_index in done:
+                    job = done.pop(next_index)
+                    next_index += 1
+                    self.stats['images'] += 1
+                    for name, seconds in job.timings.items():
+                        self.stats[name] += seconds
+                    yield job.result
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
@@ -0,0 +1,134 @@
+﻿"""
+截图配置模块
+为经常截取的图表窗口命名，保存截图区域、图表布局和价格标定，
+同一份配置同时用于截图（Screenshot.capture_profile）和识别（ChartRecognizer）
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from config import CHART_REGIONS
+
+
+@dataclass
+class CaptureProfile:
+    """
+    截图配置
+
+    Attributes:
+        name: 配置名称
+        region: 屏幕截图区域 (x, y, 宽, 高)
+        layout: 图表布局（相对截图区域的比例），键与 CHART_REGIONS 相同，未给出的使用默认值
+        calibration: 价格标定 {'price_coords': [[y_pixel, price], ...], 'symbol': str}，
+                     y_pixel 相对截图区域顶部；提供后识别时不再做OCR
+    """
+    name: str
+    region: Tuple[int, int, int, int]
+    layout: Dict[str, float] = field(default_factory=dict)
+    calibration: Optional[Dict] = None
+
+    def __post_init__(self):
+        self.region = tuple(int(v) for v in self.region)
+        if len(self.region) != 4 or self.region[2] <= 0 or self.region[3] <= 0:
+            raise ValueError(f"截图配置 {self.name} 的区域无效: {self.region}")
+
+        unknown = set(self.layout) - set(CHART_REGIONS)
+        if unknown:
+            raise ValueError(f"截图配置 {self.name} 包含未知的布局项: {', '.join(sorted(unknown))}")
+
+        if self.calibration is not None and len(self.calibration.get('price_coords', [])) < 2:
+            raise ValueError(f"截图配置 {self.name} 的价格标定至少需要两个刻度")
+
+    @property
+    def regions(self) -> Dict[str, float]:
+        """合并默认值后的完整布局"""
+        return {**CHART_REGIONS, **self.layout}
+
+    def plot_region(self) -> Tuple[int, int, int, int]:
+        """图表主体区域的屏幕坐标 (x, y, 宽, 高)"""
+        x, y, width, height = self.region
+        r = self.regions
+        left, right = int(width * r['chart_left']), int(width * r['chart_right'])
+        top, bottom = int(height * r['chart_top']), int(height * r['chart_bottom'])
+        return x + left, y + top, right - left, bottom - top
+
+    def plot_only(self) -> 'CaptureProfile':
+        """
+        只截取图表主体区域的配置（不截取坐标轴和标题）
+
+        需要价格标定：坐标轴不在截图中，无法再用OCR识别刻度。
+        标定的y坐标会换算到新的截图区域。
+        """
+        if not self.calibration:
+            raise ValueError(f"截图配置 {self.name} 没有价格标定，不能只截取图表主体")
+
+        x, y, width, height = self.plot_region()
+        offset = y - self.region[1]
+        calibration = {
+            **self.calibration,
+            'price_coords': [[py - offset, price] for py, price in self.calibration['price_coords']]
+        }
+        layout = {'chart_left': 0.0, 'chart_right': 1.0, 'chart_top': 0.0, 'chart_bottom': 1.0}
+
+        return CaptureProfile(f"{self.name}_plot", (x, y, width, height), layout, calibration)
+
+    def create_recognizer(self, **kwargs):
+        """
+        创建使用该配置布局和标定的识别器
+
+        Args:
+            **kwargs: 传给 ChartRecognizer 的其他参数（use_gpu、debug 等）
+        """
+        from chart_recognizer import ChartRecognizer
+        return ChartRecognizer(layout=self.layout, calibration=self.calibration, **kwargs)
+
+    def to_dict(self) -> Dict:
+        data = {'region': list(self.region)}
+        if self.layout:
+            data['layout'] = self.layout
+        if self.calibration:
+            data['calibration'] = self.calibration
+        return data
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> 'CaptureProfile':
+        return cls(name=name,
+                   region=data['region'],
+                   layout=data.get('layout', {}),
+                   calibration=data.get('calibration'))
+
+
+def load_profiles(path: str) -> Dict[str, CaptureProfile]:
+    """
+    从JSON文件加载截图配置
+
+    文件格式:
+        {
+            "main": {
+                "region": [100, 100, 1200, 800],
+                "layout": {"chart_left": 0.05, "chart_right": 0.92},
+                "calibration": {"price_coords": [[80, 200.0], [560, 100.0]], "symbol": "600519"}
+            }
+        }
+
+    Returns:
+        {名称: CaptureProfile}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {name: CaptureProfile.from_dict(name, spec) for name, spec in data.items()}
+
+
+def save_profiles(profiles: Dict[str, CaptureProfile], path: str):
+    """把截图配置保存为JSON文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({name: p.to_dict() for name, p in profiles.items()}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    print("截图配置模块已加载")
+    print("可用函数:")
+    print("  - load_profiles(): 从JSON文件加载截图配置")
+    print("  - save_profiles(): 保存截图配置")
+    print("  - CaptureProfile.plot_only(): 只截取图表主体区域")
@@ -0,0 +1,250 @@
+"""
+识别准确度评分模块
+将识别结果与真实数据（如 demo.py 生成的 prices）按x坐标对齐后计算误差，
+用于在开启提速模式（降采样、跳过去噪等）前确认准确度没有下降
+"""
+
+import numpy as np
+from typing import List, Dict, Tuple, Optional, Iterable
+from dataclasses import dataclass, field
+
+from config import ACCURACY_GUARD
+
+
+# 参与评分的价格字段
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+
+
+def _get(item, key):
+    """同时支持 dict 和 DataPoint 取值"""
+    if isinstance(item, dict):
+        return item.get(key)
+    return getattr(item, key, None)
+
+
+def _to_arrays(bars: List) -> Tuple[Optional[np.ndarray], Dict[str, np.ndarray]]:
+    """把图形元素列表转换为 x坐标数组 + 各价格字段数组"""
+    values = {f: np.array([_get(b, f) for b in bars], dtype=float) for f in PRICE_FIELDS}
+    xs = [_get(b, 'x_center') for b in bars]
+    if bars and all(x is not None for x in xs):
+        return np.array(xs, dtype=float), values
+    return None, values
+
+
+def align_bars(pred_x: np.ndarray, true_x: np.ndarray,
+               tolerance: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按x坐标对齐识别结果与真实数据（互为最近邻 + 距离容差）
+
+    缺失或多余的图形元素不会导致后续元素整体错位。
+
+    Args:
+        pred_x: 识别结果的x坐标（已排序）
+        true_x: 真实数据的x坐标（已排序）
+        tolerance: 最大允许偏移（像素），None表示取真实间距中位数的一半
+
+    Returns:
+        (pred_idx, true_idx): 匹配成功的下标对
+    """
+    empty = np.array([], dtype=int)
+    if len(pred_x) == 0 or len(true_x) == 0:
+        return empty, empty
+
+    if tolerance is None:
+        tolerance = np.median(np.diff(true_x)) / 2 if len(true_x) > 1 else np.inf
+
+    def nearest(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        pos = np.clip(np.searchsorted(dst, src), 1, max(len(dst) - 1, 1))
+        left = dst[pos - 1]
+        right = dst[np.minimum(pos, len(dst) - 1)]
+        return np.where(np.abs(src - left) <= np.abs(src - right), pos - 1,
+                        np.minimum(pos, len(dst) - 1))
+
+    pred_to_true = nearest(pred_x, true_x)
+    true_to_pred = nearest(true_x, pred_x)
+
+    pred_idx = np.arange(len(pred_x))
+    mutual = true_to_pred[pred_to_true] == pred_idx
+    close = np.abs(pred_x - true_x[pred_to_true]) <= tolerance
+    keep = mutual & close
+
+    return pred_idx[keep], pred_to_true[keep]
+
+
+@dataclass
+class ScoreReport:
+    """单张图片的评分结果"""
+    image_name: str
+    n_true: int
+    n_pred: int
+    n_matched: int
+    metrics: Dict[str, Dict[str, float]]
+    direction_accuracy: float
+    # 各字段的原始误差，用于跨图片汇总（不输出）
+    errors: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+    rel_errors: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+    direction_hits: int = 0
+
+    @property
+    def recall(self) -> float:
+        return self.n_matched / self.n_true if self.n_true else 0.0
+
+    @property
+    def precision(self) -> float:
+        return self.n_matched / self.n_pred if self.n_pred else 0.0
+
+    def to_dict(self):
+        return {
+            'image_name': self.image_name,
+            'n_true': self.n_true,
+            'n_pred': self.n_pred,
+            'n_matched': self.n_matched,
+            'recall': round(self.recall, 4),
+            'precision': round(self.precision, 4),
+            'direction_accuracy': round(self.direction_accuracy, 4),
+            'metrics': self.metrics
+        }
+
+
+def _field_metrics(err: np.ndarray, rel: np.ndarray) -> Dict[str, float]:
+    """计算单个字段的误差指标"""
+    if len(err) == 0:
+        return {'mae': None, 'rmse': None, 'max_error': None, 'mape': None}
+    abs_err = np.abs(err)
+    return {
+        'mae': round(float(abs_err.mean()), 4),
+        'rmse': round(float(np.sqrt((err ** 2).mean())), 4),
+        'max_error': round(float(abs_err.max()), 4),
+        'mape': round(float(np.abs(rel).mean()), 4)
+    }
+
+
+def score_result(result, truth: List, tolerance: Optional[float] = None) -> ScoreReport:
+    """
+    对单张图片的识别结果评分
+
+    Args:
+        result: RecognitionResult
+        truth: 真实数据列表（dict 或 DataPoint，带 x_center 时按x坐标对齐，
+               否则按序号对齐）
+        tolerance: x坐标对齐容差（像素）
+
+    Returns:
+        ScoreReport
+    """
+    pred_x, pred = _to_arrays(result.data_points)
+    true_x, true = _to_arrays(truth)
+
+    if pred_x is not None and true_x is not None:
+        pred_order = np.argsort(pred_x, kind='stable')
+        true_order = np.argsort(true_x, kind='stable')
+        pi, ti = align_bars(pred_x[pred_order], true_x[true_order], tolerance)
+        pi, ti = pred_order[pi], true_order[ti]
+    else:
+        n = min(len(result.data_points), len(truth))
+        pi = ti = np.arange(n)
+
+    errors, rel_errors, metrics = {}, {}, {}
+    for f in PRICE_FIELDS:
+        t = true[f][ti]
+        err = pred[f][pi] - t
+        rel = np.divide(err, np.abs(t), out=np.zeros_like(err), where=t != 0)
+        errors[f], rel_errors[f] = err, rel
+        metrics[f] = _field_metrics(err, rel)
+
+    # 涨跌方向是否识别正确
+    hits = int(np.sum((pred['close'][pi] >= pred['open'][pi]) == (true['close'][ti] >= true['open'][ti])))
+
+    return ScoreReport(
+        image_name=result.image_name,
+        n_true=len(truth),
+        n_pred=len(result.data_points),
+        n_matched=len(pi),
+        metrics=metrics,
+        direction_accuracy=hits / len(pi) if len(pi) else 0.0,
+        errors=errors,
+        rel_errors=rel_errors,
+        direction_hits=hits
+    )
+
+
+def aggregate_scores(reports: Iterable[ScoreReport]) -> Dict:
+    """
+    汇总多张图片的评分（按图形元素加权，而不是对每张图片的指标取平均）
+
+    Returns:
+        {'images', 'n_true', 'n_pred', 'n_matched', 'recall', 'precision',
+         'direction_accuracy', 'metrics': {field: {...}}, 'mape'}
+    """
+    reports = list(reports)
+    n_true = sum(r.n_true for r in reports)
+    n_pred = sum(r.n_pred for r in reports)
+    n_matched = sum(r.n_matched for r in reports)
+
+    metrics = {}
+    for f in PRICE_FIELDS:
+        err = np.concatenate([r.errors[f] for r in reports]) if reports else np.array([])
+        rel = np.concatenate([r.rel_errors[f] for r in reports]) if reports else np.array([])
+        metrics[f] = _field_metrics(err, rel)
+
+    mapes = [m['mape'] for m in metrics.values() if m['mape'] is not None]
+
+    return {
+        'images': len(reports),
+        'n_true': n_true,
+        'n_pred': n_pred,
+        'n_matched': n_matched,
+        'recall': round(n_matched / n_true, 4) if n_true else 0.0,
+        'precision': round(n_matched / n_pred, 4) if n_pred else 0.0,
+        'direction_accuracy': round(sum(r.direction_hits for r in reports) / n_matched, 4) if n_matched else 0.0,
+        'metrics': metrics,
+        'mape': round(float(np.mean(mapes)), 4) if mapes else None
+    }
+
+
+def score_corpus(pairs: Iterable[Tuple]) -> Tuple[List[ScoreReport], Dict]:
+    """
+    对一批 (result, truth) 评分并汇总
+
+    Returns:
+        (每张图片的评分列表, 汇总结果)
+    """
+    reports = [score_result(result, truth) for result, truth in pairs]
+    return reports, aggregate_scores(reports)
+
+
+def accuracy_holds(summary: Dict, baseline: Optional[Dict] = None,
+                   thresholds: Optional[Dict] = None) -> bool:
+    """
+    判断某个提速模式的准确度是否仍然可以接受
+
+    Args:
+        summary: 提速模式下 aggregate_scores() 的结果
+        baseline: 完整模式下 aggregate_scores() 的结果（可选）
+        thresholds: 阈值，默认使用 config.ACCURACY_GUARD
+
+    Returns:
+        是否满足所有阈值
+    """
+    t = {**ACCURACY_GUARD, **(thresholds or {})}
+
+    if summary['recall'] < t['min_recall'] or summary['precision'] < t['min_precision']:
+        return False
+    if summary['mape'] is None or summary['mape'] > t['max_mape']:
+        return False
+
+    if baseline is not None:
+        if baseline['recall'] - summary['recall'] > t['max_recall_drop']:
+            return False
+        if baseline['mape'] is not None and summary['mape'] - baseline['mape'] > t['max_mape_increase']:
+            return False
+
+    return True
+
+
+if __name__ == '__main__':
+    print("准确度评分模块已加载")
+    print("可用函数:")
+    print("  - score_result(): 单张图片评分")
+    print("  - score_corpus(): 批量评分并汇总")
+    print("  - accuracy_holds(): 判断提速模式准确度是否达标")
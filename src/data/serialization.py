@@ -0,0 +1,184 @@
+﻿"""
+识别结果序列化
+- JSON：安装了 orjson 时使用 orjson（比标准库快数倍），compact 模式不缩进、逐张写入
+- JSON Lines：每行一张图片，读取时可以逐行解析，不需要一次载入整个文件
+- MessagePack：二进制格式（需要 msgpack），文件由连续的多个对象组成，每个对象一张图片
+- 压缩：gzip（标准库）或 zstd（需要 zstandard），文件名追加 .gz / .zst
+"""
+
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from chart_recognizer import RecognitionResult
+from config import OUTPUT_CONFIG
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# 输出格式 -> 文件名
+RESULT_FILES = {
+    'json': 'results.json',
+    'jsonl': 'results.jsonl',
+    'msgpack': 'results.msgpack',
+}
+
+# 压缩方式 -> 文件名后缀
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+def _default(obj):
+    """numpy 标量和数组（质量特征中可能出现）转换为Python类型"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+def dumps_json(obj, indent: Optional[int] = None) -> bytes:
+    """
+    序列化为UTF-8编码的JSON
+
+    Args:
+        obj: 要序列化的对象
+        indent: 缩进空格数，None表示紧凑格式（不缩进，分隔符后没有空格）
+    """
+    if ORJSON_AVAILABLE and indent in (None, 2):
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators,
+                      default=_default).encode('utf-8')
+
+
+def loads_json(data: Union[bytes, str]):
+    """解析JSON（安装了 orjson 时使用 orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compression_of(path: Union[str, Path]) -> Optional[str]:
+    """按文件名后缀判断压缩方式"""
+    suffix = Path(path).suffix
+    for compress, s in COMPRESSION_SUFFIXES.items():
+        if suffix == s:
+            return compress
+    return None
+
+
+def open_compressed(path: Union[str, Path], mode: str = 'rb', compress: Optional[str] = None):
+    """
+    以二进制模式打开（压缩）文件
+
+    Args:
+        path: 文件路径
+        mode: 'rb' 或 'wb'
+        compress: None、'gzip' 或 'zstd'
+    """
+    if compress is None:
+        return open(path, mode)
+    if compress == 'gzip':
+        return gzip.open(path, mode, compresslevel=OUTPUT_CONFIG['gzip_level'])
+    if compress == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ImportError("zstd 压缩需要安装 zstandard: pip install zstandard")
+        raw = open(path, mode)
+        if 'w' in mode:
+            return zstandard.ZstdCompressor(level=OUTPUT_CONFIG['zstd_level']).stream_writer(raw, closefd=True)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    raise ValueError(f"不支持的压缩方式: {compress}，可选: {', '.join(COMPRESSION_SUFFIXES)}")
+
+
+def result_path(output_dir: Union[str, Path], fmt: str, compress: Optional[str] = None) -> Path:
+    """输出格式对应的文件路径（如 output/results.jsonl.gz）"""
+    return Path(output_dir) / (RESULT_FILES[fmt] + COMPRESSION_SUFFIXES.get(compress, ''))
+
+
+def write_results(results: Iterable[RecognitionResult], output_dir: Union[str, Path],
+                  fmt: str = 'json', compact: bool = False,
+                  compress: Optional[str] = None) -> Path:
+    """
+    写入识别结果
+
+    Args:
+        results: 识别结果（可以是迭代器，compact JSON、JSON Lines 和 MessagePack 逐张写入）
+        output_dir: 输出文件夹
+        fmt: 'json'、'jsonl' 或 'msgpack'
+        compact: JSON不缩进（JSON Lines 和 MessagePack 总是紧凑的）
+        compress: None、'gzip' 或 'zstd'
+
+    Returns:
+        写入的文件路径
+    """
+    if fmt == 'msgpack' and not MSGPACK_AVAILABLE:
+        raise ImportError("msgpack 格式需要安装 msgpack: pip install msgpack")
+
+    path = result_path(output_dir, fmt, compress)
+    with open_compressed(path, 'wb', compress) as f:
+        if fmt == 'json' and not compact:
+            f.write(dumps_json([r.to_dict() for r in results], indent=OUTPUT_CONFIG['json_indent']))
+        elif fmt == 'json':
+            f.write(b'[')
+            for i, result in enumerate(results):
+                if i:
+                    f.write(b',')
+                f.write(dumps_json(result.to_dict()))
+            f.write(b']')
+        elif fmt == 'jsonl':
+            for result in results:
+                f.write(dumps_json(result.to_dict()) + b'\n')
+        elif fmt == 'msgpack':
+            packer = msgpack.Packer(default=_default)
+            for result in results:
+                f.write(packer.pack(result.to_dict()))
+        else:
+            raise ValueError(f"不支持的输出格式: {fmt}，可选: {', '.join(RESULT_FILES)}")
+    return path
+
+
+def iter_results(path: Union[str, Path]) -> Iterator[dict]:
+    """
+    读取 write_results() 写入的文件，逐张返回 RecognitionResult.to_dict() 形式的字典
+
+    格式和压缩方式由文件名判断（如 results.msgpack.zst）。
+    JSON Lines 和 MessagePack 逐张解析，JSON需要一次解析整个文件。
+    """
+    path = Path(path)
+    compress = compression_of(path)
+    fmt = (path.with_suffix('') if compress else path).suffix
+    with open_compressed(path, 'rb', compress) as f:
+        if fmt == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield loads_json(line)
+        elif fmt == '.msgpack':
+            if not MSGPACK_AVAILABLE:
+                raise ImportError("读取 msgpack 格式需要安装 msgpack: pip install msgpack")
+            yield from msgpack.Unpacker(f, raw=False)
+        else:
+            yield from loads_json(f.read())
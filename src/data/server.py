@@ -0,0 +1,274 @@
+﻿"""
+本地HTTP识别服务
+常驻进程保持识别器（和OCR模型）处于加载状态，其他程序通过HTTP提交图片，
+不再每次调用 cli.py 都重新启动解释器、加载模型
+
+接口:
+    POST /recognize            请求体为图片内容（PNG/JPEG等），可用 ?name= 指定图片名称
+    POST /recognize            JSON请求体 {"path": "图片路径", "name": "可选名称"}
+    GET  /health               服务状态和统计信息
+
+返回 RecognitionResult.to_dict() 的JSON
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from chart_recognizer import PADDLEOCR_AVAILABLE, ChartRecognizer
+from config import SERVER_CONFIG
+from ocr_backends import create_backend
+from ocr_service import OCRService
+
+
+class RecognitionServer(ThreadingHTTPServer):
+    """
+    识别服务
+
+    每个HTTP连接由单独的线程处理，识别在有界线程池中进行（识别器线程安全，所有线程共享）；
+    识别器使用 OCRService 时，并发请求的坐标轴区域会被合并成小批次一起OCR。
+
+    Examples:
+        >>> server = RecognitionServer(ChartRecognizer(), port=8765)
+        >>> server.serve_forever()
+    """
+
+    daemon_threads = True
+
+    def __init__(self, recognizer: ChartRecognizer, host: str = None, port: int = None,
+                 max_workers: int = None, max_pending: int = None, root: Optional[str] = None,
+                 verbose: bool = False):
+        """
+        初始化识别服务
+
+        Args:
+            recognizer: 识别器（常驻，所有请求共享）
+            host: 监听地址
+            port: 监听端口（0表示自动选择）
+            max_workers: 识别线程数
+            max_pending: 排队+识别中的请求超过该值时返回 503
+            root: 只允许识别该目录下的图片路径，None表示不限制
+            verbose: 是否打印每个请求的日志
+        """
+        cfg = SERVER_CONFIG
+        super().__init__((host or cfg['host'], cfg['port'] if port is None else port),
+                         RecognitionHandler)
+        self.recognizer = recognizer
+        self.max_pending = max_pending or cfg['max_pending']
+        self.max_upload = cfg['max_upload_mb'] * 1024 * 1024
+        self.timeout_s = cfg['timeout']
+        self.root = os.path.realpath(root) if root else None
+        self.verbose = verbose
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or cfg['max_workers'],
+                                            thread_name_prefix='server-recognize')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.stats = {'requests': 0, 'completed': 0, 'rejected': 0, 'failed': 0, 'total_ms': 0.0}
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def resolve_path(self, path: str) -> Optional[str]:
+        """检查图片路径是否允许访问，返回规范化后的路径"""
+        real = os.path.realpath(path)
+        if self.root and os.path.commonpath([self.root, real]) != self.root:
+            return None
+        return real
+
+    def recognize(self, image, image_name: str) -> Tuple[int, Dict]:
+        """
+        提交识别并等待结果
+
+        Returns:
+            (HTTP状态码, 返回的JSON对象)
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                return 503, {'error': '服务繁忙，请稍后重试'}
+            self._pending += 1
+            self.stats['requests'] += 1
+
+        start = time.perf_counter()
+        try:
+            future = self._executor.submit(self.recognizer.recognize, image, image_name)
+            result = future.result(timeout=self.timeout_s)
+        except TimeoutError:
+            future.cancel()
+            self._count('failed')
+            return 504, {'error': f'识别超时（{self.timeout_s}秒）'}
+        except Exception as e:
+            # 例如服务关闭后线程池拒绝提交
+            self._count('failed')
+            return 500, {'error': f'识别失败: {e}'}
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        self._count('completed')
+        self._count('total_ms', (time.perf_counter() - start) * 1000)
+        return 200, result.to_dict()
+
+    def health(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            pending = self._pending
+        done = stats.pop('total_ms')
+        stats['avg_ms'] = round(done / stats['completed'], 1) if stats['completed'] else None
+        health = {'status': 'ok', 'pending': pending, 'stats': stats,
+                  'recognizer': dict(self.recognizer.stats)}
+        if isinstance(self.recognizer.ocr, OCRService):
+            health['ocr_service'] = dict(self.recognizer.ocr.stats)
+        return health
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+class RecognitionHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理"""
+
+    server: RecognitionServer
+
+    def _reply(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self._reply(200, self.server.health())
+        else:
+            self._reply(404, {'error': f'未知接口: {self.path}'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/recognize':
+            self._reply(404, {'error': f'未知接口: {self.path}'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._reply(400, {'error': '请求体为空'})
+            return
+        if length > self.server.max_upload:
+            self._reply(413, {'error': '图片过大'})
+            return
+        body = self.rfile.read(length)
+
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type == 'application/json':
+            try:
+                request = json.loads(body)
+                path = request['path']
+                if not isinstance(path, str):
+                    raise TypeError(path)
+            except (ValueError, KeyError, TypeError):
+                self._reply(400, {'error': 'JSON请求体需要包含字符串 path'})
+                return
+            real = self.server.resolve_path(path)
+            if real is None:
+                self._reply(403, {'error': f'不允许访问该路径: {path}'})
+                return
+            if not os.path.isfile(real):
+                self._reply(404, {'error': f'图片不存在: {path}'})
+                return
+            image, name = real, request.get('name') or Path(path).name
+        else:
+            image, name = body, parse_qs(url.query).get('name', ['upload'])[0]
+
+        self._reply(*self.server.recognize(image, name))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='本地HTTP识别服务 - 常驻进程，避免每次识别都重新加载模型',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  # 启动服务（默认 127.0.0.1:8765）
+  python server.py
+
+  # 使用内置数字识别器，4个识别线程
+  python server.py --ocr digits --workers 4
+
+  # 上传图片识别
+  curl --data-binary @chart.png "http://127.0.0.1:8765/recognize?name=chart.png"
+
+  # 识别本机上的图片
+  curl -H "Content-Type: application/json" -d '{"path": "screenshots/chart.png"}' http://127.0.0.1:8765/recognize
+
+  # 服务状态
+  curl http://127.0.0.1:8765/health
+        """
+    )
+
+    parser.add_argument('--host', default=SERVER_CONFIG['host'],
+                        help=f"监听地址（默认: {SERVER_CONFIG['host']}）")
+    parser.add_argument('--port', type=int, default=SERVER_CONFIG['port'],
+                        help=f"监听端口（默认: {SERVER_CONFIG['port']}）")
+    parser.add_argument('-w', '--workers', type=int, default=SERVER_CONFIG['max_workers'],
+                        help=f"识别线程数（默认: {SERVER_CONFIG['max_workers']}）")
+    parser.add_argument('--root',
+                        help='只允许识别该目录下的图片路径')
+    parser.add_argument('--ocr', choices=['paddle', 'digits', 'auto'], default='paddle',
+                        help='坐标轴OCR后端（见 cli.py --ocr）')
+    parser.add_argument('--ocr-engines', type=int,
+                        help='OCR模型实例数（使用PaddleOCR时，并发请求合并成小批次识别）')
+    parser.add_argument('--cascade', action='store_true',
+                        help='分级识别：先快速识别，置信度不足时再完整识别')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='根据图形元素间距自动降采样（适合高分辨率截图）')
+    parser.add_argument('--gpu', action='store_true',
+                        help='使用GPU加速')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='打印每个请求的日志')
+
+    args = parser.parse_args()
+
+    print("正在初始化图形元素图识别器...")
+    options = dict(use_gpu=args.gpu, adaptive_resolution=args.adaptive, cascade=args.cascade)
+    service = None
+    if args.ocr != 'digits' and PADDLEOCR_AVAILABLE:
+        # 所有请求共享的OCR服务：并发请求的坐标轴区域合并成小批次识别
+        service = OCRService(num_engines=args.ocr_engines,
+                             engine_factory=lambda: create_backend(args.ocr))
+        recognizer = ChartRecognizer(ocr_service=service, **options)
+    else:
+        backend = create_backend('digits') if args.ocr != 'paddle' else None
+        recognizer = ChartRecognizer(ocr_backend=backend, **options)
+
+    server = RecognitionServer(recognizer, args.host, args.port, max_workers=args.workers,
+                               root=args.root, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"✅ 识别服务已启动: http://{host}:{port}（按 Ctrl+C 停止）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if service is not None:
+            service.close()
+        print("\n服务已停止")
+
+
+if __name__ == '__main__':
+    main()
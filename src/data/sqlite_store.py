@@ -0,0 +1,221 @@
+﻿"""
+SQLite结果库
+识别结果按图片和图形元素分表保存，(symbol, date) 和图片指纹建有索引，
+按股票代码/日期查询不需要读取整个CSV；重复运行时只更新内容有变化的行
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from chart_recognizer import RecognitionResult
+from config import SQLITE_CONFIG
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id          INTEGER PRIMARY KEY,
+    image_name  TEXT NOT NULL UNIQUE,
+    image_hash  TEXT,
+    symbol      TEXT,
+    confidence  REAL,
+    n_bars      INTEGER,
+    quality     TEXT,
+    error       TEXT,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_images_hash ON images(image_hash);
+CREATE INDEX IF NOT EXISTS idx_images_symbol ON images(symbol);
+
+CREATE TABLE IF NOT EXISTS bars (
+    image_id    INTEGER NOT NULL REFERENCES images(id) ON DELETE CASCADE,
+    seq         INTEGER NOT NULL,
+    symbol      TEXT,
+    date        TEXT,
+    open        REAL,
+    high        REAL,
+    low         REAL,
+    close       REAL,
+    volume      REAL,
+    x_center    INTEGER,
+    PRIMARY KEY (image_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_bars_symbol_date ON bars(symbol, date);
+"""
+
+IMAGE_COLUMNS = ('image_hash', 'symbol', 'confidence', 'n_bars', 'quality', 'error')
+BAR_COLUMNS = ('symbol', 'date', 'open', 'high', 'low', 'close', 'volume', 'x_center')
+
+
+# 更新时的新值：没有指纹（未计算）时保留已有的指纹
+IMAGE_VALUES = {c: 'excluded.' + c for c in IMAGE_COLUMNS}
+IMAGE_VALUES['image_hash'] = 'COALESCE(excluded.image_hash, images.image_hash)'
+BAR_VALUES = {c: 'excluded.' + c for c in BAR_COLUMNS}
+
+
+def _assignments(values: Dict[str, str]) -> str:
+    return ', '.join(f"{c} = {v}" for c, v in values.items())
+
+
+def _changed(table: str, values: Dict[str, str]) -> str:
+    """UPSERT 的更新条件：任一列与新值不同（IS NOT 可以比较NULL）"""
+    return ' OR '.join(f"{table}.{c} IS NOT {v}" for c, v in values.items())
+
+
+UPSERT_IMAGE = f"""
+INSERT INTO images (image_name, {', '.join(IMAGE_COLUMNS)}, updated_at)
+VALUES (?, {', '.join('?' * len(IMAGE_COLUMNS))}, ?)
+ON CONFLICT(image_name) DO UPDATE SET
+    {_assignments(IMAGE_VALUES)}, updated_at = excluded.updated_at
+WHERE {_changed('images', IMAGE_VALUES)}
+"""
+
+UPSERT_BAR = f"""
+INSERT INTO bars (image_id, seq, {', '.join(BAR_COLUMNS)})
+VALUES (?, ?, {', '.join('?' * len(BAR_COLUMNS))})
+ON CONFLICT(image_id, seq) DO UPDATE SET
+    {_assignments(BAR_VALUES)}
+WHERE {_changed('bars', BAR_VALUES)}
+"""
+
+
+class SqliteStore:
+    """
+    SQLite结果库（也可以作为 exporters 的流式输出使用）
+
+    Examples:
+        >>> with SqliteStore('output/results.db') as store:
+        ...     for result in recognizer.iter_recognize(paths, with_hash=True):
+        ...         store.write(result)
+        >>> df = SqliteStore('output/results.db').query_bars('600000', start='2024-01-01')
+    """
+
+    def __init__(self, path: Union[str, Path], batch_size: int = None):
+        """
+        打开（或创建）结果库
+
+        Args:
+            path: 数据库文件
+            batch_size: 每个事务写入的图片数
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size or SQLITE_CONFIG['batch_size']
+        self.count = 0
+        self.stats = {'images': 0, 'rows_changed': 0}
+
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[RecognitionResult, Optional[str]]] = []
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(SCHEMA)
+
+    def write(self, result: RecognitionResult, image_hash: Optional[str] = None):
+        """
+        写入一条识别结果（攒够 batch_size 条后在一个事务中提交）
+
+        Args:
+            result: 识别结果（按 image_name 更新已有记录）
+            image_hash: 图片内容指纹，默认使用 result.image_hash；
+                        为None时保留库中已有的指纹
+        """
+        with self._lock:
+            self._pending.append((result, image_hash or result.image_hash))
+            self.count += 1
+            if len(self._pending) >= self.batch_size:
+                self._commit()
+
+    def flush(self):
+        """提交尚未写入的结果"""
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        if not self._pending:
+            return
+        before = self._conn.total_changes
+        with self._conn:    # 一个事务，出错时整批回滚
+            for result, image_hash in self._pending:
+                self._upsert(result, image_hash)
+        self.stats['images'] += len(self._pending)
+        self.stats['rows_changed'] += self._conn.total_changes - before
+        self._pending = []
+
+    def _upsert(self, result: RecognitionResult, image_hash: Optional[str]):
+        quality = json.dumps(result.quality, sort_keys=True) if result.quality else None
+        self._conn.execute(UPSERT_IMAGE, (
+            result.image_name, image_hash, result.symbol, result.confidence,
+            len(result.data_points), quality, result.error,
+            datetime.now().isoformat(timespec='seconds')
+        ))
+        image_id = self._conn.execute('SELECT id FROM images WHERE image_name = ?',
+                                      (result.image_name,)).fetchone()[0]
+
+        self._conn.executemany(UPSERT_BAR, [
+            (image_id, seq, result.symbol, dp.date, dp.open, dp.high, dp.low, dp.close,
+             dp.volume, dp.x_center)
+            for seq, dp in enumerate(result.data_points)
+        ])
+        # 本次识别的图形元素变少时删除多余的行
+        self._conn.execute('DELETE FROM bars WHERE image_id = ? AND seq >= ?',
+                           (image_id, len(result.data_points)))
+
+    def find_image(self, image_hash: str) -> Optional[Dict]:
+        """按图片指纹（RecognitionResult.image_hash，即 image_io.content_hash）查找已识别的图片"""
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT image_name, symbol, confidence, n_bars, error, updated_at '
+                'FROM images WHERE image_hash = ? ORDER BY updated_at DESC LIMIT 1',
+                (image_hash,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('image_name', 'symbol', 'confidence', 'n_bars', 'error', 'updated_at'), row))
+
+    def query_bars(self, symbol: Optional[str] = None, start: Optional[str] = None,
+                   end: Optional[str] = None) -> pd.DataFrame:
+        """
+        查询图形元素（使用 (symbol, date) 索引）
+
+        Args:
+            symbol: 股票代码，None表示全部
+            start: 起始日期（含），与识别结果中的日期格式相同
+            end: 结束日期（含）
+
+        Returns:
+            DataFrame，列与 results.csv 相同
+        """
+        self.flush()
+        conditions, params = [], []
+        for clause, value in (('b.symbol = ?', symbol), ('b.date >= ?', start), ('b.date <= ?', end)):
+            if value is not None:
+                conditions.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        sql = f"""
+            SELECT i.image_name AS image, b.symbol, b.date, b.open, b.high, b.low, b.close,
+                   b.volume, i.confidence
+            FROM bars b JOIN images i ON i.id = b.image_id
+            {where}
+            ORDER BY b.symbol, b.date, i.image_name, b.seq
+        """
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def close(self):
+        """提交剩余结果并关闭数据库"""
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
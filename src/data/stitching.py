@@ -0,0 +1,266 @@
+﻿"""
+序列拼接
+同一股票的多张截图时间窗口互相重叠，拼接后每个股票得到一条连续、去重的序列。
+两段序列的对齐位置优先由日期确定（需要重叠部分的OHLC一致），
+日期缺失或对不上时，对所有可能的偏移一次性计算OHLC的差异（向量化互相关），取误差最小的位置。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from chart_recognizer import DataPoint, RecognitionResult
+from config import STITCH_CONFIG
+
+
+@dataclass
+class StitchedSeries:
+    """一个股票拼接后的连续序列"""
+    symbol: Optional[str]
+    data_points: List[DataPoint]
+    sources: List[str] = field(default_factory=list)    # 参与拼接的图片（按拼接顺序）
+    dated: bool = True          # False 表示日期对不上，已按 _build_result 的方式重新编号
+    n_input_bars: int = 0       # 拼接前的图形元素总数
+
+    @property
+    def n_duplicates(self) -> int:
+        """去掉的重复图形元素数量"""
+        return self.n_input_bars - len(self.data_points)
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'sources': self.sources,
+            'dated': self.dated,
+            'n_duplicates': self.n_duplicates,
+            'data_points': [{
+                'date': dp.date,
+                'open': dp.open,
+                'high': dp.high,
+                'low': dp.low,
+                'close': dp.close,
+                'volume': dp.volume
+            } for dp in self.data_points]
+        }
+
+
+class _Segment:
+    """拼接过程中的一段序列（数组形式）"""
+
+    def __init__(self, result: RecognitionResult):
+        points = result.data_points
+        self.ohlc = np.array([[dp.open, dp.high, dp.low, dp.close] for dp in points], dtype=float)
+        self.volume = np.array([np.nan if dp.volume is None else dp.volume for dp in points], dtype=float)
+        self.dates: List[Optional[str]] = [dp.date or None for dp in points]
+        self.confidence = np.full(len(points), result.confidence, dtype=float)
+        self.sources = [result.image_name]
+        self.dated = True
+        self.n_input_bars = len(points)
+
+    def __len__(self):
+        return len(self.ohlc)
+
+
+def alignment_errors(base: np.ndarray, segment: np.ndarray) -> tuple:
+    """
+    计算 segment 相对 base 所有偏移位置的重叠误差
+
+    偏移 k 表示 segment[j] 对应 base[k + j]，k 取 -(m-1) .. n-1。
+    重叠部分的平方误差和 = Σbase² + Σsegment² - 2·互相关，互相关用 np.correlate 一次算出全部偏移。
+
+    Args:
+        base: (n, 4) OHLC
+        segment: (m, 4) OHLC
+
+    Returns:
+        (offsets, overlap, rmse)：偏移、重叠的图形元素数量、重叠部分OHLC的均方根误差
+    """
+    n, m = len(base), len(segment)
+    offsets = np.arange(-(m - 1), n)
+
+    corr = sum(np.correlate(base[:, c], segment[:, c], mode='full') for c in range(base.shape[1]))
+
+    # 重叠区间：base[lo_a:hi_a] 与 segment[lo_b:hi_b]
+    lo_a = np.maximum(offsets, 0)
+    hi_a = np.minimum(offsets + m, n)
+    lo_b = lo_a - offsets
+    hi_b = hi_a - offsets
+    overlap = hi_a - lo_a
+
+    base_sq = np.concatenate([[0.0], np.cumsum((base ** 2).sum(axis=1))])
+    seg_sq = np.concatenate([[0.0], np.cumsum((segment ** 2).sum(axis=1))])
+    ssd = base_sq[hi_a] - base_sq[lo_a] + seg_sq[hi_b] - seg_sq[lo_b] - 2 * corr
+    rmse = np.sqrt(np.maximum(ssd, 0.0) / (overlap * base.shape[1]))
+    return offsets, overlap, rmse
+
+
+class SeriesStitcher:
+    """
+    按股票代码拼接识别结果
+
+    Examples:
+        >>> stitcher = SeriesStitcher(min_overlap=3)
+        >>> for series in stitcher.stitch(results):
+        ...     print(series.symbol, len(series.data_points), series.n_duplicates)
+    """
+
+    def __init__(self, min_overlap: int = None, tolerance: float = None,
+                 min_confidence: float = None):
+        """
+        初始化拼接器
+
+        Args:
+            min_overlap: 按OHLC对齐时至少重叠的图形元素数量
+            tolerance: 重叠部分的均方根误差上限（相对两段序列的价格范围）
+            min_confidence: 低于该置信度的识别结果不参与拼接
+        """
+        cfg = STITCH_CONFIG
+        self.min_overlap = min_overlap or cfg['min_overlap']
+        self.tolerance = cfg['tolerance'] if tolerance is None else tolerance
+        self.min_confidence = cfg['min_confidence'] if min_confidence is None else min_confidence
+
+    def _align(self, base: _Segment, segment: _Segment) -> Optional[tuple]:
+        """
+        找到 segment 相对 base 的偏移
+
+        Returns:
+            (偏移, 是否由日期确定)，无法对齐时为None
+        """
+        offsets, overlap, rmse = alignment_errors(base.ohlc, segment.ohlc)
+        both = np.vstack([base.ohlc, segment.ohlc])
+        scale = max(float(both[:, 1].max() - both[:, 2].min()), 1e-9)
+        error = rmse / scale
+
+        # 日期：第一个相同日期确定偏移，再用OHLC验证（识别结果的日期可能是按序号生成的）
+        if base.dated and segment.dated:
+            index = {d: i for i, d in enumerate(base.dates) if d}
+            for j, d in enumerate(segment.dates):
+                if d in index:
+                    k = index[d] - j
+                    if error[k + len(segment) - 1] <= self.tolerance:
+                        return k, True
+                    break
+
+        # OHLC互相关：误差在容差内的偏移中取重叠最多的
+        ok = (overlap >= min(self.min_overlap, len(base), len(segment))) & (error <= self.tolerance)
+        if not ok.any():
+            return None
+        candidates = np.flatnonzero(ok)
+        best = candidates[np.lexsort((error[candidates], -overlap[candidates]))[0]]
+        return int(offsets[best]), False
+
+    @staticmethod
+    def _merge(base: _Segment, segment: _Segment, k: int, by_date: bool):
+        """把 segment 按偏移 k 合并进 base，重叠部分保留置信度较高的一方"""
+        n, m = len(base), len(segment)
+        start = min(0, k)
+        length = max(n, k + m) - start
+        a = np.arange(n) - start            # base 在新序列中的位置
+        b = np.arange(m) + k - start        # segment 在新序列中的位置
+
+        ohlc = np.full((length, 4), np.nan)
+        volume = np.full(length, np.nan)
+        confidence = np.full(length, -1.0)
+        dates: List[Optional[str]] = [None] * length
+
+        ohlc[a], volume[a], confidence[a] = base.ohlc, base.volume, base.confidence
+        for i, d in zip(a, base.dates):
+            dates[i] = d
+        take = segment.confidence > confidence[b]
+        ohlc[b[take]] = segment.ohlc[take]
+        volume[b[take]] = segment.volume[take]
+        confidence[b[take]] = segment.confidence[take]
+        for i, d, t in zip(b, segment.dates, take):
+            if t or dates[i] is None:
+                dates[i] = d
+
+        base.ohlc, base.volume, base.confidence, base.dates = ohlc, volume, confidence, dates
+        base.sources += segment.sources
+        base.dated = base.dated and segment.dated and by_date
+        base.n_input_bars += segment.n_input_bars
+
+    def _stitch_group(self, segments: List[_Segment]) -> List[_Segment]:
+        """拼接同一股票的多段序列；与其他段都对不上的段单独成为一条序列"""
+        # 长的序列先作为基准，短的截图更可能完全落在其中
+        pending = sorted(segments, key=len, reverse=True)
+        stitched = []
+        while pending:
+            base = pending.pop(0)
+            progress = True
+            while progress and pending:
+                progress = False
+                for segment in list(pending):
+                    aligned = self._align(base, segment)
+                    if aligned is not None:
+                        self._merge(base, segment, *aligned)
+                        pending.remove(segment)
+                        progress = True
+            stitched.append(base)
+        return stitched
+
+    @staticmethod
+    def _to_series(symbol: Optional[str], segment: _Segment) -> StitchedSeries:
+        dates = segment.dates
+        if not segment.dated or not all(dates):
+            # 与 _build_result 相同：按序号生成日期，最后一根为昨天
+            base_date = datetime.now()
+            dates = [(base_date - timedelta(days=len(segment) - i)).strftime('%Y-%m-%d')
+                     for i in range(len(segment))]
+        data_points = [
+            DataPoint(
+                date=date,
+                open=round(float(o), 2),
+                high=round(float(h), 2),
+                low=round(float(l), 2),
+                close=round(float(c), 2),
+                volume=None if np.isnan(v) else float(v)
+            )
+            for date, (o, h, l, c), v in zip(dates, segment.ohlc, segment.volume)
+        ]
+        return StitchedSeries(symbol=symbol, data_points=data_points, sources=segment.sources,
+                              dated=segment.dated and all(segment.dates),
+                              n_input_bars=segment.n_input_bars)
+
+    def stitch(self, results: Iterable[RecognitionResult]) -> List[StitchedSeries]:
+        """
+        拼接识别结果
+
+        Args:
+            results: 识别结果（出错、没有图形元素或置信度过低的结果被跳过；
+                     没有股票代码的结果只与其他没有股票代码的结果拼接）
+
+        Returns:
+            拼接后的序列，通常每个股票一条
+        """
+        groups: Dict[Optional[str], List[_Segment]] = {}
+        for result in results:
+            if result.error or not result.data_points or result.confidence < self.min_confidence:
+                continue
+            groups.setdefault(result.symbol, []).append(_Segment(result))
+
+        series = []
+        for symbol, segments in groups.items():
+            series += [self._to_series(symbol, s) for s in self._stitch_group(segments)]
+        return series
+
+
+def stitch(results: Iterable[RecognitionResult], **kwargs) -> List[StitchedSeries]:
+    """使用默认配置拼接识别结果（参数见 SeriesStitcher）"""
+    return SeriesStitcher(**kwargs).stitch(results)
+
+
+def to_dataframe(series: List[StitchedSeries]) -> pd.DataFrame:
+    """拼接结果展平为每根图形元素一行（symbol, date, open, high, low, close, volume）"""
+    rows = [{
+        'symbol': s.symbol,
+        'date': dp.date,
+        'open': dp.open,
+        'high': dp.high,
+        'low': dp.low,
+        'close': dp.close,
+        'volume': dp.volume
+    } for s in series for dp in s.data_points]
+    return pd.DataFrame(rows, columns=['symbol', 'date', 'open', 'high', 'low', 'close', 'volume'])
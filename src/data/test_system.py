@@ -102,16 +102,63 @@ def test_utils():
         assert is_valid == True
         print("✓ 数据验证功能正常")
         
+        # 逐根标志位
+        from validation import validate_data_points, FLAG_HIGH_BELOW_LOW, FLAG_PRICE_JUMP
+        data_points.append(DataPoint(date='2024-01-02', open=103, high=90, low=95, close=180))
+        report = validate_data_points(data_points)
+        assert report.flags[0] == 0
+        assert report.flags[1] & FLAG_HIGH_BELOW_LOW and report.flags[1] & FLAG_PRICE_JUMP
+        assert report.n_invalid == 1
+        print(f"✓ 逐根校验正常: {report.counts}")
+        
         return True
     except Exception as e:
         print(f"✗ 工具函数测试失败: {e}")
         return False
 
 
+def test_scoring():
+    """测试准确度评分"""
+    print("\n" + "=" * 50)
+    print("测试5: 准确度评分")
+    print("=" * 50)
+    
+    try:
+        from chart_recognizer import DataPoint, RecognitionResult
+        from scoring import score_result, aggregate_scores
+        
+        truth = [
+            {'x_center': 100 + i * 20, 'open': 10.0, 'high': 12.0, 'low': 9.0, 'close': 11.0}
+            for i in range(5)
+        ]
+        # 漏掉第2根，并多识别出一根噪声
+        predicted = [
+            DataPoint(date='', open=10.0, high=12.0, low=9.0, close=11.5, x_center=t['x_center'] + 1)
+            for i, t in enumerate(truth) if i != 1
+        ]
+        predicted.append(DataPoint(date='', open=1, high=1, low=1, close=1, x_center=500))
+        result = RecognitionResult(image_name='test.png', data_points=predicted, confidence=1.0)
+        
+        report = score_result(result, truth)
+        assert report.n_matched == 4
+        assert report.metrics['open']['mae'] == 0.0
+        assert report.metrics['close']['mae'] == 0.5
+        
+        summary = aggregate_scores([report, report])
+        assert summary['n_matched'] == 8
+        assert summary['recall'] == 0.8
+        print("✓ 评分对齐与汇总正常")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 评分测试失败: {e}")
+        return False
+
+
 def create_test_image():
     """创建测试用图形"""
     print("\n" + "=" * 50)
-    print("测试5: 创建测试图片")
+    print("测试6: 创建测试图片")
     print("=" * 50)
     
     try:
@@ -175,7 +222,7 @@ def create_test_image():
 def test_recognition(image_path):
     """测试识别功能"""
     print("\n" + "=" * 50)
-    print("测试6: 识别功能")
+    print("测试7: 识别功能")
     print("=" * 50)
     
     if not image_path or not Path(image_path).exists():
@@ -206,6 +253,938 @@ def test_recognition(image_path):
         return False
 
 
+def _demo_chart(seed: int = 0):
+    """生成演示图形（demo.py），返回 (BGR数组, 真实OHLC)"""
+    import tempfile
+    import cv2
+    import numpy as np
+    from demo import create_demo_chart_image
+    
+    np.random.seed(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path, prices = create_demo_chart_image(str(Path(tmp) / 'demo_chart.png'))
+        return cv2.imread(path), prices
+
+
+def test_incremental_recovery():
+    """测试增量识别在出错后恢复"""
+    print("\n" + "=" * 50)
+    print("测试8: 增量识别出错后恢复")
+    print("=" * 50)
+    
+    try:
+        import numpy as np
+        from chart_recognizer import ChartRecognizer
+        
+        recognizer = ChartRecognizer(use_ocr=False)
+        img, _ = _demo_chart()
+        
+        good, state = recognizer.recognize_incremental(img)
+        assert not good.error and good.data_points
+        
+        # 不支持的帧（float32）识别失败，状态中没有帧
+        bad, state = recognizer.recognize_incremental(img.astype(np.float32), state)
+        assert bad.error and state.frame is None
+        
+        # 下一帧正常识别，之后的帧走增量路径
+        for _ in range(2):
+            result, state = recognizer.recognize_incremental(img, state)
+            assert not result.error, result.error
+            assert len(result.data_points) == len(good.data_points)
+        print("✓ 出错后的下一帧正常识别")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 增量识别测试失败: {e}")
+        return False
+
+
+def test_pipeline_parity():
+    """测试分阶段流水线与顺序识别结果一致"""
+    print("\n" + "=" * 50)
+    print("测试9: 流水线与顺序识别一致")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        import cv2
+        from PIL import Image
+        from chart_recognizer import ChartRecognizer
+        from pipeline import RecognitionPipeline
+        
+        recognizer = ChartRecognizer(use_ocr=False)
+        img, _ = _demo_chart()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / 'chart.png')
+            cv2.imwrite(path, img)
+            items = [
+                path,
+                (img, 'array'),
+                (Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)), 'pil'),
+                (cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), 'gray'),
+                (cv2.cvtColor(img, cv2.COLOR_BGR2BGRA), 'bgra'),
+                str(Path(tmp) / 'missing.png'),
+            ]
+            sequential = list(recognizer.iter_recognize(items))
+            staged = list(RecognitionPipeline(recognizer, cpu_workers=2).run(items))
+        
+        assert len(staged) == len(sequential) == len(items)
+        for a, b in zip(sequential, staged):
+            assert a.image_name == b.image_name
+            assert a.error == b.error, (a.image_name, a.error, b.error)
+            assert [dp.to_dict() for dp in a.data_points] == [dp.to_dict() for dp in b.data_points], a.image_name
+        assert sequential[-1].error and all(not r.error for r in sequential[:-1])
+        print(f"✓ {len(items)} 种输入结果一致")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 流水线测试失败: {e}")
+        return False
+
+
+def test_confidence_axis_gate():
+    """测试没有识别出价格坐标轴时置信度低于中等阈值"""
+    print("\n" + "=" * 50)
+    print("测试10: 置信度模型")
+    print("=" * 50)
+    
+    try:
+        from chart_recognizer import ChartRecognizer
+        from config import CONFIDENCE_THRESHOLDS
+        from confidence import combine_features
+        
+        medium = CONFIDENCE_THRESHOLDS['medium']
+        features = {'tick_fit': 1.0, 'ocr': None, 'spacing': 1.0, 'width': 1.0, 'fill': 1.0, 'consistency': 1.0}
+        assert combine_features(features, 20) == 1.0
+        for tick_fit in (0.0, None):
+            assert combine_features({**features, 'tick_fit': tick_fit}, 20) < medium
+        
+        # 不使用OCR时价格来自默认范围
+        img, _ = _demo_chart()
+        result = ChartRecognizer(use_ocr=False).recognize(img)
+        assert result.data_points and result.quality['tick_fit'] == 0.0
+        assert result.confidence < medium, result.confidence
+        print(f"✓ 未识别坐标轴时置信度 {result.confidence} < {medium}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 置信度测试失败: {e}")
+        return False
+
+
+def test_cascade():
+    """测试分级识别在完整流程不会更好时不升级"""
+    print("\n" + "=" * 50)
+    print("测试11: 分级识别")
+    print("=" * 50)
+    
+    try:
+        from chart_recognizer import ChartRecognizer
+        
+        img, _ = _demo_chart()
+        plain = ChartRecognizer(use_ocr=False).recognize(img)
+        recognizer = ChartRecognizer(use_ocr=False, cascade=True)
+        result = recognizer.recognize(img)
+        
+        # 没有OCR时两级只差坐标轴识别，快速结果直接返回
+        assert recognizer.stats['fast'] == 1 and recognizer.stats['escalated'] == 0, recognizer.stats
+        assert [dp.to_dict() for dp in result.data_points] == [dp.to_dict() for dp in plain.data_points]
+        print(f"✓ 不使用OCR时不升级: {recognizer.stats}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 分级识别测试失败: {e}")
+        return False
+
+
+def test_ocr_service_cropping():
+    """测试OCR服务按后端的 full_image 只提交坐标轴区域"""
+    print("\n" + "=" * 50)
+    print("测试12: OCR服务")
+    print("=" * 50)
+    
+    try:
+        from chart_recognizer import ChartRecognizer
+        from ocr_backends import DigitTemplateOCR
+        from ocr_service import OCRService
+        
+        shapes = []
+        
+        class RecordingOCR(DigitTemplateOCR):
+            def ocr(self, img, cls=True):
+                shapes.append(img.shape)
+                return super().ocr(img, cls)
+        
+        img, _ = _demo_chart()
+        with OCRService(num_engines=1, engine_factory=RecordingOCR) as service:
+            assert service.full_image is False
+            result = ChartRecognizer(ocr_service=service).recognize(img)
+        
+        assert shapes and all(s != img.shape for s in shapes), shapes
+        assert result.quality['tick_fit'] > 0, result.quality
+        print(f"✓ 只提交坐标轴区域（{len(shapes)} 次OCR），tick_fit={result.quality['tick_fit']}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ OCR服务测试失败: {e}")
+        return False
+
+
+def test_live():
+    """测试实时识别跳过未变化的帧"""
+    print("\n" + "=" * 50)
+    print("测试13: 实时识别")
+    print("=" * 50)
+    
+    try:
+        import live
+        from chart_recognizer import ChartRecognizer
+        
+        recognizer = ChartRecognizer(use_ocr=False)
+        img, _ = _demo_chart()
+        
+        # 自带变化检测：相同的帧只识别一次
+        frames = iter([img, img.copy(), img.copy()])
+        updates = []
+        runner = live.LiveRecognizer(recognizer, lambda: next(frames, None), fps=50,
+                                     on_update=lambda result, bars: updates.append(bars))
+        runner.run(duration=0.5)
+        assert runner.stats['recognized'] == 1 and runner.stats['unchanged'] >= 2, runner.stats
+        assert len(updates) == 1 and len(updates[0]) == len(recognizer.recognize(img).data_points)
+        
+        # capture 自己做变化检测（CaptureSession.poll）时不再比较帧
+        def fail(*args, **kwargs):
+            raise AssertionError("frame_changed 不应被调用")
+        original, live.frame_changed = live.frame_changed, fail
+        try:
+            frames = iter([img])
+            runner = live.LiveRecognizer(recognizer, lambda: next(frames, None), fps=50,
+                                         detect_changes=False)
+            runner.run(duration=0.3)
+        finally:
+            live.frame_changed = original
+        assert runner.stats['recognized'] == 1, runner.stats
+        print(f"✓ 未变化的帧被跳过: {runner.stats}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 实时识别测试失败: {e}")
+        return False
+
+
+def test_serialization():
+    """测试结果序列化往返一致"""
+    print("\n" + "=" * 50)
+    print("测试14: 结果序列化")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        import numpy as np
+        from chart_recognizer import DataPoint, RecognitionResult
+        from serialization import (MSGPACK_AVAILABLE, ZSTD_AVAILABLE, dumps_json,
+                                   iter_results, write_results)
+        
+        results = [RecognitionResult(
+            image_name=f'图{i}.png', symbol='600000', confidence=0.9,
+            quality={'ocr': np.float32(0.5)},     # numpy 标量也能序列化
+            data_points=[DataPoint(date='2024-01-01', open=1.25, high=2.0, low=0.5, close=1.5,
+                                   x_center=np.int64(10))]
+        ) for i in range(3)]
+        expected = [{**r.to_dict(), 'quality': {'ocr': 0.5},
+                     'data_points': [{**r.data_points[0].to_dict(), 'x_center': 10}]} for r in results]
+        
+        assert b', ' not in dumps_json(expected[0]) and b'\n' in dumps_json(expected[0], indent=2)
+        
+        cases = [('json', False, None), ('json', True, None), ('jsonl', True, None), ('jsonl', True, 'gzip')]
+        if MSGPACK_AVAILABLE:
+            cases.append(('msgpack', True, None))
+        if ZSTD_AVAILABLE:
+            cases.append(('jsonl', True, 'zstd'))
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt, compact, compress in cases:
+                path = write_results(iter(results), tmp, fmt, compact=compact, compress=compress)
+                assert list(iter_results(path)) == expected, (fmt, compact, compress)
+                print(f"✓ {path.name} 往返一致")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 序列化测试失败: {e}")
+        return False
+
+
+def test_sqlite_store():
+    """测试SQLite结果库的增量更新和图片指纹"""
+    print("\n" + "=" * 50)
+    print("测试15: SQLite结果库")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        import cv2
+        from chart_recognizer import ChartRecognizer, DataPoint, RecognitionResult
+        from image_io import content_hash
+        from pipeline import RecognitionPipeline
+        from sqlite_store import SqliteStore
+        
+        def make_result(closes, symbol='600000'):
+            return RecognitionResult(
+                image_name='a.png', symbol=symbol, confidence=0.9,
+                data_points=[DataPoint(date=f'2024-01-{i + 1:02d}', open=1.0, high=3.0, low=0.5,
+                                       close=c, x_center=i) for i, c in enumerate(closes)])
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / 'results.db'
+            
+            with SqliteStore(db) as store:
+                store.write(make_result([1.5, 2.0, 2.5]), image_hash='h1')
+            assert store.stats['rows_changed'] == 4, store.stats     # 1张图片 + 3根
+            
+            # 重复写入相同结果：不改动任何行；没有指纹时保留已有指纹
+            with SqliteStore(db) as store:
+                store.write(make_result([1.5, 2.0, 2.5]))
+            assert store.stats['rows_changed'] == 0, store.stats
+            
+            # 只有变化的行被更新，变少的图形元素被删除
+            with SqliteStore(db) as store:
+                store.write(make_result([1.5, 2.2]))
+                assert store.find_image('h1')['n_bars'] == 2
+                df = store.query_bars('600000', start='2024-01-02')
+            assert store.stats['rows_changed'] == 3, store.stats     # 图片 + 1根更新 + 1根删除
+            assert df['close'].tolist() == [2.2], df
+            print("✓ 重复写入不改动，变化的行单独更新，已有指纹不被覆盖")
+            
+            # 指纹来自识别时已经读入的文件内容
+            img, _ = _demo_chart()
+            path = Path(tmp) / 'chart.png'
+            cv2.imwrite(str(path), img)
+            expected = content_hash(path.read_bytes())
+            recognizer = ChartRecognizer(use_ocr=False)
+            for stream in (recognizer.iter_recognize([path], with_hash=True),
+                           recognizer.iter_recognize([path], max_workers=2, with_hash=True),
+                           RecognitionPipeline(recognizer, with_hash=True).run([path])):
+                assert [r.image_hash for r in stream] == [expected]
+            assert next(recognizer.iter_recognize([path])).image_hash is None
+            print(f"✓ 图片指纹: {expected}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ SQLite结果库测试失败: {e}")
+        return False
+
+
+def test_watch_names():
+    """测试目录监控的结果以相对路径命名"""
+    print("\n" + "=" * 50)
+    print("测试16: 目录监控")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        import cv2
+        import cli
+        from chart_recognizer import ChartRecognizer
+        from serialization import iter_results
+        from watcher import DirectoryWatcher
+        
+        class OneShotWatcher(DirectoryWatcher):
+            """只交出第一批图片"""
+            def __init__(self, directory, recursive=False):
+                super().__init__(directory, recursive=recursive, debounce=0, poll_interval=0.05,
+                                 use_inotify=False)
+            
+            def watch(self):
+                for paths in super().watch():
+                    yield paths
+                    return
+        
+        img, _ = _demo_chart()
+        with tempfile.TemporaryDirectory() as tmp:
+            screenshots = Path(tmp) / 'screenshots'
+            for sub in ('a', 'b'):
+                (screenshots / sub).mkdir(parents=True)
+                cv2.imwrite(str(screenshots / sub / 'chart.png'), img)
+            
+            original, cli.DirectoryWatcher = cli.DirectoryWatcher, OneShotWatcher
+            try:
+                cli.watch_directory(ChartRecognizer(use_ocr=False), screenshots, tmp,
+                                    ['jsonl'], recursive=True)
+            finally:
+                cli.DirectoryWatcher = original
+            
+            names = sorted(r['image_name'] for r in iter_results(Path(tmp) / 'results.jsonl'))
+            assert names == ['a/chart.png', 'b/chart.png'], names
+            print(f"✓ 子目录中的同名图片分别记录: {names}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 目录监控测试失败: {e}")
+        return False
+
+
+def test_adaptive_resolution():
+    """测试自适应降采样与原分辨率结果一致"""
+    print("\n" + "=" * 50)
+    print("测试17: 自适应分辨率")
+    print("=" * 50)
+    
+    try:
+        import cv2
+        from chart_recognizer import ChartRecognizer
+        from scoring import accuracy_holds, score_corpus
+        
+        img, _ = _demo_chart()
+        large = cv2.resize(img, None, fx=4, fy=4, interpolation=cv2.INTER_NEAREST)
+        adaptive = ChartRecognizer(use_ocr=False, adaptive_resolution=True)
+        scale = adaptive._choose_scale(large)
+        assert scale < 1.0, scale
+        
+        # 以原分辨率的识别结果为基准评分
+        full = ChartRecognizer(use_ocr=False).recognize(large)
+        _, summary = score_corpus([(adaptive.recognize(large), full.data_points)])
+        assert accuracy_holds(summary), summary
+        print(f"✓ 缩放比例 {scale:.2f}，召回率 {summary['recall']}，平均相对误差 {summary['mape']}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 自适应分辨率测试失败: {e}")
+        return False
+
+
+def test_in_memory_inputs():
+    """测试内存中的图片输入与文件输入结果一致"""
+    print("\n" + "=" * 50)
+    print("测试18: 内存图片输入")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        import cv2
+        from PIL import Image
+        from chart_recognizer import ChartRecognizer
+        
+        recognizer = ChartRecognizer(use_ocr=False)
+        img, _ = _demo_chart()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'chart.png'
+            cv2.imwrite(str(path), img)
+            expected = recognizer.recognize(path)
+            data = path.read_bytes()
+        assert expected.image_name == 'chart.png' and expected.data_points
+        
+        pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        for image, name in ((img, 'array'), (data, 'bytes'), (pil, 'array')):
+            result = recognizer.recognize(image)
+            assert result.image_name == name and result.data_points == expected.data_points, name
+        
+        assert recognizer.recognize(b'not an image').error == "无法解码图片"
+        print(f"✓ 数组、bytes、PIL图像与文件识别结果一致（{len(expected.data_points)} 根）")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 内存图片输入测试失败: {e}")
+        return False
+
+
+def test_capture_profiles():
+    """测试截图配置的保存、加载和只截取图表主体"""
+    print("\n" + "=" * 50)
+    print("测试19: 截图配置")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        from profiles import CaptureProfile, load_profiles, save_profiles
+        
+        img, _ = _demo_chart()
+        height, width = img.shape[:2]
+        profile = CaptureProfile('main', (0, 0, width, height), layout={'chart_right': 0.9},
+                                 calibration={'price_coords': [[100, 200.0], [500, 100.0]],
+                                              'symbol': '600519'})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / 'profiles.json')
+            save_profiles({'main': profile}, path)
+            assert load_profiles(path) == {'main': profile}
+        
+        # 标定后不使用OCR；只截取图表主体时价格不变
+        full = profile.create_recognizer().recognize(img)
+        assert full.symbol == '600519' and full.data_points and not full.error
+        plot = profile.plot_only()
+        x, y, w, h = plot.region
+        cropped = plot.create_recognizer().recognize(img[y:y + h, x:x + w])
+        assert [(dp.open, dp.high, dp.low, dp.close) for dp in cropped.data_points] == \
+            [(dp.open, dp.high, dp.low, dp.close) for dp in full.data_points]
+        print(f"✓ 图表主体区域 {plot.region}，{len(cropped.data_points)} 根与完整截图一致")
+        
+        for bad in ({'region': (0, 0, 0, 10)}, {'region': (0, 0, 10, 10), 'layout': {'chart_mid': 0.5}}):
+            try:
+                CaptureProfile('bad', **bad)
+                raise AssertionError(f"应拒绝无效配置: {bad}")
+            except ValueError:
+                pass
+        
+        return True
+    except Exception as e:
+        print(f"✗ 截图配置测试失败: {e}")
+        return False
+
+
+def test_thread_safety():
+    """测试多线程共享同一个识别器"""
+    print("\n" + "=" * 50)
+    print("测试20: 多线程识别")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        from concurrent.futures import ThreadPoolExecutor
+        from chart_recognizer import ChartRecognizer
+        from config import DEBUG_CONFIG
+        
+        images = [(_demo_chart(seed)[0], f'chart{seed}.png') for seed in range(4)] * 3
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            original, DEBUG_CONFIG['debug_output_dir'] = DEBUG_CONFIG['debug_output_dir'], tmp
+            try:
+                recognizer = ChartRecognizer(use_ocr=False, debug=True, cascade=True)
+                expected = [recognizer.recognize(img, name).data_points for img, name in images]
+                with ThreadPoolExecutor(max_workers=4) as pool:
+                    results = list(pool.map(lambda item: recognizer.recognize(*item), images))
+                debug_files = list(Path(tmp).iterdir())
+            finally:
+                DEBUG_CONFIG['debug_output_dir'] = original
+        
+        assert [r.data_points for r in results] == expected
+        assert recognizer.stats['fast'] == 2 * len(images), recognizer.stats
+        # 每次调用的调试图片（快速流程只保存检测结果）分别命名，不会互相覆盖
+        assert len(debug_files) == 2 * len(images), len(debug_files)
+        print(f"✓ {len(images)} 张图片并发识别结果与顺序识别一致，调试图片 {len(debug_files)} 张")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 多线程识别测试失败: {e}")
+        return False
+
+
+def test_digit_ocr():
+    """测试内置数字识别器和后端回退"""
+    print("\n" + "=" * 50)
+    print("测试21: 数字识别器")
+    print("=" * 50)
+    
+    try:
+        import cv2
+        import numpy as np
+        from ocr_backends import DigitTemplateOCR, FallbackOCR, OCRBackend
+        
+        labels = ['123.45', '-6.70', '8.9', '09:30']
+        img = np.full((30 * len(labels) + 10, 200, 3), 255, dtype=np.uint8)
+        for i, text in enumerate(labels):
+            cv2.putText(img, text, (10, 30 * i + 28), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                        (60, 60, 60), 1, cv2.LINE_AA)
+        # 彩色实体不是文字
+        img[5:100, 150:160] = (0, 0, 255)
+        
+        digits = DigitTemplateOCR()
+        lines = digits.ocr(img)[0]
+        assert [text for _, (text, _) in lines] == labels, lines
+        assert [box[0][1] // 30 for box, _ in lines] == list(range(len(labels)))
+        assert digits.ocr(np.full((40, 200, 3), 255, dtype=np.uint8)) == [None]
+        print(f"✓ 识别刻度文字: {[text for _, (text, _) in lines]}")
+        
+        # 数字识别器没有结果时交给下一个后端
+        class TitleOCR(OCRBackend):
+            def ocr(self, img, cls=True):
+                return [[[[[0, 0], [1, 0], [1, 1], [0, 1]], ('浦发银行', 0.99)]]]
+        
+        fallback = FallbackOCR([digits, TitleOCR()])
+        assert fallback.ocr(img) == [lines]
+        assert fallback.ocr(np.full((40, 200, 3), 255, dtype=np.uint8))[0][0][1][0] == '浦发银行'
+        assert not fallback.thread_safe and fallback.full_image is False
+        print("✓ 回退链")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 数字识别器测试失败: {e}")
+        return False
+
+
+def test_ocr_batching():
+    """测试OCR服务把并发请求合并成一次识别"""
+    print("\n" + "=" * 50)
+    print("测试22: OCR请求合并")
+    print("=" * 50)
+    
+    try:
+        import cv2
+        import numpy as np
+        from ocr_backends import DigitTemplateOCR
+        from ocr_service import OCRService
+        
+        crops = []
+        for text in ('123.45', '-6.70', '8.9', '09:30'):
+            crop = np.full((30, 120, 3), 255, dtype=np.uint8)
+            cv2.putText(crop, text, (10, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (60, 60, 60), 1, cv2.LINE_AA)
+            crops.append(crop)
+        expected = [DigitTemplateOCR().ocr(crop) for crop in crops]
+        
+        with OCRService(num_engines=1, max_batch=8, max_wait_ms=500,
+                        engine_factory=DigitTemplateOCR) as service:
+            futures = [service.submit(crop) for crop in crops]
+            results = [f.result(timeout=10) for f in futures]
+        
+        # 拆分回各个请求的结果（坐标相对各自的图片）与单独识别相同
+        assert results == expected, results
+        assert service.stats == {'requests': 4, 'batches': 1, 'ocr_calls': 1}, service.stats
+        print(f"✓ {service.stats}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ OCR请求合并测试失败: {e}")
+        return False
+
+
+def test_async_recognizer():
+    """测试asyncio识别接口"""
+    print("\n" + "=" * 50)
+    print("测试23: 异步识别")
+    print("=" * 50)
+    
+    try:
+        import asyncio
+        import tempfile
+        import cv2
+        from async_recognizer import AsyncChartRecognizer
+        from chart_recognizer import ChartRecognizer
+        
+        recognizer = ChartRecognizer(use_ocr=False)
+        img, _ = _demo_chart()
+        expected = recognizer.recognize(img).data_points
+        
+        async def run(tmp):
+            async with AsyncChartRecognizer(recognizer, max_workers=2, max_concurrency=2) as arec:
+                single = await arec.recognize(Path(tmp) / 'a.png')
+                ordered = [r async for r in arec.map(
+                    [(img, 'x'), Path(tmp) / 'missing.png', (Path(tmp) / 'b.png', 'y')], ordered=True)]
+                listed = [r async for r in arec.iter_directory(tmp)]
+                async for _ in arec.map([img] * 10):
+                    break   # 提前退出时剩余任务被取消
+            return single, ordered, listed
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('a.png', 'b.png'):
+                cv2.imwrite(str(Path(tmp) / name), img)
+            single, ordered, listed = asyncio.run(run(tmp))
+        
+        assert single.image_name == 'a.png' and single.data_points == expected
+        assert [r.image_name for r in ordered] == ['x', 'missing.png', 'y']
+        assert ordered[1].error == "无法读取图片" and ordered[2].data_points == expected
+        assert sorted(r.image_name for r in listed) == ['a.png', 'b.png']
+        print("✓ recognize / map / iter_directory 结果与同步识别一致")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 异步识别测试失败: {e}")
+        return False
+
+
+def test_server():
+    """测试本地HTTP识别服务"""
+    print("\n" + "=" * 50)
+    print("测试24: HTTP识别服务")
+    print("=" * 50)
+    
+    try:
+        import json
+        import tempfile
+        import threading
+        import urllib.error
+        import urllib.request
+        import cv2
+        from chart_recognizer import ChartRecognizer
+        from server import RecognitionServer
+        
+        recognizer = ChartRecognizer(use_ocr=False)
+        img, _ = _demo_chart()
+        expected = recognizer.recognize(img, 'chart.png').to_dict()
+        
+        def request(url, data=None, content_type='image/png'):
+            req = urllib.request.Request(url, data=data, headers={'Content-Type': content_type})
+            try:
+                with urllib.request.urlopen(req, timeout=30) as response:
+                    return response.status, json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                return e.code, json.loads(e.read())
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'chart.png'
+            cv2.imwrite(str(path), img)
+            server = RecognitionServer(recognizer, host='127.0.0.1', port=0, root=tmp)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            base = f'http://127.0.0.1:{server.server_address[1]}'
+            try:
+                status, body = request(f'{base}/recognize?name=chart.png', path.read_bytes())
+                assert status == 200 and body == expected, (status, body.get('error'))
+                
+                def by_path(p):
+                    return request(f'{base}/recognize', json.dumps({'path': str(p)}).encode(),
+                                   'application/json')
+                
+                assert by_path(path) == (200, expected)
+                assert by_path(Path(tmp) / 'missing.png')[0] == 404
+                assert by_path(Path(tmp).parent / 'outside.png')[0] == 403
+                assert request(f'{base}/recognize', b'{}', 'application/json')[0] == 400
+                assert request(f'{base}/recognize', b'{"path": 123}', 'application/json')[0] == 400
+                
+                status, health = request(f'{base}/health')
+                assert status == 200 and health['stats']['completed'] == 2, health
+            finally:
+                server.shutdown()
+                server.server_close()
+            
+            # 线程池已关闭等识别异常时返回500并计入失败
+            status, body = server.recognize(path.read_bytes(), 'chart.png')
+            assert status == 500 and 'error' in body and server.stats['failed'] == 1, (status, body)
+        print(f"✓ 上传图片和按路径识别，健康检查: {health['stats']}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ HTTP识别服务测试失败: {e}")
+        return False
+
+
+def test_discovery():
+    """测试图片文件发现"""
+    print("\n" + "=" * 50)
+    print("测试25: 图片文件发现")
+    print("=" * 50)
+    
+    try:
+        import os
+        import tempfile
+        from discovery import iter_images
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel in ('b.PNG', 'a.jpg', 'notes.txt', 'sub/c.png', 'sub/debug_1.png',
+                        'sub/deep/d.bmp', 'debug/e.png'):
+                path = Path(tmp) / rel
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b'')
+            try:
+                os.symlink(tmp, Path(tmp) / 'sub' / 'loop')   # 指向上级目录的链接不会造成循环
+            except OSError:
+                pass
+            
+            def found(**kwargs):
+                return [Path(p).relative_to(tmp).as_posix() for p in iter_images(tmp, sort=True, **kwargs)]
+            
+            assert found() == ['a.jpg', 'b.PNG']
+            assert found(recursive=True) == ['a.jpg', 'b.PNG', 'debug/e.png', 'sub/c.png',
+                                             'sub/debug_1.png', 'sub/deep/d.bmp']
+            assert found(recursive=True, exclude=['debug*']) == ['a.jpg', 'b.PNG', 'sub/c.png', 'sub/deep/d.bmp']
+            assert found(recursive=True, include=['sub/*']) == ['sub/c.png', 'sub/debug_1.png', 'sub/deep/d.bmp']
+            assert sorted(iter_images(tmp, recursive=True)) == sorted(iter_images(tmp, recursive=True, sort=True))
+        print("✓ 递归、排序、include/exclude 与扩展名过滤")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 图片文件发现测试失败: {e}")
+        return False
+
+
+def test_image_io():
+    """测试图片读取和解码即缩小"""
+    print("\n" + "=" * 50)
+    print("测试26: 图片读取")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        import cv2
+        import numpy as np
+        from chart_recognizer import ChartRecognizer
+        from image_io import PrefetchReader, read_image
+        
+        img, _ = _demo_chart()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / '图表.png'       # 中文路径
+            cv2.imwrite(str(path), img)
+            (Path(tmp) / 'empty.png').write_bytes(b'')
+            
+            assert np.array_equal(read_image(path), img)
+            assert np.array_equal(read_image(path, use_mmap=False), img)
+            assert read_image(path, reduce=2).shape == (img.shape[0] // 2, img.shape[1] // 2, 3)
+            assert read_image(Path(tmp) / 'missing.png') is None
+            assert read_image(Path(tmp) / 'empty.png') is None
+            
+            items = [path, Path(tmp) / 'missing.png', (img, 'array')]
+            with PrefetchReader(items, reduce=2) as reader:
+                loaded = [(name, None if im is None else im.shape, reduce) for name, im, reduce, _ in reader]
+            assert loaded == [('图表.png', (400, 600, 3), 2), ('missing.png', None, 2),
+                              ('array', img.shape, 1)], loaded
+            
+            # 解码即缩小时 x_center 仍按原图坐标
+            full = ChartRecognizer(use_ocr=False).recognize(path)
+            reduced = ChartRecognizer(use_ocr=False, decode_reduce=2).recognize(path)
+        assert len(reduced.data_points) == len(full.data_points)
+        assert all(abs(a.x_center - b.x_center) <= 2 for a, b in zip(full.data_points, reduced.data_points))
+        print(f"✓ 内存映射/一次性读取一致，解码即缩小 {img.shape[:2]} -> {loaded[0][1][:2]}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 图片读取测试失败: {e}")
+        return False
+
+
+def test_stitching():
+    """测试重叠截图的序列拼接"""
+    print("\n" + "=" * 50)
+    print("测试27: 序列拼接")
+    print("=" * 50)
+    
+    try:
+        import numpy as np
+        from chart_recognizer import DataPoint, RecognitionResult
+        from stitching import stitch, to_dataframe
+        
+        rng = np.random.default_rng(0)
+        closes = 100 + np.cumsum(rng.normal(0, 2, 30))
+        bars = [DataPoint(date=f'2024-01-{i + 1:02d}', open=round(c - 1, 2), high=round(c + 2, 2),
+                          low=round(c - 3, 2), close=round(c, 2)) for i, c in enumerate(closes)]
+        ohlc = [(dp.open, dp.high, dp.low, dp.close) for dp in bars]
+        
+        def window(name, start, end, symbol='600000', dated=True, confidence=0.9):
+            points = [DataPoint(date=dp.date if dated else '', open=dp.open, high=dp.high,
+                                low=dp.low, close=dp.close) for dp in bars[start:end]]
+            return RecognitionResult(image_name=name, symbol=symbol, confidence=confidence,
+                                     data_points=points)
+        
+        # 按日期对齐（输入顺序打乱）
+        series = stitch([window('b', 10, 25), window('c', 20, 30), window('a', 0, 15),
+                         window('low', 5, 8, confidence=0.1), window('other', 0, 5, symbol='000001')])
+        by_symbol = {s.symbol: s for s in series}
+        merged = by_symbol['600000']
+        assert [(dp.open, dp.high, dp.low, dp.close) for dp in merged.data_points] == ohlc
+        assert [dp.date for dp in merged.data_points] == [dp.date for dp in bars] and merged.dated
+        assert merged.n_duplicates == 10 and sorted(merged.sources) == ['a', 'b', 'c']
+        assert len(by_symbol['000001'].data_points) == 5
+        
+        # 没有日期时按OHLC互相关对齐
+        undated = stitch([window('a', 0, 15, dated=False), window('b', 12, 30, dated=False)])
+        assert len(undated) == 1 and not undated[0].dated
+        assert [(dp.open, dp.high, dp.low, dp.close) for dp in undated[0].data_points] == ohlc
+        
+        df = to_dataframe(series)
+        assert len(df) == 35 and list(df.columns[:3]) == ['symbol', 'date', 'open']
+        print(f"✓ 3张截图拼接为 {len(merged.data_points)} 根，去掉重复 {merged.n_duplicates} 根")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 序列拼接测试失败: {e}")
+        return False
+
+
+def test_excel_export():
+    """测试流式Excel输出的分表和换表"""
+    print("\n" + "=" * 50)
+    print("测试28: Excel输出")
+    print("=" * 50)
+    
+    try:
+        import tempfile
+        from openpyxl import load_workbook
+        from chart_recognizer import DataPoint, RecognitionResult
+        from exporters import CSV_COLUMNS, ExcelSink
+        
+        def make_result(name, symbol, n):
+            return RecognitionResult(image_name=name, symbol=symbol, confidence=0.9, data_points=[
+                DataPoint(date=f'2024-01-{i + 1:02d}', open=1.0, high=2.0, low=0.5, close=1.5 + i)
+                for i in range(n)])
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'results.xlsx'
+            with ExcelSink(path, sheet_per_symbol=True, max_rows=4) as sink:
+                for result in (make_result('a.png', '600000', 5), make_result('b.png', 'A/B', 2),
+                               make_result('c.png', None, 1)):
+                    sink.write(result)
+            
+            book = load_workbook(path, read_only=True)
+            sheets = {ws.title: [list(row) for row in ws.iter_rows(values_only=True)]
+                      for ws in book.worksheets}
+            book.close()
+            
+            # 每个工作表最多 max_rows 行（含表头），写满后换到 _2
+            assert list(sheets) == ['600000', '600000_2', 'A_B', '未识别'], list(sheets)
+            assert all(rows[0] == CSV_COLUMNS and len(rows) <= 4 for rows in sheets.values())
+            closes = [row[6] for title in ('600000', '600000_2') for row in sheets[title][1:]]
+            assert closes == [1.5, 2.5, 3.5, 4.5, 5.5], closes
+            assert [len(rows) - 1 for rows in sheets.values()] == [3, 2, 2, 1]
+            
+            # 很长的股票名称：前缀相同、换表序号超过100时名称仍不超过31个字符且不重复
+            long_path = Path(tmp) / 'long.xlsx'
+            with ExcelSink(long_path, sheet_per_symbol=True, max_rows=2) as long_sink:
+                long_sink.write(make_result('d.png', 'L' * 40 + '1', 120))
+                long_sink.write(make_result('e.png', 'L' * 40 + '2', 1))
+            book = load_workbook(long_path, read_only=True)
+            titles = book.sheetnames
+            book.close()
+            assert len(titles) == 121 and len({t.lower() for t in titles}) == 121
+            assert max(len(t) for t in titles) == 31, max(titles, key=len)
+            
+            # 没有结果时只有表头
+            with ExcelSink(Path(tmp) / 'empty.xlsx', sheet_per_symbol=False):
+                pass
+            book = load_workbook(Path(tmp) / 'empty.xlsx', read_only=True)
+            assert [list(r) for r in book.worksheets[0].iter_rows(values_only=True)] == [CSV_COLUMNS]
+            book.close()
+        print(f"✓ 工作表: {', '.join(sheets)}（引擎 {sink.engine}）")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Excel输出测试失败: {e}")
+        return False
+
+
+def test_wick_consistency():
+    """测试影线/实体一致性特征使用未经限制的像素几何"""
+    print("\n" + "=" * 50)
+    print("测试29: 影线一致性")
+    print("=" * 50)
+    
+    try:
+        from chart_recognizer import ChartRecognizer
+        from confidence import wick_flags
+        
+        raw = [
+            {'body_top': 200, 'body_bottom': 240, 'shadow_high': 180, 'shadow_low': 260},  # 正常
+            {'body_top': 200, 'body_bottom': 240, 'shadow_high': 200, 'shadow_low': 240},  # 没有找到影线
+            {'body_top': 80, 'body_bottom': 120, 'shadow_high': 80, 'shadow_low': 150},    # 碰到图表上边界
+        ]
+        assert wick_flags(raw, (80, 640)).tolist() == [False, True, True]
+        
+        # 擦掉一根图形元素的影线：映射后的OHLC仍然自洽，但一致性分数下降
+        recognizer = ChartRecognizer(use_ocr=False)
+        img, _ = _demo_chart()
+        _, data_points_raw = recognizer._analyze(img)
+        c = next(c for c in data_points_raw
+                 if c['shadow_high'] < c['body_top'] and c['shadow_low'] > c['body_bottom'])
+        bad = img.copy()
+        x = c['x_center']
+        bad[c['shadow_high'] - 2:c['body_top'], x - 3:x + 4] = 255
+        bad[c['body_bottom']:c['shadow_low'] + 3, x - 3:x + 4] = 255
+        
+        good, broken = recognizer.recognize(img), recognizer.recognize(bad)
+        assert len(broken.data_points) == len(good.data_points)
+        assert broken.quality['consistency'] < good.quality['consistency'], (good.quality, broken.quality)
+        print(f"✓ 一致性 {good.quality['consistency']} -> {broken.quality['consistency']}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 影线一致性测试失败: {e}")
+        return False
+
+
 def main():
     """运行所有测试"""
     print("\n" + "="*50)
@@ -226,6 +1205,9 @@ def main():
     # 工具函数测试
     results.append(("工具函数", test_utils()))
     
+    # 准确度评分测试
+    results.append(("准确度评分", test_scoring()))
+    
     # 创建测试图片
     test_image = create_test_image()
     
@@ -233,6 +1215,72 @@ def main():
     if test_image:
         results.append(("识别功能", test_recognition(test_image)))
     
+    # 增量识别
+    results.append(("增量识别恢复", test_incremental_recovery()))
+    
+    # 分阶段流水线
+    results.append(("流水线一致性", test_pipeline_parity()))
+    
+    # 置信度模型
+    results.append(("置信度模型", test_confidence_axis_gate()))
+    
+    # 分级识别
+    results.append(("分级识别", test_cascade()))
+    
+    # OCR服务
+    results.append(("OCR服务", test_ocr_service_cropping()))
+    
+    # 实时识别
+    results.append(("实时识别", test_live()))
+    
+    # 结果序列化
+    results.append(("结果序列化", test_serialization()))
+    
+    # SQLite结果库
+    results.append(("SQLite结果库", test_sqlite_store()))
+    
+    # 目录监控
+    results.append(("目录监控", test_watch_names()))
+    
+    # 自适应分辨率
+    results.append(("自适应分辨率", test_adaptive_resolution()))
+    
+    # 内存图片输入
+    results.append(("内存图片输入", test_in_memory_inputs()))
+    
+    # 截图配置
+    results.append(("截图配置", test_capture_profiles()))
+    
+    # 多线程识别
+    results.append(("多线程识别", test_thread_safety()))
+    
+    # 数字识别器
+    results.append(("数字识别器", test_digit_ocr()))
+    
+    # OCR请求合并
+    results.append(("OCR请求合并", test_ocr_batching()))
+    
+    # 异步识别
+    results.append(("异步识别", test_async_recognizer()))
+    
+    # HTTP识别服务
+    results.append(("HTTP识别服务", test_server()))
+    
+    # 图片文件发现
+    results.append(("图片文件发现", test_discovery()))
+    
+    # 图片读取
+    results.append(("图片读取", test_image_io()))
+    
+    # 序列拼接
+    results.append(("序列拼接", test_stitching()))
+    
+    # Excel输出
+    results.append(("Excel输出", test_excel_export()))
+    
+    # 影线一致性
+    results.append(("影线一致性", test_wick_consistency()))
+    
     # 汇总结果
     print("\n" + "="*50)
     print("测试总结")
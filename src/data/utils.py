@@ -5,8 +5,9 @@
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import List, Tuple
-import matplotlib.pyplot as plt
+from typing import List, Tuple, Dict
+
+from validation import validate_data_points
 
 
 def visualize_chart(data_points: List, save_path: str = None, show: bool = True):
@@ -53,29 +54,13 @@ def visualize_chart(data_points: List, save_path: str = None, show: bool = True)
 
 def validate_DataPoint_data(data_points: List) -> Tuple[bool, List[str]]:
     """
-    验证图形元素数据合理性
+    验证图形元素数据合理性（逐根标志位见 validation.validate_data_points）
     
     Returns:
         (is_valid, error_messages)
     """
-    errors = []
-    
-    for i, DataPoint in enumerate(data_points):
-        # 检查价格关系
-        if DataPoint.high < DataPoint.low:
-            errors.append(f"图形元素{i}: 最高价 < 最低价")
-        
-        if DataPoint.high < DataPoint.open or DataPoint.high < DataPoint.close:
-            errors.append(f"图形元素{i}: 最高价小于开盘价或收盘价")
-        
-        if DataPoint.low > DataPoint.open or DataPoint.low > DataPoint.close:
-            errors.append(f"图形元素{i}: 最低价大于开盘价或收盘价")
-        
-        # 检查价格范围
-        if any(p <= 0 for p in [DataPoint.open, DataPoint.high, DataPoint.low, DataPoint.close]):
-            errors.append(f"图形元素{i}: 价格不能为负数或零")
-    
-    return len(errors) == 0, errors
+    report = validate_data_points(data_points)
+    return report.is_valid, report.messages()
 
 
 def resize_image(image_path: str, max_width: int = 1920, max_height: int = 1080) -> str:
@@ -272,6 +257,7 @@ def generate_report(results: List, output_file: str = 'report.html'):
                 <th>图片名称</th>
                 <th>股票代码</th>
                 <th>图形元素数量</th>
+                <th>异常图形元素</th>
                 <th>置信度</th>
                 <th>状态</th>
             </tr>
@@ -287,12 +273,14 @@ def generate_report(results: List, output_file: str = 'report.html'):
     for result in results:
         conf_class = 'high' if result.confidence > 0.8 else 'medium' if result.confidence >= 0.5 else 'low'
         status = '✓ 成功' if result.confidence > 0.5 else '✗ 失败'
+        n_invalid = validate_data_points(result.data_points).n_invalid
         
         rows.append(f"""
             <tr>
                 <td>{result.image_name}</td>
                 <td>{result.symbol or '未识别'}</td>
                 <td>{len(result.data_points)}</td>
+                <td>{n_invalid}</td>
                 <td class="{conf_class}">{result.confidence:.2f}</td>
                 <td>{status}</td>
             </tr>
@@ -0,0 +1,170 @@
+﻿"""
+OHLC数据校验模块
+对整批图形元素做向量化校验，每根图形元素得到一个标志位掩码，
+同时供置信度计算（ChartRecognizer）和报告（utils）使用
+"""
+
+import numpy as np
+from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass
+
+from config import PRICE_VALIDATION
+
+
+# 标志位
+FLAG_HIGH_BELOW_LOW = 1       # 最高价 < 最低价
+FLAG_HIGH_BELOW_BODY = 2      # 最高价小于开盘价或收盘价
+FLAG_LOW_ABOVE_BODY = 4       # 最低价大于开盘价或收盘价
+FLAG_NON_POSITIVE = 8         # 价格为负数或零
+FLAG_PRICE_JUMP = 16          # 相对上一根收盘价的涨跌幅超过 max_price_change
+FLAG_OUT_OF_RANGE = 32        # 价格超出 [min_price, max_price]
+
+FLAG_NAMES = {
+    FLAG_HIGH_BELOW_LOW: 'high_below_low',
+    FLAG_HIGH_BELOW_BODY: 'high_below_body',
+    FLAG_LOW_ABOVE_BODY: 'low_above_body',
+    FLAG_NON_POSITIVE: 'non_positive',
+    FLAG_PRICE_JUMP: 'price_jump',
+    FLAG_OUT_OF_RANGE: 'out_of_range',
+}
+
+FLAG_MESSAGES = {
+    FLAG_HIGH_BELOW_LOW: '最高价 < 最低价',
+    FLAG_HIGH_BELOW_BODY: '最高价小于开盘价或收盘价',
+    FLAG_LOW_ABOVE_BODY: '最低价大于开盘价或收盘价',
+    FLAG_NON_POSITIVE: '价格不能为负数或零',
+    FLAG_PRICE_JUMP: '涨跌幅超过上限',
+    FLAG_OUT_OF_RANGE: '价格超出合理范围',
+}
+
+
+@dataclass
+class ValidationReport:
+    """一批图形元素的校验结果"""
+    flags: np.ndarray                 # 每根图形元素的标志位掩码（uint8）
+    counts: Dict[str, int]            # 各标志出现的次数
+
+    @property
+    def n_bars(self) -> int:
+        return len(self.flags)
+
+    @property
+    def n_invalid(self) -> int:
+        """至少有一个标志的图形元素数量"""
+        return int(np.count_nonzero(self.flags))
+
+    @property
+    def is_valid(self) -> bool:
+        return self.n_invalid == 0
+
+    def count(self, mask: int) -> int:
+        """带有 mask 中任一标志的图形元素数量"""
+        return int(np.count_nonzero(self.flags & mask))
+
+    def messages(self, limit: Optional[int] = None) -> List[str]:
+        """
+        生成可读的错误信息（按图形元素顺序）
+
+        Args:
+            limit: 最多生成多少条，None表示全部
+        """
+        messages = []
+        for i in np.flatnonzero(self.flags):
+            for flag, text in FLAG_MESSAGES.items():
+                if self.flags[i] & flag:
+                    messages.append(f"图形元素{i}: {text}")
+            if limit is not None and len(messages) >= limit:
+                return messages[:limit]
+        return messages
+
+    def to_dict(self) -> Dict:
+        return {
+            'n_bars': self.n_bars,
+            'n_invalid': self.n_invalid,
+            'counts': self.counts
+        }
+
+
+def to_arrays(data_points) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    转换为 (open, high, low, close) 四个float数组
+
+    Args:
+        data_points: DataPoint/dict 列表，或形状为 (N, 4) 的OHLC数组
+    """
+    if isinstance(data_points, np.ndarray):
+        arr = data_points.astype(float, copy=False)
+    elif len(data_points) and isinstance(data_points[0], dict):
+        arr = np.array([(d['open'], d['high'], d['low'], d['close']) for d in data_points], dtype=float)
+    else:
+        arr = np.array([(d.open, d.high, d.low, d.close) for d in data_points], dtype=float)
+    arr = arr.reshape(-1, 4)
+    return arr[:, 0], arr[:, 1], arr[:, 2], arr[:, 3]
+
+
+def validate_ohlc(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                  max_price_change: Optional[float] = None,
+                  min_price: Optional[float] = None,
+                  max_price: Optional[float] = None) -> ValidationReport:
+    """
+    向量化校验OHLC数组
+
+    Args:
+        open_, high, low, close: 等长的价格数组（按时间顺序）
+        max_price_change: 最大涨跌幅，默认 PRICE_VALIDATION['max_price_change']
+        min_price: 最低价格，默认 PRICE_VALIDATION['min_price']
+        max_price: 最高价格，默认 PRICE_VALIDATION['max_price']
+
+    Returns:
+        ValidationReport
+    """
+    cfg = PRICE_VALIDATION
+    max_change = cfg['max_price_change'] if max_price_change is None else max_price_change
+    lo = cfg['min_price'] if min_price is None else min_price
+    hi = cfg['max_price'] if max_price is None else max_price
+
+    open_, high, low, close = (np.asarray(a, dtype=float) for a in (open_, high, low, close))
+    flags = np.zeros(len(open_), dtype=np.uint8)
+    if len(flags) == 0:
+        return ValidationReport(flags, {name: 0 for name in FLAG_NAMES.values()})
+
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    price_min = np.minimum(body_low, low)
+    price_max = np.maximum(body_high, high)
+
+    flags |= np.where(high < low, FLAG_HIGH_BELOW_LOW, 0).astype(np.uint8)
+    flags |= np.where(high < body_high, FLAG_HIGH_BELOW_BODY, 0).astype(np.uint8)
+    flags |= np.where(low > body_low, FLAG_LOW_ABOVE_BODY, 0).astype(np.uint8)
+    flags |= np.where(price_min <= 0, FLAG_NON_POSITIVE, 0).astype(np.uint8)
+    flags |= np.where((price_min < lo) | (price_max > hi), FLAG_OUT_OF_RANGE, 0).astype(np.uint8)
+
+    # 涨跌幅：第一根相对自身开盘价，之后相对上一根收盘价
+    reference = np.concatenate((open_[:1], close[:-1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.abs(close - reference) / np.abs(reference)
+    flags |= np.where((reference != 0) & (change > max_change), FLAG_PRICE_JUMP, 0).astype(np.uint8)
+
+    counts = {name: int(np.count_nonzero(flags & flag)) for flag, name in FLAG_NAMES.items()}
+    return ValidationReport(flags, counts)
+
+
+def validate_data_points(data_points, **kwargs) -> ValidationReport:
+    """
+    校验图形元素列表
+
+    Args:
+        data_points: DataPoint/dict 列表，或形状为 (N, 4) 的OHLC数组
+        **kwargs: 传给 validate_ohlc 的阈值
+
+    Returns:
+        ValidationReport
+    """
+    return validate_ohlc(*to_arrays(data_points), **kwargs)
+
+
+if __name__ == '__main__':
+    print("OHLC数据校验模块已加载")
+    print("可用函数:")
+    print("  - validate_ohlc(): 校验OHLC数组")
+    print("  - validate_data_points(): 校验图形元素列表")
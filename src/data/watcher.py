@@ -0,0 +1,184 @@
+﻿"""
+目录监控
+持续发现目录中新增或修改的图片：Linux 上安装了 inotify_simple 时使用 inotify，
+否则定时扫描。文件大小和修改时间保持不变一段时间（去抖）后才认为写入完成
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import WATCH_CONFIG
+from discovery import IMAGE_EXTENSIONS, iter_images
+
+# inotify_simple是可选依赖（仅Linux），不可用时定时扫描目录
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    """文件的 (修改时间, 大小)，文件不存在时为None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DirectoryWatcher:
+    """
+    目录监控器
+
+    Examples:
+        >>> watcher = DirectoryWatcher('screenshots')
+        >>> for paths in watcher.watch():
+        ...     results = [recognizer.recognize(p) for p in paths]
+    """
+
+    def __init__(self, directory: str, extensions: Iterable[str] = IMAGE_EXTENSIONS,
+                 recursive: bool = False, debounce: float = None, poll_interval: float = None,
+                 include_existing: bool = True, use_inotify: bool = None):
+        """
+        初始化目录监控器
+
+        Args:
+            directory: 监控的目录
+            extensions: 图片扩展名（不区分大小写）
+            recursive: 是否同时监控子目录
+            debounce: 文件保持不变多少秒后才认为写入完成
+            poll_interval: 定时扫描的间隔（秒）
+            include_existing: 启动时是否也处理目录中已有的图片
+            use_inotify: 是否使用inotify，None表示可用时使用
+        """
+        self.directory = os.path.abspath(directory)
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.recursive = recursive
+        self.debounce = WATCH_CONFIG['debounce'] if debounce is None else debounce
+        self.poll_interval = poll_interval or WATCH_CONFIG['poll_interval']
+        self.include_existing = include_existing
+        if use_inotify is None:
+            use_inotify = WATCH_CONFIG['use_inotify']
+        self.use_inotify = use_inotify and INOTIFY_AVAILABLE
+
+        self._stop = threading.Event()
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}   # 路径 -> (签名, 最后变化时间)
+        self._done: Dict[str, Tuple[int, int]] = {}                     # 已交出的文件及其签名
+        self._inotify = None
+        self._watch_dirs: Dict[int, str] = {}
+
+    def stop(self):
+        """停止监控（watch() 在当前等待结束后退出）"""
+        self._stop.set()
+
+    def _is_image(self, name: str) -> bool:
+        return name.lower().endswith(self.extensions)
+
+    def _scan(self, root: Optional[str] = None) -> Iterator[str]:
+        """扫描目录（默认为监控的目录）中的图片"""
+        return iter_images(root or self.directory, self.extensions, self.recursive)
+
+    def _touch(self, path: str, now: float):
+        """记录一个可能新增或修改的文件"""
+        sig = _signature(path)
+        if sig is None or self._done.get(path) == sig:
+            return
+        previous = self._pending.get(path)
+        if previous is None or previous[0] != sig:
+            self._pending[path] = (sig, now)
+
+    def _ready(self, now: float) -> List[str]:
+        """取出已经保持不变 debounce 秒的文件"""
+        ready = []
+        for path, (sig, changed_at) in list(self._pending.items()):
+            current = _signature(path)
+            if current is None:
+                del self._pending[path]
+            elif current != sig:
+                self._pending[path] = (current, now)
+            elif now - changed_at >= self.debounce and sig[1] > 0:
+                del self._pending[path]
+                self._done[path] = sig
+                ready.append(path)
+        return sorted(ready)
+
+    def _add_watch(self, directory: str):
+        mask = (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO |
+                inotify_flags.CREATE | inotify_flags.MODIFY)
+        try:
+            wd = self._inotify.add_watch(directory, mask)
+        except OSError:
+            return
+        self._watch_dirs[wd] = directory
+        if self.recursive:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        self._add_watch(entry.path)
+
+    def _read_events(self, timeout: float) -> List[str]:
+        """读取inotify事件，返回涉及的图片路径"""
+        paths = []
+        for event in self._inotify.read(timeout=int(timeout * 1000)):
+            directory = self._watch_dirs.get(event.wd)
+            if directory is None or not event.name:
+                continue
+            path = os.path.join(directory, event.name)
+            if event.mask & inotify_flags.ISDIR:
+                if self.recursive and event.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                    self._add_watch(path)
+                    # 监控建立之前子目录中可能已经有文件
+                    paths.extend(self._scan(path))
+            elif self._is_image(event.name):
+                paths.append(path)
+        return paths
+
+    def watch(self) -> Iterator[List[str]]:
+        """
+        持续监控，每次交出一批写入完成的图片路径（按路径排序），直到调用 stop()
+
+        同一个文件修改后会再次交出。
+        """
+        self._stop.clear()
+        if self.use_inotify:
+            self._inotify = INotify()
+            self._add_watch(self.directory)
+
+        try:
+            if self.include_existing:
+                now = time.monotonic()
+                for path in self._scan():
+                    self._touch(path, now)
+            else:
+                for path in self._scan():
+                    sig = _signature(path)
+                    if sig is not None:
+                        self._done[path] = sig
+
+            while not self._stop.is_set():
+                # 有文件等待去抖时缩短等待时间
+                wait = self.poll_interval
+                if self._pending:
+                    wait = min(wait, max(self.debounce / 2, 0.05))
+
+                if self._inotify is not None:
+                    paths = self._read_events(wait)
+                else:
+                    self._stop.wait(wait)
+                    paths = self._scan()
+
+                now = time.monotonic()
+                for path in paths:
+                    self._touch(path, now)
+
+                ready = self._ready(now)
+                if ready:
+                    yield ready
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+                self._watch_dirs.clear()